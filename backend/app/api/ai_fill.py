@@ -0,0 +1,514 @@
+"""
+Server-side AI column fill.
+
+A fill job reads item contexts straight from the database, sends them to
+Gemini in batches (several in flight at once, bounded by a semaphore) and
+writes each batch back in one transaction. Jobs run on the server's event
+loop, so they keep going if the browser tab is closed; progress is available
+by polling or as a Server-Sent Events stream.
+
+Jobs live in the memory of the process that runs them, so AI fill is only
+available when the server runs a single worker.
+"""
+import asyncio
+import re
+import time
+import uuid
+from datetime import datetime
+
+import httpx
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from app.api.chat import BatchCompletionRequest, complete_batch_cached, get_config
+from app.api.items import extract_value, get_value_for_column
+from app.database import ReadSessionLocal
+from app.logger import get_logger
+from app.models import Column, Item, ItemValue, generate_uuid
+from app.services.changes import mark_schema_changed, next_change_seq
+from app.services.config_store import config_store
+from app.services.events import publish_columns, publish_values
+from app.services.gemini import get_gemini_client
+from app.services.item_cache import item_cache
+from app.services.schema_cache import schema_cache
+from app.services.write_queue import run_write
+
+router = APIRouter(prefix="/lists/{list_id}/columns/{column_id}/ai-fill", tags=["ai-fill"])
+log = get_logger("listabob.ai_fill")
+
+DEFAULT_CONCURRENCY = 4
+MAX_CONCURRENCY = 16
+MAX_FINISHED_JOBS = 20
+
+
+class AIFillRequest(BaseModel):
+    model: str | None = None
+    batch_size: int = 10
+    concurrency: int | None = None  # defaults to config "ai_fill_concurrency"
+    skip_existing: bool = True
+    refresh: bool = False  # bypass the completion cache
+
+
+class AIFillResult(BaseModel):
+    item_id: str
+    label: str
+    status: str  # success | unknown | error
+    value: str | None = None
+    error: str | None = None
+
+
+class AIFillStatus(BaseModel):
+    id: str
+    list_id: str
+    column_id: str
+    model: str
+    status: str  # running | completed | cancelled | failed
+    total: int
+    done: int
+    filled: int
+    unknown: int
+    errors: int
+    skipped: int
+    error: str | None = None
+    started_at: datetime
+    finished_at: datetime | None = None
+    results: list[AIFillResult] = []
+    next_cursor: int = 0
+
+
+class AIFillJob:
+    def __init__(self, list_id: str, column_id: str, model: str, total: int, skipped: int):
+        self.id = str(uuid.uuid4())
+        self.list_id = list_id
+        self.column_id = column_id
+        self.model = model
+        self.status = "running"
+        self.total = total
+        self.skipped = skipped
+        self.done = 0
+        self.filled = 0
+        self.unknown = 0
+        self.errors = 0
+        self.error: str | None = None
+        self.started_at = datetime.utcnow()
+        self.finished_at: datetime | None = None
+        self.results: list[AIFillResult] = []
+        self.task: asyncio.Task | None = None
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status != "running"
+
+    def add_results(self, results: list[AIFillResult]):
+        for r in results:
+            if r.status == "success":
+                self.filled += 1
+            elif r.status == "unknown":
+                self.unknown += 1
+            else:
+                self.errors += 1
+        self.results.extend(results)
+        self.done += len(results)
+        self.notify()
+
+    def finish(self, status_: str, error: str | None = None):
+        self.status = status_
+        self.error = error
+        self.finished_at = datetime.utcnow()
+        self.notify()
+
+    def notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait_for_change(self, timeout: float):
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def snapshot(self, since: int = 0) -> AIFillStatus:
+        return AIFillStatus(
+            id=self.id,
+            list_id=self.list_id,
+            column_id=self.column_id,
+            model=self.model,
+            status=self.status,
+            total=self.total,
+            done=self.done,
+            filled=self.filled,
+            unknown=self.unknown,
+            errors=self.errors,
+            skipped=self.skipped,
+            error=self.error,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+            results=self.results[since:],
+            next_cursor=len(self.results),
+        )
+
+
+_jobs: dict[str, AIFillJob] = {}
+
+
+def _register(job: AIFillJob):
+    _jobs[job.id] = job
+    finished = [j for j in _jobs.values() if j.finished]
+    for old in sorted(finished, key=lambda j: j.started_at)[:-MAX_FINISHED_JOBS]:
+        del _jobs[old.id]
+
+
+def _get_job(list_id: str, column_id: str, job_id: str) -> AIFillJob:
+    job = _jobs.get(job_id)
+    if not job or job.list_id != list_id or job.column_id != column_id:
+        raise HTTPException(status_code=404, detail="AI fill job not found")
+    return job
+
+
+async def cancel_running_jobs():
+    """Cancel every running job (used on application shutdown)."""
+    tasks = [j.task for j in _jobs.values() if j.task and not j.task.done()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# ---------------------------------------------------------------------------
+# Database helpers (run in a worker thread)
+# ---------------------------------------------------------------------------
+
+def _load_work(list_id: str, column_id: str, skip_existing: bool) -> dict:
+    """Read the list schema and the context of every item that needs a value."""
+    db = ReadSessionLocal()
+    try:
+        db_list = schema_cache.get(db, list_id)
+        if not db_list:
+            raise HTTPException(status_code=404, detail="List not found")
+        columns = db_list.columns
+        target = db_list.column_by_id.get(column_id)
+        if not target:
+            raise HTTPException(status_code=404, detail="Column not found")
+
+        items = (
+            db.query(Item.id)
+            .filter(Item.list_id == list_id, Item.deleted_at.is_(None))
+            .order_by(Item.position)
+            .all()
+        )
+        item_ids = [row.id for row in items]
+        col_by_id = {c.id: c for c in columns}
+
+        values: dict[str, dict[str, object]] = {item_id: {} for item_id in item_ids}
+        if item_ids:
+            rows = (
+                db.query(ItemValue)
+                .join(Item, Item.id == ItemValue.item_id)
+                .filter(Item.list_id == list_id, Item.deleted_at.is_(None))
+                .all()
+            )
+            for iv in rows:
+                col = col_by_id.get(iv.column_id)
+                if col and iv.item_id in values:
+                    values[iv.item_id][col.id] = extract_value(iv, col.column_type)
+
+        first_col = columns[0] if columns else None
+        work = []
+        skipped = 0
+        for item_id in item_ids:
+            item_vals = values[item_id]
+            existing = item_vals.get(column_id)
+            if skip_existing and existing is not None and existing != "":
+                skipped += 1
+                continue
+            context = {
+                col.name: item_vals[col.id]
+                for col in columns
+                if col.id != column_id and item_vals.get(col.id) is not None and item_vals[col.id] != ""
+            }
+            label_val = item_vals.get(first_col.id) if first_col else None
+            label = str(label_val) if label_val is not None else f"Item {item_id[:8]}"
+            work.append({"item_id": item_id, "label": label, "item_context": context})
+
+        return {
+            "list_name": db_list.name,
+            "column_name": target.name,
+            "column_type": target.column_type,
+            "column_config": dict(target.config or {}),
+            "work": work,
+            "skipped": skipped,
+        }
+    finally:
+        db.close()
+
+
+def _coerce(value: str, column_type: str):
+    """Turn a model answer into something get_value_for_column can store."""
+    if column_type in ("number", "currency", "rating"):
+        return float(re.sub(r"[$€£¥,\s]", "", value))
+    if column_type == "boolean":
+        return value.strip().lower() in ("true", "yes", "1", "y")
+    if column_type == "choice":
+        return value.strip()
+    return value
+
+
+def _write_batch(list_id: str, column_id: str, column_type: str, answers: dict[str, object]):
+    """Upsert one batch of answers for a column in a single transaction."""
+    if not answers:
+        return
+    choices_added = run_write(_apply_batch, list_id, column_id, column_type, answers)
+    item_cache.discard(answers)
+    publish_values(list_id, column_id, {
+        item_id: extract_value(ItemValue(**get_value_for_column(value, column_type)), column_type)
+        for item_id, value in answers.items()
+    })
+    if choices_added:
+        schema_cache.invalidate(list_id)
+        db = ReadSessionLocal()
+        try:
+            publish_columns(db, list_id)
+        finally:
+            db.close()
+
+
+def _apply_batch(db: Session, list_id: str, column_id: str, column_type: str, answers: dict[str, object]) -> bool:
+    """Returns whether new choice options were added to the column."""
+    item_ids = list(answers)
+    existing = dict(
+        db.query(ItemValue.item_id, ItemValue.id)
+        .filter(ItemValue.column_id == column_id, ItemValue.item_id.in_(item_ids))
+        .all()
+    )
+    updates, inserts = [], []
+    for item_id, value in answers.items():
+        fields = get_value_for_column(value, column_type)
+        if item_id in existing:
+            updates.append({"id": existing[item_id], **fields})
+        else:
+            inserts.append({"id": generate_uuid(), "item_id": item_id, "column_id": column_id, **fields})
+    if updates:
+        db.execute(update(ItemValue), updates)
+    if inserts:
+        db.execute(insert(ItemValue), inserts)
+    db.query(Item).filter(Item.id.in_(item_ids)).update(
+        {"updated_at": datetime.utcnow(), "change_seq": next_change_seq(db)}, synchronize_session=False
+    )
+
+    # Add any new choice options the model suggested
+    if column_type in ("choice", "multiple_choice"):
+        column = db.query(Column).filter(Column.id == column_id, Column.list_id == list_id).first()
+        if column:
+            config = dict(column.config or {})
+            choices = list(config.get("choices") or [])
+            known = {str(c).lower() for c in choices}
+            for value in answers.values():
+                parts = str(value).split(",") if column_type == "multiple_choice" else [str(value)]
+                for part in (p.strip() for p in parts):
+                    if part and part.lower() not in known:
+                        known.add(part.lower())
+                        choices.append(part)
+            if len(choices) != len(config.get("choices") or []):
+                config["choices"] = choices
+                column.config = config
+                mark_schema_changed(db, list_id, columns=True)
+                return True
+    return False
+
+
+# ---------------------------------------------------------------------------
+# Job runner
+# ---------------------------------------------------------------------------
+
+async def _run_job(
+    job: AIFillJob,
+    client: httpx.AsyncClient,
+    api_key: str,
+    spec: dict,
+    batch_size: int,
+    concurrency: int,
+    refresh: bool,
+):
+    work = spec["work"]
+    semaphore = asyncio.Semaphore(concurrency)
+    write_lock = asyncio.Lock()
+    started = time.perf_counter()
+
+    async def run_batch(batch: list[dict]):
+        async with semaphore:
+            request = BatchCompletionRequest(
+                list_name=spec["list_name"],
+                items=[{"item_context": w["item_context"]} for w in batch],
+                target_column=spec["column_name"],
+                column_type=spec["column_type"],
+                column_config=spec["column_config"],
+                model=job.model,
+                refresh=refresh,
+            )
+            try:
+                values = await complete_batch_cached(client, api_key, job.model, request)
+            except Exception as e:
+                detail = str(e.detail) if isinstance(e, HTTPException) else str(e)
+                job.add_results([
+                    AIFillResult(item_id=w["item_id"], label=w["label"], status="error", error=detail)
+                    for w in batch
+                ])
+                return
+
+        answers: dict[str, object] = {}
+        results: list[AIFillResult] = []
+        for w, value in zip(batch, values):
+            if value is None:
+                results.append(AIFillResult(item_id=w["item_id"], label=w["label"], status="unknown"))
+                continue
+            try:
+                answers[w["item_id"]] = _coerce(value, spec["column_type"])
+            except ValueError:
+                results.append(AIFillResult(
+                    item_id=w["item_id"], label=w["label"], status="error",
+                    value=value, error="Value does not match column type",
+                ))
+                continue
+            results.append(AIFillResult(item_id=w["item_id"], label=w["label"], status="success", value=value))
+
+        try:
+            async with write_lock:
+                await asyncio.to_thread(_write_batch, job.list_id, job.column_id, spec["column_type"], answers)
+        except Exception as e:
+            log.error("AI FILL WRITE ERROR  job=%s  error=%s", job.id, e)
+            results = [
+                r if r.status != "success" else r.model_copy(update={"status": "error", "error": "Could not save value"})
+                for r in results
+            ]
+        job.add_results(results)
+
+    batches = [work[i:i + batch_size] for i in range(0, len(work), batch_size)]
+    try:
+        await asyncio.gather(*(run_batch(b) for b in batches))
+    except asyncio.CancelledError:
+        job.finish("cancelled")
+        log.info("AI FILL CANCELLED  job=%s  done=%d/%d", job.id, job.done, job.total)
+        raise
+    except Exception as e:
+        log.error("AI FILL FAILED  job=%s  error=%s", job.id, e)
+        job.finish("failed", str(e))
+        return
+
+    job.finish("completed")
+    log.info(
+        "AI FILL DONE  job=%s  items=%d  filled=%d  unknown=%d  errors=%d  batches=%d  concurrency=%d  secs=%.1f",
+        job.id, job.total, job.filled, job.unknown, job.errors, len(batches), concurrency,
+        time.perf_counter() - started,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Endpoints
+# ---------------------------------------------------------------------------
+
+@router.post("", response_model=AIFillStatus, status_code=status.HTTP_202_ACCEPTED)
+async def start_ai_fill(
+    list_id: str,
+    column_id: str,
+    data: AIFillRequest,
+    client: httpx.AsyncClient = Depends(get_gemini_client),
+):
+    """Start filling a column with AI answers for every item in the list."""
+    config = get_config()
+    api_key = config.get("gemini_api_key")
+    if not api_key:
+        raise HTTPException(status_code=400, detail="Gemini API key not configured. Please set it in System Settings.")
+    if config_store.workers() > 1:
+        # Polls, events and cancels could land on a worker that doesn't know the job
+        raise HTTPException(status_code=400, detail="AI fill needs a single server worker. Set server.workers to 1.")
+
+    running = next(
+        (j for j in _jobs.values() if j.list_id == list_id and j.column_id == column_id and not j.finished),
+        None,
+    )
+    if running:
+        raise HTTPException(status_code=409, detail="An AI fill job is already running for this column")
+
+    model_name = data.model or config.get("gemini_model") or "gemini-2.0-flash"
+    batch_size = max(1, data.batch_size)
+    concurrency = data.concurrency or int(config.get("ai_fill_concurrency", DEFAULT_CONCURRENCY))
+    concurrency = max(1, min(concurrency, MAX_CONCURRENCY))
+
+    # Registered before loading, so a second request for the column gets the 409
+    job = AIFillJob(list_id, column_id, model_name, total=0, skipped=0)
+    _register(job)
+    try:
+        spec = await asyncio.to_thread(_load_work, list_id, column_id, data.skip_existing)
+    except BaseException:
+        _jobs.pop(job.id, None)
+        raise
+    if job.finished:  # cancelled while loading
+        return job.snapshot()
+
+    job.total = len(spec["work"])
+    job.skipped = spec["skipped"]
+    log.info(
+        "AI FILL START  job=%s  list=%r  column=%r  items=%d  skipped=%d  batch_size=%d  concurrency=%d  model=%s",
+        job.id, spec["list_name"], spec["column_name"], job.total, job.skipped, batch_size, concurrency, model_name,
+    )
+    job.task = asyncio.create_task(
+        _run_job(job, client, api_key, spec, batch_size, concurrency, data.refresh)
+    )
+    return job.snapshot()
+
+
+@router.get("", response_model=AIFillStatus | None)
+def get_latest_ai_fill(list_id: str, column_id: str):
+    """Return the most recent job for this column (running or finished), if any."""
+    jobs = [j for j in _jobs.values() if j.list_id == list_id and j.column_id == column_id]
+    if not jobs:
+        return None
+    return max(jobs, key=lambda j: j.started_at).snapshot()
+
+
+@router.get("/{job_id}", response_model=AIFillStatus)
+def get_ai_fill(list_id: str, column_id: str, job_id: str, since: int = Query(0, ge=0)):
+    """Poll job progress. Only results after the ``since`` cursor are returned."""
+    return _get_job(list_id, column_id, job_id).snapshot(since)
+
+
+@router.get("/{job_id}/events")
+async def stream_ai_fill(list_id: str, column_id: str, job_id: str, request: Request):
+    """Stream job progress as Server-Sent Events until the job finishes."""
+    job = _get_job(list_id, column_id, job_id)
+
+    async def events():
+        cursor = 0
+        while True:
+            snapshot = job.snapshot(cursor)
+            cursor = snapshot.next_cursor
+            yield f"event: progress\ndata: {snapshot.model_dump_json()}\n\n"
+            if job.finished:
+                break
+            await job.wait_for_change(timeout=15.0)
+            if await request.is_disconnected():
+                break
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/{job_id}/cancel", response_model=AIFillStatus)
+async def cancel_ai_fill(list_id: str, column_id: str, job_id: str):
+    """Stop a running job. Batches already written are kept."""
+    job = _get_job(list_id, column_id, job_id)
+    if job.task is None and not job.finished:
+        job.finish("cancelled")  # still loading; start_ai_fill won't run it
+    elif job.task and not job.task.done():
+        job.task.cancel()
+        try:
+            await job.task
+        except asyncio.CancelledError:
+            pass
+    return job.snapshot()
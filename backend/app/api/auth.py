@@ -1,43 +1,16 @@
-import sys
 from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel
-import json
-import hashlib
-from pathlib import Path
 
-router = APIRouter(prefix="/auth", tags=["auth"])
-
-
-def get_base_dir() -> Path:
-    """Get the base directory for config file."""
-    if getattr(sys, 'frozen', False):
-        return Path(sys.executable).parent
-    return Path(__file__).parent.parent.parent.parent
+from app.services.config_store import (
+    CONFIG_PATH, DEFAULT_CONFIG, config_store, generate_token,
+)
 
-
-CONFIG_PATH = get_base_dir() / "config.json"
+router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 def get_config():
-    """Load config from file."""
-    if not CONFIG_PATH.exists():
-        # Create default config for standalone mode
-        default_config = {
-            "password": "listabob",
-            "revoke_timestamp": "2026-01-01T00:00:00Z",
-            "backup_path": ""
-        }
-        with open(CONFIG_PATH, 'w') as f:
-            json.dump(default_config, f, indent=2)
-        return default_config
-    with open(CONFIG_PATH) as f:
-        return json.load(f)
-
-
-def generate_token(password: str, revoke_timestamp: str) -> str:
-    """Generate a token from password and timestamp."""
-    combined = f"{password}:{revoke_timestamp}"
-    return hashlib.sha256(combined.encode()).hexdigest()
+    """Load config from the cached store, creating a default file if missing."""
+    return config_store.ensure_exists(DEFAULT_CONFIG)
 
 
 class LoginRequest(BaseModel):
@@ -84,8 +57,7 @@ def verify(data: VerifyRequest):
         return VerifyResponse(valid=False, revoke_timestamp=config["revoke_timestamp"])
     
     # Verify the token
-    expected_token = generate_token(config["password"], config["revoke_timestamp"])
-    if data.token != expected_token:
+    if data.token != config_store.expected_token():
         return VerifyResponse(valid=False, revoke_timestamp=config["revoke_timestamp"])
     
     return VerifyResponse(valid=True)
@@ -1,30 +1,41 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+import asyncio
 import json
-from pathlib import Path
-import sys
+import time
 import httpx
 
 from app.logger import get_logger
+from app.services.config_store import config_store
+from app.services.completion_cache import completion_cache, make_key
+from app.services.chat_sessions import chat_sessions
+from app.services.batch_planner import estimate_item_tokens, estimate_tokens, plan_batches
+from app.services.rate_limiter import BULK
+from app.services.gemini import (
+    get_gemini_client,
+    send_gemini,
+    raise_for_rate_limit,
+    response_text,
+    CHAT_TIMEOUT,
+    CHAT_STREAM_TIMEOUT,
+    COMPLETION_TIMEOUT,
+    ITEM_COMPLETION_TIMEOUT,
+    BATCH_COMPLETION_TIMEOUT,
+    MODELS_TIMEOUT,
+)
 
 router = APIRouter(prefix="/api/chat", tags=["chat"])
 log = get_logger("listabob.chat")
 
-GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
-
-
-def get_base_dir() -> Path:
-    if getattr(sys, 'frozen', False):
-        return Path(sys.executable).parent
-    return Path(__file__).parent.parent.parent.parent
+# Gemini only caches prompts above a model-specific minimum size
+DEFAULT_CONTEXT_CACHE_MIN_TOKENS = 4096
+CONTEXT_CACHE_TTL_SECONDS = 3600
+_context_cache_unsupported: set[str] = set()
 
 
 def get_config():
-    config_path = get_base_dir() / "config.json"
-    if not config_path.exists():
-        return {}
-    with open(config_path, "r") as f:
-        return json.load(f)
+    return config_store.get()
 
 
 class ChatMessage(BaseModel):
@@ -33,15 +44,18 @@ class ChatMessage(BaseModel):
 
 
 class ChatRequest(BaseModel):
-    list_name: str
-    item_context: dict
-    messages: list[ChatMessage]
+    list_name: str = ""
+    item_context: dict = {}
+    messages: list[ChatMessage] = []
     model: str | None = None
+    # Continue a stored conversation: send only the new message(s)
+    session_id: str | None = None
 
 
 class ChatResponse(BaseModel):
     message: str
     model: str
+    session_id: str | None = None
 
 
 class GeminiModelInfo(BaseModel):
@@ -49,89 +63,216 @@ class GeminiModelInfo(BaseModel):
     name: str
 
 
-@router.post("", response_model=ChatResponse)
-async def chat_with_item(request: ChatRequest):
-    """Send a chat message about a list item to Gemini."""
-    config = get_config()
-    api_key = config.get("gemini_api_key")
-    if not api_key:
-        raise HTTPException(status_code=400, detail="Gemini API key not configured. Please set it in System Settings.")
+DEFAULT_SYSTEM_PROMPT = (
+    "You are a helpful assistant. The user is asking about a specific item "
+    "from their list management app.\n\n"
+    "List: {list_name}\n"
+    "Item data:\n{item_context_str}\n\n"
+    "Answer the user's questions about this item. Be concise and helpful. "
+    "If the user asks something unrelated to the item, you can still help "
+    "but keep the item context in mind."
+)
 
-    model_name = request.model or config.get("gemini_model") or "gemini-2.0-flash"
 
-    # Build item context string
+def _build_system_instruction(config: dict, list_name: str, item_context: dict) -> str:
     context_lines = []
-    for col_name, value in request.item_context.items():
+    for col_name, value in item_context.items():
         context_lines.append(f"  {col_name}: {value}")
     item_context_str = "\n".join(context_lines)
 
     # Use configurable system prompt or default
-    DEFAULT_SYSTEM_PROMPT = (
-        "You are a helpful assistant. The user is asking about a specific item "
-        "from their list management app.\n\n"
-        "List: {list_name}\n"
-        "Item data:\n{item_context_str}\n\n"
-        "Answer the user's questions about this item. Be concise and helpful. "
-        "If the user asks something unrelated to the item, you can still help "
-        "but keep the item context in mind."
-    )
     prompt_template = config.get("gemini_system_prompt") or DEFAULT_SYSTEM_PROMPT
-    system_instruction = prompt_template.replace(
-        "{list_name}", request.list_name
+    return prompt_template.replace(
+        "{list_name}", list_name
     ).replace(
         "{item_context_str}", item_context_str
     )
 
-    # Build Gemini REST payload
-    # All messages except the last go into contents history
-    contents = []
-    for msg in request.messages[:-1]:
-        role = "user" if msg.role == "user" else "model"
-        contents.append({"role": role, "parts": [{"text": msg.content}]})
 
-    last_message = request.messages[-1].content if request.messages else ""
-    contents.append({"role": "user", "parts": [{"text": last_message}]})
+def _to_contents(turns: list[tuple[str, str]]) -> list[dict]:
+    return [
+        {"role": "user" if role == "user" else "model", "parts": [{"text": content}]}
+        for role, content in turns
+    ]
+
+
+async def _context_cache_for(
+    client: httpx.AsyncClient, api_key: str, model_name: str, session: dict,
+) -> str | None:
+    """Name of a Gemini cachedContents entry holding the session's system instruction.
+
+    Only used for prompts long enough to qualify for context caching. Returns
+    None (send the prompt inline) when the prompt is short, the model does not
+    support caching or creating the cache fails.
+    """
+    min_tokens = int(config_store.get_value("gemini_context_cache_min_tokens", DEFAULT_CONTEXT_CACHE_MIN_TOKENS))
+    if (
+        min_tokens <= 0
+        or model_name in _context_cache_unsupported
+        or estimate_tokens(session["system_instruction"]) < min_tokens
+    ):
+        return None
+    if (
+        session["cached_content"]
+        and session["cached_model"] == model_name
+        and (session["cached_expires_at"] or 0) > time.time() + 60
+    ):
+        return session["cached_content"]
+
+    body = {
+        "model": f"models/{model_name}",
+        "systemInstruction": {"parts": [{"text": session["system_instruction"]}]},
+        "ttl": f"{CONTEXT_CACHE_TTL_SECONDS}s",
+    }
+    try:
+        resp = await send_gemini(
+            client, "POST", "/cachedContents", params={"key": api_key}, json=body, timeout=COMPLETION_TIMEOUT,
+        )
+        name = resp.json().get("name") if resp.status_code == 200 else None
+    except (httpx.RequestError, ValueError):
+        return None
+    if not name:
+        if resp.status_code in (400, 404):
+            # Model or prompt not eligible; don't try again for this model
+            _context_cache_unsupported.add(model_name)
+        log.info("CHAT CONTEXT CACHE UNAVAILABLE  model=%s  status=%d", model_name, resp.status_code)
+        return None
+
+    expires_at = time.time() + CONTEXT_CACHE_TTL_SECONDS
+    await asyncio.to_thread(chat_sessions.set_cached_content, session["id"], name, model_name, expires_at)
+    log.info("CHAT CONTEXT CACHE CREATED  session=%s  model=%s  name=%s", session["id"], model_name, name)
+    return name
+
+
+async def _prepare_chat(client: httpx.AsyncClient, request: ChatRequest) -> tuple[str, str, dict, dict]:
+    """Validate config, load or start the session and build the Gemini payload.
+
+    Returns (api_key, model_name, session, payload). ``session["new_turns"]``
+    holds the turns to record once the reply arrives.
+    """
+    config = get_config()
+    api_key = config.get("gemini_api_key")
+    if not api_key:
+        raise HTTPException(status_code=400, detail="Gemini API key not configured. Please set it in System Settings.")
+
+    model_name = request.model or config.get("gemini_model") or "gemini-2.0-flash"
+    incoming = [(m.role, m.content) for m in request.messages]
+
+    if request.session_id:
+        session = await chat_sessions.aget(request.session_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Chat session not found or expired.")
+        new_turns = incoming
+    else:
+        # First turn (or an older client resending everything): start a session
+        system_instruction = _build_system_instruction(config, request.list_name, request.item_context)
+        history, new_turns = incoming[:-1], incoming[-1:]
+        session_id = await chat_sessions.acreate(request.list_name, system_instruction, history)
+        session = {
+            "id": session_id,
+            "list_name": request.list_name,
+            "system_instruction": system_instruction,
+            "cached_content": None,
+            "cached_model": None,
+            "cached_expires_at": None,
+            "messages": history,
+        }
+
+    if not new_turns or new_turns[-1][0] != "user":
+        new_turns = [*new_turns, ("user", "")]
+    session["new_turns"] = new_turns
 
     payload = {
-        "systemInstruction": {"parts": [{"text": system_instruction}]},
-        "contents": contents,
+        "systemInstruction": {"parts": [{"text": session["system_instruction"]}]},
+        "contents": _to_contents(session["messages"] + new_turns),
         "generationConfig": {"candidateCount": 1},
     }
+    cached_content = await _context_cache_for(client, api_key, model_name, session)
+    if cached_content:
+        session["inline_payload"] = dict(payload)
+        del payload["systemInstruction"]
+        payload["cachedContent"] = cached_content
 
     log.info(
-        "CHAT REQUEST  list=%r  model=%s  history_turns=%d",
-        request.list_name, model_name, len(contents) - 1,
+        "CHAT REQUEST  list=%r  model=%s  session=%s  history_turns=%d  cached_context=%s",
+        session["list_name"], model_name, session["id"], len(session["messages"]), bool(cached_content),
     )
-    log.debug("SYSTEM PROMPT:\n%s", system_instruction)
-    log.debug("USER MESSAGE:\n%s", last_message)
+    log.debug("SYSTEM PROMPT:\n%s", session["system_instruction"])
+    log.debug("USER MESSAGE:\n%s", new_turns[-1][1])
+
+    return api_key, model_name, session, payload
+
+
+async def _send_chat(
+    client: httpx.AsyncClient,
+    url: str,
+    params: dict,
+    session: dict,
+    payload: dict,
+    timeout: httpx.Timeout,
+    stream: bool = False,
+) -> httpx.Response:
+    """Send a chat turn, falling back to the inline prompt if the context cache is gone."""
+    resp = await send_gemini(client, "POST", url, params=params, json=payload, timeout=timeout, stream=stream)
+    if "cachedContent" in payload and resp.status_code in (400, 403, 404):
+        if stream:
+            await resp.aread()
+            await resp.aclose()
+        log.warning("CHAT CONTEXT CACHE REJECTED  session=%s  status=%d", session["id"], resp.status_code)
+        await asyncio.to_thread(chat_sessions.set_cached_content, session["id"], None, None, None)
+        resp = await send_gemini(
+            client, "POST", url, params=params, json=session["inline_payload"], timeout=timeout, stream=stream,
+        )
+    return resp
+
+
+async def _record_turn(session: dict, reply: str):
+    await chat_sessions.aappend(session["id"], [*session["new_turns"], ("assistant", reply)])
+
+
+def _raise_for_chat_status(resp: httpx.Response, model_name: str):
+    """Map Gemini error responses to HTTP errors for the chat endpoints."""
+    if resp.status_code == 400:
+        try:
+            detail = resp.json().get("error", {}).get("message", "Bad request")
+        except ValueError:
+            detail = "Bad request"
+        log.error("CHAT ERROR 400  model=%s  detail=%s", model_name, detail)
+        raise HTTPException(status_code=400, detail=detail)
 
-    url = f"{GEMINI_BASE_URL}/models/{model_name}:generateContent"
+    raise_for_rate_limit(resp)
 
-    try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            resp = await client.post(url, params={"key": api_key}, json=payload)
+    if resp.status_code == 401 or resp.status_code == 403:
+        log.error("CHAT ERROR auth  model=%s  status=%d", model_name, resp.status_code)
+        raise HTTPException(status_code=401, detail="Invalid Gemini API key. Please check your key in System Settings.")
 
-        if resp.status_code == 400:
-            detail = resp.json().get("error", {}).get("message", "Bad request")
-            log.error("CHAT ERROR 400  model=%s  detail=%s", model_name, detail)
-            raise HTTPException(status_code=400, detail=detail)
+    if resp.status_code != 200:
+        error_msg = resp.text[:300]
+        log.error("CHAT ERROR %d  model=%s  body=%s", resp.status_code, model_name, error_msg)
+        raise HTTPException(status_code=500, detail=f"Gemini API error ({resp.status_code}): {error_msg}")
 
-        if resp.status_code == 401 or resp.status_code == 403:
-            log.error("CHAT ERROR auth  model=%s  status=%d", model_name, resp.status_code)
-            raise HTTPException(status_code=401, detail="Invalid Gemini API key. Please check your key in System Settings.")
 
-        if resp.status_code != 200:
-            error_msg = resp.text[:300]
-            log.error("CHAT ERROR %d  model=%s  body=%s", resp.status_code, model_name, error_msg)
-            raise HTTPException(status_code=500, detail=f"Gemini API error ({resp.status_code}): {error_msg}")
+@router.post("", response_model=ChatResponse)
+async def chat_with_item(
+    request: ChatRequest,
+    client: httpx.AsyncClient = Depends(get_gemini_client),
+):
+    """Send a chat message about a list item to Gemini."""
+    api_key, model_name, session, payload = await _prepare_chat(client, request)
+
+    url = f"/models/{model_name}:generateContent"
+
+    try:
+        resp = await _send_chat(client, url, {"key": api_key}, session, payload, CHAT_TIMEOUT)
+        _raise_for_chat_status(resp, model_name)
 
-        data = resp.json()
-        text = data["candidates"][0]["content"]["parts"][0]["text"]
+        text = response_text(resp, model_name)
+        await _record_turn(session, text)
 
         log.info("CHAT RESPONSE  model=%s  chars=%d", model_name, len(text))
         log.debug("ASSISTANT RESPONSE:\n%s", text)
 
-        return ChatResponse(message=text, model=model_name)
+        return ChatResponse(message=text, model=model_name, session_id=session["id"])
 
     except httpx.TimeoutException:
         log.error("CHAT TIMEOUT  model=%s", model_name)
@@ -141,24 +282,141 @@ async def chat_with_item(request: ChatRequest):
         raise HTTPException(status_code=502, detail=f"Network error reaching Gemini: {str(e)}")
 
 
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _chunk_text(chunk: dict) -> str:
+    """Concatenate the text parts of one streamGenerateContent chunk."""
+    try:
+        parts = chunk["candidates"][0]["content"]["parts"]
+    except (KeyError, IndexError, TypeError):
+        return ""
+    return "".join(p.get("text", "") for p in parts)
+
+
+@router.post("/stream")
+async def stream_chat_with_item(
+    request: ChatRequest,
+    http_request: Request,
+    client: httpx.AsyncClient = Depends(get_gemini_client),
+):
+    """Stream a chat reply as Server-Sent Events.
+
+    Emits ``delta`` events with text fragments as Gemini produces them, then a
+    single ``done`` event carrying the session id (or ``error`` if the stream
+    breaks part way). The upstream request is closed as soon as the client
+    disconnects; only completed replies are added to the session.
+    """
+    started = time.perf_counter()
+    api_key, model_name, session, payload = await _prepare_chat(client, request)
+
+    url = f"/models/{model_name}:streamGenerateContent"
+
+    try:
+        resp = await _send_chat(
+            client, url, {"key": api_key, "alt": "sse"}, session, payload, CHAT_STREAM_TIMEOUT, stream=True,
+        )
+    except httpx.TimeoutException:
+        log.error("CHAT STREAM TIMEOUT  model=%s", model_name)
+        raise HTTPException(status_code=504, detail="Request to Gemini timed out.")
+    except httpx.RequestError as e:
+        log.error("CHAT STREAM NETWORK ERROR  model=%s  error=%s", model_name, str(e))
+        raise HTTPException(status_code=502, detail=f"Network error reaching Gemini: {str(e)}")
+
+    if resp.status_code != 200:
+        try:
+            await resp.aread()
+        finally:
+            await resp.aclose()
+        _raise_for_chat_status(resp, model_name)
+
+    async def relay():
+        chars = 0
+        pieces: list[str] = []
+        first_token_at = None
+        completed = False
+        try:
+            async for line in resp.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                try:
+                    chunk = json.loads(line[5:].strip())
+                except ValueError:
+                    continue
+                text = _chunk_text(chunk)
+                if not text:
+                    continue
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                chars += len(text)
+                pieces.append(text)
+                yield _sse("delta", {"text": text})
+                if await http_request.is_disconnected():
+                    log.info("CHAT STREAM CLIENT DISCONNECTED  model=%s  chars=%d", model_name, chars)
+                    return
+            completed = True
+            await _record_turn(session, "".join(pieces))
+            yield _sse("done", {"model": model_name, "chars": chars, "session_id": session["id"]})
+        except httpx.TimeoutException:
+            log.error("CHAT STREAM TIMEOUT  model=%s  chars=%d", model_name, chars)
+            yield _sse("error", {"detail": "Request to Gemini timed out."})
+        except httpx.RequestError as e:
+            log.error("CHAT STREAM NETWORK ERROR  model=%s  error=%s", model_name, str(e))
+            yield _sse("error", {"detail": f"Network error reaching Gemini: {str(e)}"})
+        finally:
+            await resp.aclose()
+            ttft = (first_token_at - started) * 1000 if first_token_at else None
+            log.info(
+                "CHAT STREAM %s  model=%s  chars=%d  ttft_ms=%s  total_ms=%.0f",
+                "RESPONSE" if completed else "ABORTED", model_name, chars,
+                f"{ttft:.0f}" if ttft is not None else "-", (time.perf_counter() - started) * 1000,
+            )
+
+    return StreamingResponse(
+        relay(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.delete("/sessions/{session_id}", status_code=204)
+async def delete_chat_session(
+    session_id: str,
+    client: httpx.AsyncClient = Depends(get_gemini_client),
+):
+    """Forget a chat session and release its Gemini context cache."""
+    cached_content = await asyncio.to_thread(chat_sessions.delete, session_id)
+    if cached_content:
+        api_key = get_config().get("gemini_api_key")
+        try:
+            await send_gemini(client, "DELETE", f"/{cached_content}", params={"key": api_key}, timeout=MODELS_TIMEOUT)
+        except httpx.RequestError as e:
+            # It expires on its own; nothing else to do
+            log.warning("CHAT CONTEXT CACHE DELETE FAILED  name=%s  error=%s", cached_content, e)
+
+
 @router.get("/models", response_model=list[GeminiModelInfo])
-async def list_gemini_models():
+async def list_gemini_models(client: httpx.AsyncClient = Depends(get_gemini_client)):
     """List available Gemini models."""
     config = get_config()
     api_key = config.get("gemini_api_key")
     if not api_key:
         raise HTTPException(status_code=400, detail="Gemini API key not configured.")
 
-    url = f"{GEMINI_BASE_URL}/models"
+    url = "/models"
 
     try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            resp = await client.get(url, params={"key": api_key})
+        resp = await send_gemini(client, "GET", url, params={"key": api_key}, timeout=MODELS_TIMEOUT)
 
+        raise_for_rate_limit(resp)
         if resp.status_code != 200:
             raise HTTPException(status_code=resp.status_code, detail=f"Failed to list models: {resp.text[:200]}")
 
-        data = resp.json()
+        try:
+            data = resp.json()
+        except ValueError:
+            raise HTTPException(status_code=502, detail="Gemini returned a malformed response.")
         models = []
         for m in data.get("models", []):
             if "generateContent" in m.get("supportedGenerationMethods", []):
@@ -180,6 +438,7 @@ class CompletionRequest(BaseModel):
     column_type: str
     column_config: dict | None = None  # e.g. {"choices": [...]} for choice columns
     model: str | None = None
+    refresh: bool = False  # skip cached results and ask the model again
 
 
 class CompletionResponse(BaseModel):
@@ -188,7 +447,10 @@ class CompletionResponse(BaseModel):
 
 
 @router.post("/complete", response_model=CompletionResponse)
-async def complete_column_value(request: CompletionRequest):
+async def complete_column_value(
+    request: CompletionRequest,
+    client: httpx.AsyncClient = Depends(get_gemini_client),
+):
     """Use AI to determine the value for a specific column on an item."""
     config = get_config()
     api_key = config.get("gemini_api_key")
@@ -246,36 +508,45 @@ async def complete_column_value(request: CompletionRequest):
     )
     log.debug("COMPLETION CONTEXT:\n%s", item_context_str)
 
-    url = f"{GEMINI_BASE_URL}/models/{model_name}:generateContent"
+    url = f"/models/{model_name}:generateContent"
 
-    try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            resp = await client.post(url, params={"key": api_key}, json=payload)
+    async def _fetch() -> str | None:
+        try:
+            resp = await send_gemini(client, "POST", url, params={"key": api_key}, json=payload, timeout=COMPLETION_TIMEOUT)
 
-        if resp.status_code == 401 or resp.status_code == 403:
-            raise HTTPException(status_code=401, detail="Invalid Gemini API key.")
+            raise_for_rate_limit(resp)
+            if resp.status_code == 401 or resp.status_code == 403:
+                raise HTTPException(status_code=401, detail="Invalid Gemini API key.")
 
-        if resp.status_code != 200:
-            error_msg = resp.text[:300]
-            log.error("COMPLETION ERROR %d  model=%s  body=%s", resp.status_code, model_name, error_msg)
-            raise HTTPException(status_code=500, detail=f"Gemini API error ({resp.status_code})")
+            if resp.status_code != 200:
+                error_msg = resp.text[:300]
+                log.error("COMPLETION ERROR %d  model=%s  body=%s", resp.status_code, model_name, error_msg)
+                raise HTTPException(status_code=500, detail=f"Gemini API error ({resp.status_code})")
 
-        data = resp.json()
-        text = data["candidates"][0]["content"]["parts"][0]["text"].strip()
+            text = response_text(resp, model_name).strip()
 
-        log.info("COMPLETION RESPONSE  column=%r  value=%r  model=%s", request.target_column, text, model_name)
+            log.info("COMPLETION RESPONSE  column=%r  value=%r  model=%s", request.target_column, text, model_name)
 
-        if text.upper() == "UNKNOWN":
-            return CompletionResponse(value=None, model=model_name)
+            if text.upper() == "UNKNOWN":
+                return None
 
-        return CompletionResponse(value=text, model=model_name)
+            return text
 
-    except httpx.TimeoutException:
-        log.error("COMPLETION TIMEOUT  model=%s", model_name)
-        raise HTTPException(status_code=504, detail="Request to Gemini timed out.")
-    except httpx.RequestError as e:
-        log.error("COMPLETION NETWORK ERROR  model=%s  error=%s", model_name, str(e))
-        raise HTTPException(status_code=502, detail=f"Network error: {str(e)}")
+        except httpx.TimeoutException:
+            log.error("COMPLETION TIMEOUT  model=%s", model_name)
+            raise HTTPException(status_code=504, detail="Request to Gemini timed out.")
+        except httpx.RequestError as e:
+            log.error("COMPLETION NETWORK ERROR  model=%s  error=%s", model_name, str(e))
+            raise HTTPException(status_code=502, detail=f"Network error: {str(e)}")
+
+    key = make_key(
+        model_name,
+        system_instruction,
+        {"name": request.target_column, "type": request.column_type, "config": request.column_config},
+        request.item_context,
+    )
+    value = await completion_cache.get_or_compute(key, _fetch, model=model_name, refresh=request.refresh)
+    return CompletionResponse(value=value, model=model_name)
 
 
 class TargetColumnInfo(BaseModel):
@@ -289,6 +560,7 @@ class ItemCompletionRequest(BaseModel):
     item_context: dict  # column_name -> value
     target_columns: list[TargetColumnInfo]
     model: str | None = None
+    refresh: bool = False  # skip cached results and ask the model again
     additional_prompt: str | None = None
 
 
@@ -298,7 +570,10 @@ class ItemCompletionResponse(BaseModel):
 
 
 @router.post("/complete-item", response_model=ItemCompletionResponse)
-async def complete_item_columns(request: ItemCompletionRequest):
+async def complete_item_columns(
+    request: ItemCompletionRequest,
+    client: httpx.AsyncClient = Depends(get_gemini_client),
+):
     """Use AI to fill multiple columns on a single item."""
     config = get_config()
     api_key = config.get("gemini_api_key")
@@ -376,69 +651,78 @@ async def complete_item_columns(request: ItemCompletionRequest):
     )
     log.debug("ITEM COMPLETION CONTEXT:\n%s", item_context_str)
 
-    url = f"{GEMINI_BASE_URL}/models/{model_name}:generateContent"
+    url = f"/models/{model_name}:generateContent"
 
-    try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            resp = await client.post(url, params={"key": api_key}, json=payload)
-
-        if resp.status_code == 401 or resp.status_code == 403:
-            raise HTTPException(status_code=401, detail="Invalid Gemini API key.")
-
-        if resp.status_code != 200:
-            error_msg = resp.text[:300]
-            log.error("ITEM COMPLETION ERROR %d  model=%s  body=%s", resp.status_code, model_name, error_msg)
-            raise HTTPException(status_code=500, detail=f"Gemini API error ({resp.status_code})")
-
-        data = resp.json()
-        raw = data["candidates"][0]["content"]["parts"][0]["text"].strip()
-
-        log.info("ITEM COMPLETION RESPONSE  model=%s  raw=%r", model_name, raw[:300])
-
-        # Parse JSON object from the response
+    async def _fetch() -> dict[str, str | list[str] | None]:
         try:
-            import json as jsonlib
-            clean = raw.strip()
-            if clean.startswith("```"):
-                clean = "\n".join(clean.split("\n")[1:])
-            if clean.endswith("```"):
-                clean = "\n".join(clean.split("\n")[:-1])
-            parsed = jsonlib.loads(clean.strip())
-            if not isinstance(parsed, dict):
-                raise ValueError("Response is not a JSON object")
-
-            # Normalise values
-            result: dict[str, str | list[str] | None] = {}
-            for tc in request.target_columns:
-                val = parsed.get(tc.name)
-                if val is None:
-                    result[tc.name] = None
-                elif tc.column_type == "multiple_choice":
-                    if isinstance(val, list):
-                        result[tc.name] = [str(v) for v in val]
-                    elif isinstance(val, str):
-                        # Try to parse as JSON array, otherwise split by comma
-                        try:
-                            arr = jsonlib.loads(val)
-                            result[tc.name] = [str(v) for v in arr] if isinstance(arr, list) else [val]
-                        except Exception:
-                            result[tc.name] = [v.strip() for v in val.split(",") if v.strip()]
+            resp = await send_gemini(client, "POST", url, params={"key": api_key}, json=payload, timeout=ITEM_COMPLETION_TIMEOUT)
+
+            raise_for_rate_limit(resp)
+            if resp.status_code == 401 or resp.status_code == 403:
+                raise HTTPException(status_code=401, detail="Invalid Gemini API key.")
+
+            if resp.status_code != 200:
+                error_msg = resp.text[:300]
+                log.error("ITEM COMPLETION ERROR %d  model=%s  body=%s", resp.status_code, model_name, error_msg)
+                raise HTTPException(status_code=500, detail=f"Gemini API error ({resp.status_code})")
+
+            raw = response_text(resp, model_name).strip()
+
+            log.info("ITEM COMPLETION RESPONSE  model=%s  raw=%r", model_name, raw[:300])
+
+            # Parse JSON object from the response
+            try:
+                import json as jsonlib
+                clean = raw.strip()
+                if clean.startswith("```"):
+                    clean = "\n".join(clean.split("\n")[1:])
+                if clean.endswith("```"):
+                    clean = "\n".join(clean.split("\n")[:-1])
+                parsed = jsonlib.loads(clean.strip())
+                if not isinstance(parsed, dict):
+                    raise ValueError("Response is not a JSON object")
+
+                # Normalise values
+                result: dict[str, str | list[str] | None] = {}
+                for tc in request.target_columns:
+                    val = parsed.get(tc.name)
+                    if val is None:
+                        result[tc.name] = None
+                    elif tc.column_type == "multiple_choice":
+                        if isinstance(val, list):
+                            result[tc.name] = [str(v) for v in val]
+                        elif isinstance(val, str):
+                            # Try to parse as JSON array, otherwise split by comma
+                            try:
+                                arr = jsonlib.loads(val)
+                                result[tc.name] = [str(v) for v in arr] if isinstance(arr, list) else [val]
+                            except Exception:
+                                result[tc.name] = [v.strip() for v in val.split(",") if v.strip()]
+                        else:
+                            result[tc.name] = [str(val)]
                     else:
-                        result[tc.name] = [str(val)]
-                else:
-                    result[tc.name] = str(val)
-        except Exception as parse_err:
-            log.error("ITEM COMPLETION PARSE ERROR  raw=%r  err=%s", raw[:200], parse_err)
-            raise HTTPException(status_code=500, detail=f"Could not parse model response as JSON object: {raw[:100]}")
-
-        return ItemCompletionResponse(values=result, model=model_name)
-
-    except httpx.TimeoutException:
-        log.error("ITEM COMPLETION TIMEOUT  model=%s", model_name)
-        raise HTTPException(status_code=504, detail="Request to Gemini timed out.")
-    except httpx.RequestError as e:
-        log.error("ITEM COMPLETION NETWORK ERROR  model=%s  error=%s", model_name, str(e))
-        raise HTTPException(status_code=502, detail=f"Network error: {str(e)}")
+                        result[tc.name] = str(val)
+            except Exception as parse_err:
+                log.error("ITEM COMPLETION PARSE ERROR  raw=%r  err=%s", raw[:200], parse_err)
+                raise HTTPException(status_code=500, detail=f"Could not parse model response as JSON object: {raw[:100]}")
+
+            return result
+
+        except httpx.TimeoutException:
+            log.error("ITEM COMPLETION TIMEOUT  model=%s", model_name)
+            raise HTTPException(status_code=504, detail="Request to Gemini timed out.")
+        except httpx.RequestError as e:
+            log.error("ITEM COMPLETION NETWORK ERROR  model=%s  error=%s", model_name, str(e))
+            raise HTTPException(status_code=502, detail=f"Network error: {str(e)}")
+
+    key = make_key(
+        model_name,
+        system_instruction,
+        [tc.model_dump() for tc in request.target_columns],
+        request.item_context,
+    )
+    values = await completion_cache.get_or_compute(key, _fetch, model=model_name, refresh=request.refresh)
+    return ItemCompletionResponse(values=values, model=model_name)
 
 
 class BatchCompletionRequest(BaseModel):
@@ -448,6 +732,7 @@ class BatchCompletionRequest(BaseModel):
     column_type: str
     column_config: dict | None = None  # e.g. {"choices": [...]} for choice columns
     model: str | None = None
+    refresh: bool = False  # skip cached results and ask the model again
 
 
 class BatchCompletionResponse(BaseModel):
@@ -455,20 +740,7 @@ class BatchCompletionResponse(BaseModel):
     model: str
 
 
-@router.post("/complete-batch", response_model=BatchCompletionResponse)
-async def complete_column_batch(request: BatchCompletionRequest):
-    """Use AI to fill a column for multiple items in a single API call."""
-    config = get_config()
-    api_key = config.get("gemini_api_key")
-    if not api_key:
-        raise HTTPException(status_code=400, detail="Gemini API key not configured. Please set it in System Settings.")
-
-    if not request.items:
-        raise HTTPException(status_code=400, detail="No items provided.")
-
-    model_name = request.model or config.get("gemini_model") or "gemini-2.0-flash"
-    n = len(request.items)
-
+def _batch_system_instruction(request: BatchCompletionRequest, n: int) -> str:
     # Build choice hints if applicable
     choice_hint = ""
     if request.column_type in ("choice", "multiple_choice") and request.column_config:
@@ -479,7 +751,7 @@ async def complete_column_batch(request: BatchCompletionRequest):
     if request.column_type == "multiple_choice":
         choice_hint += "- For multiple_choice, return a comma-separated list of values (e.g. Action,Drama,Thriller) as a JSON string.\n"
 
-    system_instruction = (
+    return (
         f"You are a data completion assistant for a list called \"{request.list_name}\".\n\n"
         f"You will be given {n} item(s). For each one, determine the most likely value for "
         f"the \"{request.target_column}\" column (type: {request.column_type}).\n\n"
@@ -494,9 +766,39 @@ async def complete_column_batch(request: BatchCompletionRequest):
         f"Example for {n} item(s): {repr([None] * n).replace('None', 'null')}\n"
     )
 
+
+def _batch_cache_key(request: BatchCompletionRequest, model_name: str, item: dict) -> str:
+    """Per-item cache key, independent of which batch the item was sent in."""
+    return make_key(
+        model_name,
+        _batch_system_instruction(request, 1),
+        {"name": request.target_column, "type": request.column_type, "config": request.column_config},
+        item.get("item_context", {}),
+    )
+
+
+class BatchResponseError(Exception):
+    """The model's answer for a batch could not be used (bad JSON or wrong length)."""
+
+
+async def _complete_batch_upstream(
+    client: httpx.AsyncClient,
+    api_key: str,
+    model_name: str,
+    request: BatchCompletionRequest,
+    items: list[dict],
+) -> list[str | None]:
+    """Ask Gemini for one batch and return exactly one value per item.
+
+    Raises BatchResponseError when the response is not a JSON array of the
+    right length, so the caller can split the batch and retry.
+    """
+    n = len(items)
+    system_instruction = _batch_system_instruction(request, n)
+
     # Build the user message listing all items
     item_blocks = []
-    for i, item in enumerate(request.items, 1):
+    for i, item in enumerate(items, 1):
         lines = [f"Item {i}:"]
         for col_name, value in item.get("item_context", {}).items():
             lines.append(f"  {col_name}: {value}")
@@ -520,12 +822,17 @@ async def complete_column_batch(request: BatchCompletionRequest):
     )
     log.debug("BATCH USER MESSAGE:\n%s", user_message)
 
-    url = f"{GEMINI_BASE_URL}/models/{model_name}:generateContent"
+    url = f"/models/{model_name}:generateContent"
+    started = time.perf_counter()
 
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            resp = await client.post(url, params={"key": api_key}, json=payload)
+        # Batches only feed bulk fills, so interactive calls jump ahead of them
+        resp = await send_gemini(
+            client, "POST", url, params={"key": api_key}, json=payload,
+            timeout=BATCH_COMPLETION_TIMEOUT, priority=BULK,
+        )
 
+        raise_for_rate_limit(resp)
         if resp.status_code == 401 or resp.status_code == 403:
             raise HTTPException(status_code=401, detail="Invalid Gemini API key.")
 
@@ -534,36 +841,156 @@ async def complete_column_batch(request: BatchCompletionRequest):
             log.error("BATCH COMPLETION ERROR %d  model=%s  body=%s", resp.status_code, model_name, error_msg)
             raise HTTPException(status_code=500, detail=f"Gemini API error ({resp.status_code})")
 
-        data = resp.json()
-        raw = data["candidates"][0]["content"]["parts"][0]["text"].strip()
+        raw = response_text(resp, model_name).strip()
+        usage = resp.json().get("usageMetadata", {})
+        log.info(
+            "BATCH STATS  size=%d  est_prompt_tokens=%d  prompt_tokens=%s  output_tokens=%s  latency_ms=%.0f",
+            n, estimate_tokens(system_instruction + user_message),
+            usage.get("promptTokenCount", "-"), usage.get("candidatesTokenCount", "-"),
+            (time.perf_counter() - started) * 1000,
+        )
 
         log.info("BATCH COMPLETION RESPONSE  column=%r  model=%s  raw=%r", request.target_column, model_name, raw[:200])
 
         # Parse the JSON array from the response
         try:
-            import json as jsonlib
             # Strip markdown fences if the model adds them despite instructions
             clean = raw.strip()
             if clean.startswith("```"):
                 clean = "\n".join(clean.split("\n")[1:])
             if clean.endswith("```"):
                 clean = "\n".join(clean.split("\n")[:-1])
-            values = jsonlib.loads(clean.strip())
+            values = json.loads(clean.strip())
             if not isinstance(values, list):
                 raise ValueError("Response is not a JSON array")
-            # Normalise: pad or trim to match n items, convert non-None to str
-            values = values[:n] + [None] * max(0, n - len(values))
-            normalised = [str(v) if v is not None else None for v in values]
         except Exception as parse_err:
-            log.error("BATCH COMPLETION PARSE ERROR  raw=%r  err=%s", raw[:200], parse_err)
-            raise HTTPException(status_code=500, detail=f"Could not parse model response as JSON array: {raw[:100]}")
+            log.error("BATCH COMPLETION PARSE ERROR  size=%d  raw=%r  err=%s", n, raw[:200], parse_err)
+            raise BatchResponseError(f"Could not parse model response as JSON array: {raw[:100]}")
 
-        return BatchCompletionResponse(values=normalised, model=model_name)
+        if len(values) != n:
+            log.error("BATCH COMPLETION LENGTH MISMATCH  expected=%d  got=%d", n, len(values))
+            raise BatchResponseError(f"Model returned {len(values)} values for {n} items")
+
+        return [str(v) if v is not None else None for v in values]
 
     except httpx.TimeoutException:
-        log.error("BATCH COMPLETION TIMEOUT  model=%s", model_name)
+        log.error("BATCH COMPLETION TIMEOUT  model=%s  size=%d", model_name, n)
         raise HTTPException(status_code=504, detail="Request to Gemini timed out.")
     except httpx.RequestError as e:
         log.error("BATCH COMPLETION NETWORK ERROR  model=%s  error=%s", model_name, str(e))
         raise HTTPException(status_code=502, detail=f"Network error: {str(e)}")
 
+
+async def _complete_with_split(
+    client: httpx.AsyncClient,
+    api_key: str,
+    model_name: str,
+    request: BatchCompletionRequest,
+    items: list[dict],
+) -> list[tuple[str | None, bool]]:
+    """Complete one planned batch; on a bad answer split it in half and retry each half.
+
+    Returns (value, ok) per item. ok is False for a single item the model
+    still could not answer properly; such values are None and not cached.
+    """
+    try:
+        values = await _complete_batch_upstream(client, api_key, model_name, request, items)
+        return [(v, True) for v in values]
+    except BatchResponseError as e:
+        if len(items) == 1:
+            log.error("BATCH GIVE UP  column=%r  reason=%s", request.target_column, e)
+            return [(None, False)]
+        mid = len(items) // 2
+        log.warning("BATCH SPLIT  size=%d -> %d + %d  reason=%s", len(items), mid, len(items) - mid, e)
+        left = await _complete_with_split(client, api_key, model_name, request, items[:mid])
+        right = await _complete_with_split(client, api_key, model_name, request, items[mid:])
+        return left + right
+
+
+async def _complete_adaptive(
+    client: httpx.AsyncClient,
+    api_key: str,
+    model_name: str,
+    request: BatchCompletionRequest,
+    items: list[dict],
+) -> list[tuple[str | None, bool]]:
+    """Pack items into token-budgeted batches and complete them one after another.
+
+    Sequential on purpose: a caller that bounds its own concurrency (AI fill's
+    ``ai_fill_concurrency``) then also bounds the upstream calls.
+    """
+    overhead = estimate_tokens(_batch_system_instruction(request, len(items))) + 64
+    item_tokens = [estimate_item_tokens(item.get("item_context", {})) for item in items]
+    plan = plan_batches(item_tokens, overhead=overhead)
+    log.info(
+        "BATCH PLAN  column=%r  items=%d  batches=%s  est_tokens=%d",
+        request.target_column, len(items), [len(b) for b in plan], sum(item_tokens) + overhead,
+    )
+
+    results = []
+    for batch in plan:
+        results += await _complete_with_split(client, api_key, model_name, request, [items[i] for i in batch])
+    return results
+
+
+async def complete_batch_cached(
+    client: httpx.AsyncClient,
+    api_key: str,
+    model_name: str,
+    request: BatchCompletionRequest,
+) -> list[str | None]:
+    """Answer a batch, serving cached items locally and sending only misses upstream."""
+    keys = [_batch_cache_key(request, model_name, item) for item in request.items]
+    cached = {} if request.refresh else await completion_cache.aget_many(keys)
+
+    # Unique misses, in first-seen order (duplicate contexts are asked once)
+    miss_keys = [k for k in dict.fromkeys(keys) if k not in cached]
+    if miss_keys:
+        first_index = {}
+        for i, k in enumerate(keys):
+            first_index.setdefault(k, i)
+        miss_items = [request.items[first_index[k]] for k in miss_keys]
+
+        async def _fetch() -> dict:
+            answers = await _complete_adaptive(client, api_key, model_name, request, miss_items)
+            fetched = {k: value for k, (value, _) in zip(miss_keys, answers)}
+            await completion_cache.aput_many(
+                {k: value for k, (value, ok) in zip(miss_keys, answers) if ok}, model_name,
+            )
+            return fetched
+
+        group_key = make_key(model_name, "batch", miss_keys, None)
+        cached.update(await completion_cache.singleflight(group_key, _fetch))
+
+    missed = set(miss_keys)
+    log.info(
+        "BATCH COMPLETION CACHE  column=%r  items=%d  hits=%d  sent=%d",
+        request.target_column, len(keys), sum(1 for k in keys if k not in missed), len(miss_keys),
+    )
+    return [cached.get(k) for k in keys]
+
+
+@router.post("/complete-batch", response_model=BatchCompletionResponse)
+async def complete_column_batch(
+    request: BatchCompletionRequest,
+    client: httpx.AsyncClient = Depends(get_gemini_client),
+):
+    """Use AI to fill a column for multiple items.
+
+    Items are packed into as few upstream calls as the token budget allows
+    (ai_batch_token_budget / ai_batch_max_items). Items already answered for
+    the same model/column/context come from the completion cache; only the
+    misses are sent upstream.
+    """
+    config = get_config()
+    api_key = config.get("gemini_api_key")
+    if not api_key:
+        raise HTTPException(status_code=400, detail="Gemini API key not configured. Please set it in System Settings.")
+
+    if not request.items:
+        raise HTTPException(status_code=400, detail="No items provided.")
+
+    model_name = request.model or config.get("gemini_model") or "gemini-2.0-flash"
+
+    values = await complete_batch_cached(client, api_key, model_name, request)
+    return BatchCompletionResponse(values=values, model=model_name)
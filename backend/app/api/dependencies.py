@@ -1,6 +1,6 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from app.api.auth import get_config, generate_token
+from app.services.config_store import DEFAULT_CONFIG, config_store
 
 security = HTTPBearer()
 
@@ -9,9 +9,12 @@ def require_token(
     credentials: HTTPAuthorizationCredentials = Depends(security),
 ) -> str:
     """Validate Bearer token against config. Returns the token if valid."""
-    config = get_config()
-    expected = generate_token(config["password"], config["revoke_timestamp"])
-    if credentials.credentials != expected:
+    expected = config_store.expected_token()
+    if expected is None:
+        # No config.json yet: create the default one, as login does
+        config_store.ensure_exists(DEFAULT_CONFIG)
+        expected = config_store.expected_token()
+    if expected is None or credentials.credentials != expected:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token",
@@ -5,9 +5,10 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.database import get_db
-from app.models import List, Column, Item, ItemValue
+from app.database import get_read_db
+from app.models import Item, ItemValue
 from app.schemas import ColumnType
+from app.services.schema_cache import schema_cache
 
 router = APIRouter(prefix="/export", tags=["export"])
 
@@ -38,19 +39,19 @@ def extract_value_for_export(item_value: ItemValue, column_type: str) -> str:
 
 
 @router.get("/csv/{list_id}")
-async def export_list_to_csv(
+def export_list_to_csv(
     list_id: str,
     include_header: bool = Query(True, description="Include column headers in CSV"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Export a list to CSV format."""
     # Get the list
-    db_list = db.query(List).filter(List.id == list_id).first()
+    db_list = schema_cache.get(db, list_id)
     if not db_list:
         raise HTTPException(status_code=404, detail="List not found")
     
-    # Get columns ordered by position
-    columns = db.query(Column).filter(Column.list_id == list_id).order_by(Column.position).all()
+    # Columns come ordered by position
+    columns = db_list.columns
     
     # Get items ordered by position
     items = db.query(Item).filter(Item.list_id == list_id).order_by(Item.position).all()
@@ -12,10 +12,16 @@ from pydantic import BaseModel
 from typing import Any
 from datetime import datetime
 
-from app.database import get_db
-from app.models import List, Column, Item, ItemValue
+from app.database import get_read_db
+from app.models import List, Item, ItemTombstone, ItemValue
 from app.api.dependencies import require_token
-from app.api.items import get_value_for_column, extract_value
+from app.api.items import get_value_for_column, item_response, item_to_response, load_item_values
+from app.schemas import ItemResponse
+from app.services.changes import current_change_seq, next_change_seq
+from app.services.events import publish_item, publish_item_deleted
+from app.services.item_cache import cache_after_commit
+from app.services.schema_cache import CachedColumn, ListSchema, schema_cache
+from app.services.write_queue import Writer, get_writer
 
 router = APIRouter(
     prefix="/v1",
@@ -83,61 +89,71 @@ class ExternalItemsResponse(BaseModel):
     items: list[ExternalItemResponse]
 
 
+class ExternalItemChangesResponse(BaseModel):
+    list_id: str
+    version: int
+    since: int
+    full: bool
+    items: list[ExternalItemResponse] = []
+    deleted_ids: list[str] = []
+    purged_ids: list[str] = []
+    columns: list[ExternalColumnInfo] | None = None
+
+
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
-def _col_name_to_id(columns: list[Column]) -> dict[str, Column]:
-    """Build a case-insensitive column-name → Column lookup."""
-    return {col.name.lower(): col for col in columns}
-
-
-def _col_id_to_name(columns: list[Column]) -> dict[str, str]:
-    """Build column-id → column-name lookup."""
-    return {col.id: col.name for col in columns}
+def _column_info(col: CachedColumn) -> ExternalColumnInfo:
+    return ExternalColumnInfo(
+        id=col.id,
+        name=col.name,
+        type=col.column_type,
+        position=col.position,
+        is_required=col.is_required,
+        config=col.config,
+    )
 
 
-def _item_to_external(
-    item: Item, columns: list[Column], db: Session
+def _external_from_response(
+    item: ItemResponse, schema: ListSchema
 ) -> ExternalItemResponse:
-    """Convert an Item to the external response format with column names as keys."""
-    col_types = {col.id: col.column_type for col in columns}
-    id_to_name = _col_id_to_name(columns)
-
-    item_values = db.query(ItemValue).filter(ItemValue.item_id == item.id).all()
-    values: dict[str, Any] = {}
-    for iv in item_values:
-        col_type = col_types.get(iv.column_id, "text")
-        col_name = id_to_name.get(iv.column_id)
-        if col_name:
-            values[col_name] = extract_value(iv, col_type)
-
+    """Re-key an ItemResponse's values by column name."""
+    id_to_name = schema.column_names
     return ExternalItemResponse(
         id=item.id,
         list_id=item.list_id,
         position=item.position,
-        values=values,
+        values={id_to_name[col_id]: v for col_id, v in item.values.items() if col_id in id_to_name},
         created_at=item.created_at,
         updated_at=item.updated_at,
         deleted_at=item.deleted_at,
     )
 
 
+def _items_to_external(
+    items: list[Item], schema: ListSchema, db: Session
+) -> list[ExternalItemResponse]:
+    """Convert Items to the external response format with column names as keys."""
+    values = load_item_values(items, schema, db)
+    return [_external_from_response(item_response(i, values[i.id]), schema) for i in items]
+
+
 def _resolve_values(
-    raw: dict[str, Any], columns: list[Column]
+    raw: dict[str, Any], schema: ListSchema
 ) -> dict[str, Any]:
     """Map column-name-keyed values to column-id-keyed values.
 
     Raises HTTPException 400 if a column name is not found.
     """
-    name_map = _col_name_to_id(columns)
+    name_map = schema.column_by_name
     resolved: dict[str, Any] = {}
     for name, value in raw.items():
         col = name_map.get(name.lower())
         if col is None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Unknown column: '{name}'. Available columns: {[c.name for c in columns]}",
+                detail=f"Unknown column: '{name}'. Available columns: {[c.name for c in schema.columns]}",
             )
         resolved[col.id] = value
     return resolved
@@ -148,7 +164,7 @@ def _resolve_values(
 # ---------------------------------------------------------------------------
 
 @router.get("/lists", response_model=list[ExternalListSummary])
-def list_all_lists(db: Session = Depends(get_db)):
+def list_all_lists(db: Session = Depends(get_read_db)):
     """Return all lists with their item counts."""
     lists = db.query(List).order_by(List.updated_at.desc()).all()
     results = []
@@ -173,9 +189,9 @@ def list_all_lists(db: Session = Depends(get_db)):
 
 
 @router.get("/lists/{list_id}", response_model=ExternalListDetail)
-def get_list_detail(list_id: str, db: Session = Depends(get_db)):
+def get_list_detail(list_id: str, db: Session = Depends(get_read_db)):
     """Return list metadata including column schema."""
-    db_list = db.query(List).filter(List.id == list_id).first()
+    db_list = schema_cache.get(db, list_id)
     if not db_list:
         raise HTTPException(status_code=404, detail="List not found")
 
@@ -190,17 +206,7 @@ def get_list_detail(list_id: str, db: Session = Depends(get_db)):
         description=db_list.description,
         icon=db_list.icon,
         item_count=count,
-        columns=[
-            ExternalColumnInfo(
-                id=c.id,
-                name=c.name,
-                type=c.column_type,
-                position=c.position,
-                is_required=c.is_required,
-                config=c.config,
-            )
-            for c in db_list.columns
-        ],
+        columns=[_column_info(c) for c in db_list.columns],
         created_at=db_list.created_at,
         updated_at=db_list.updated_at,
     )
@@ -210,10 +216,10 @@ def get_list_detail(list_id: str, db: Session = Depends(get_db)):
 def get_items(
     list_id: str,
     include_deleted: bool = Query(False),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """Return all items in a list. Values are keyed by column name."""
-    db_list = db.query(List).filter(List.id == list_id).first()
+    db_list = schema_cache.get(db, list_id)
     if not db_list:
         raise HTTPException(status_code=404, detail="List not found")
 
@@ -226,14 +232,57 @@ def get_items(
         list_id=db_list.id,
         list_name=db_list.name,
         total=len(items),
-        items=[_item_to_external(i, db_list.columns, db) for i in items],
+        items=_items_to_external(items, db_list, db),
+    )
+
+
+@router.get("/lists/{list_id}/items/changes", response_model=ExternalItemChangesResponse)
+def get_item_changes(
+    list_id: str,
+    since: int = Query(0, ge=0),
+    db: Session = Depends(get_read_db),
+):
+    """Items changed after version ``since`` (0: all items), for incremental sync.
+
+    Store the returned ``version`` and pass it as ``since`` next time. When
+    ``full`` is true, ``items`` is the whole list and replaces any local copy.
+    """
+    # High-water mark first, so nothing committed after it can be skipped
+    version = current_change_seq(db)
+    db_list = schema_cache.get(db, list_id)
+    if not db_list:
+        raise HTTPException(status_code=404, detail="List not found")
+
+    full = since == 0 or since > version
+    query = db.query(Item).filter(Item.list_id == list_id)
+    if not full:
+        query = query.filter(Item.change_seq > since)
+    items = query.order_by(Item.position).all()
+
+    live = [i for i in items if i.deleted_at is None]
+    purged_ids = []
+    if not full:
+        purged_ids = [
+            row.item_id for row in db.query(ItemTombstone.item_id)
+            .filter(ItemTombstone.list_id == list_id, ItemTombstone.change_seq > since)
+        ]
+
+    return ExternalItemChangesResponse(
+        list_id=list_id,
+        version=version,
+        since=since,
+        full=full,
+        items=_items_to_external(live, db_list, db),
+        deleted_ids=[] if full else [i.id for i in items if i.deleted_at is not None],
+        purged_ids=purged_ids,
+        columns=[_column_info(c) for c in db_list.columns] if full or db_list.columns_version > since else None,
     )
 
 
 @router.get("/lists/{list_id}/items/{item_id}", response_model=ExternalItemResponse)
-def get_item(list_id: str, item_id: str, db: Session = Depends(get_db)):
+def get_item(list_id: str, item_id: str, db: Session = Depends(get_read_db)):
     """Return a single item by ID."""
-    db_list = db.query(List).filter(List.id == list_id).first()
+    db_list = schema_cache.get(db, list_id)
     if not db_list:
         raise HTTPException(status_code=404, detail="List not found")
 
@@ -243,7 +292,7 @@ def get_item(list_id: str, item_id: str, db: Session = Depends(get_db)):
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
 
-    return _item_to_external(item, db_list.columns, db)
+    return _items_to_external([item], db_list, db)[0]
 
 
 @router.post(
@@ -252,18 +301,24 @@ def get_item(list_id: str, item_id: str, db: Session = Depends(get_db)):
     status_code=status.HTTP_201_CREATED,
 )
 def create_item(
-    list_id: str, data: ExternalItemCreate, db: Session = Depends(get_db)
+    list_id: str, data: ExternalItemCreate, writer: Writer = Depends(get_writer)
 ):
     """Create a new item. Provide values keyed by column name."""
-    db_list = db.query(List).filter(List.id == list_id).first()
+    item, external = writer.run(_create_item, list_id, data)
+    publish_item(list_id, item)
+    return external
+
+
+def _create_item(db: Session, list_id: str, data: ExternalItemCreate) -> tuple[ItemResponse, ExternalItemResponse]:
+    db_list = schema_cache.get(db, list_id)
     if not db_list:
         raise HTTPException(status_code=404, detail="List not found")
 
-    column_map = {col.id: col for col in db_list.columns}
-    resolved = _resolve_values(data.values, db_list.columns)
+    column_map = db_list.column_by_id
+    resolved = _resolve_values(data.values, db_list)
 
     max_pos = db.query(Item).filter(Item.list_id == list_id).count()
-    item = Item(list_id=list_id, position=max_pos)
+    item = Item(list_id=list_id, position=max_pos, change_seq=next_change_seq(db))
     db.add(item)
     db.flush()
 
@@ -273,9 +328,11 @@ def create_item(
         iv = ItemValue(item_id=item.id, column_id=col_id, **value_fields)
         db.add(iv)
 
-    db.commit()
-    item = db.query(Item).filter(Item.id == item.id).first()
-    return _item_to_external(item, db_list.columns, db)
+    db.flush()
+    # The internal form (values by column id) is what live update events carry
+    response = item_to_response(item, db_list.columns, db)
+    cache_after_commit(db, db_list.values_key, item.id, item.change_seq, response.values)
+    return response, _external_from_response(response, db_list)
 
 
 @router.put("/lists/{list_id}/items/{item_id}", response_model=ExternalItemResponse)
@@ -283,10 +340,16 @@ def update_item(
     list_id: str,
     item_id: str,
     data: ExternalItemUpdate,
-    db: Session = Depends(get_db),
+    writer: Writer = Depends(get_writer),
 ):
     """Update item values. Only provided columns are changed."""
-    db_list = db.query(List).filter(List.id == list_id).first()
+    item, external = writer.run(_update_item, list_id, item_id, data)
+    publish_item(list_id, item)
+    return external
+
+
+def _update_item(db: Session, list_id: str, item_id: str, data: ExternalItemUpdate) -> tuple[ItemResponse, ExternalItemResponse]:
+    db_list = schema_cache.get(db, list_id)
     if not db_list:
         raise HTTPException(status_code=404, detail="List not found")
 
@@ -296,8 +359,8 @@ def update_item(
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
 
-    column_map = {col.id: col for col in db_list.columns}
-    resolved = _resolve_values(data.values, db_list.columns)
+    column_map = db_list.column_by_id
+    resolved = _resolve_values(data.values, db_list)
 
     for col_id, value in resolved.items():
         col = column_map[col_id]
@@ -315,18 +378,25 @@ def update_item(
             db.add(iv)
 
     item.updated_at = datetime.utcnow()
-    db.commit()
-
-    item = db.query(Item).filter(Item.id == item.id).first()
-    return _item_to_external(item, db_list.columns, db)
+    item.change_seq = next_change_seq(db)
+    db.flush()
+    # The internal form (values by column id) is what live update events carry
+    response = item_to_response(item, db_list.columns, db)
+    cache_after_commit(db, db_list.values_key, item.id, item.change_seq, response.values)
+    return response, _external_from_response(response, db_list)
 
 
 @router.delete(
     "/lists/{list_id}/items/{item_id}",
     status_code=status.HTTP_204_NO_CONTENT,
 )
-def delete_item(list_id: str, item_id: str, db: Session = Depends(get_db)):
+def delete_item(list_id: str, item_id: str, writer: Writer = Depends(get_writer)):
     """Soft-delete an item (can be restored from the UI)."""
+    writer.run(_delete_item, list_id, item_id)
+    publish_item_deleted(list_id, item_id)
+
+
+def _delete_item(db: Session, list_id: str, item_id: str):
     item = db.query(Item).filter(
         Item.id == item_id, Item.list_id == list_id
     ).first()
@@ -334,6 +404,5 @@ def delete_item(list_id: str, item_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Item not found")
 
     db.query(Item).filter(Item.id == item_id).update(
-        {"deleted_at": datetime.utcnow()}, synchronize_session="fetch"
+        {"deleted_at": datetime.utcnow(), "change_seq": next_change_seq(db)}, synchronize_session="fetch"
     )
-    db.commit()
@@ -11,6 +11,7 @@ from pydantic import BaseModel
 from app.database import get_db
 from app.models import List, Column, Item, ItemValue, View
 from app.schemas import ColumnType
+from app.services.changes import next_change_seq
 
 router = APIRouter(prefix="/import", tags=["import"])
 
@@ -216,7 +217,7 @@ async def preview_csv(
 
 
 @router.post("/csv/create")
-async def create_list_from_csv(
+def create_list_from_csv(
     request: CreateListFromCSVRequest,
     db: Session = Depends(get_db)
 ):
@@ -276,11 +277,13 @@ async def create_list_from_csv(
     db.add(default_view)
     
     # Create items (rows)
+    change_seq = next_change_seq(db)
     for i, row_data in enumerate(request.data):
         item = Item(
             id=str(uuid.uuid4()),
             list_id=new_list.id,
-            position=i
+            position=i,
+            change_seq=change_seq
         )
         db.add(item)
         db.flush()
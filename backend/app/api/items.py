@@ -1,8 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session, selectinload
-from app.database import get_db
-from app.models import List, Item, ItemValue, Column
-from app.schemas import ItemCreate, ItemUpdate, ItemResponse
+from app.database import get_read_db
+from app.services.write_queue import Writer, get_writer
+from app.models import Item, ItemTombstone, ItemValue, Column
+from app.schemas import ItemCreate, ItemUpdate, ItemResponse, ItemChangesResponse
+from app.services.changes import current_change_seq, next_change_seq, record_tombstone
+from app.services.events import publish_item, publish_item_deleted
+from app.services.item_cache import cache_after_commit, item_cache
+from app.services.schema_cache import ListSchema, schema_cache
 from typing import Any
 from datetime import datetime, timedelta
 import re
@@ -103,6 +108,10 @@ def item_to_response(item: Item, columns: list[Column], db: Session) -> ItemResp
         col_type = column_types.get(iv.column_id, "text")
         values[iv.column_id] = extract_value(iv, col_type)
     
+    return item_response(item, values)
+
+
+def item_response(item: Item, values: dict) -> ItemResponse:
     return ItemResponse(
         id=item.id,
         list_id=item.list_id,
@@ -114,13 +123,40 @@ def item_to_response(item: Item, columns: list[Column], db: Session) -> ItemResp
     )
 
 
+# Item ids per IN (...) query when loading values in bulk
+VALUE_QUERY_CHUNK = 500
+
+
+def load_item_values(items: list[Item], schema: ListSchema, db: Session) -> dict[str, dict]:
+    """Values of many items keyed by item id, then column id.
+    
+    Served from the item cache where possible; the rest are read in a few
+    queries and cached.
+    """
+    values = item_cache.get_many(schema.values_key, [(item.id, item.change_seq) for item in items])
+    missing = [item for item in items if item.id not in values]
+    if not missing:
+        return values
+    
+    column_types = schema.column_types
+    loaded: dict[str, dict] = {item.id: {} for item in missing}
+    item_ids = list(loaded)
+    for start in range(0, len(item_ids), VALUE_QUERY_CHUNK):
+        chunk = item_ids[start:start + VALUE_QUERY_CHUNK]
+        for iv in db.query(ItemValue).filter(ItemValue.item_id.in_(chunk)):
+            loaded[iv.item_id][iv.column_id] = extract_value(iv, column_types.get(iv.column_id, "text"))
+    item_cache.put_many(schema.values_key, [(item.id, item.change_seq, loaded[item.id]) for item in missing])
+    values.update(loaded)
+    return values
+
+
 @router.get("", response_model=list[ItemResponse])
 def get_items(
     list_id: str,
     include_deleted: bool = Query(False),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    db_list = db.query(List).filter(List.id == list_id).first()
+    db_list = schema_cache.get(db, list_id)
     if not db_list:
         raise HTTPException(status_code=404, detail="List not found")
     
@@ -128,23 +164,60 @@ def get_items(
     if not include_deleted:
         query = query.filter(Item.deleted_at.is_(None))
     items = query.order_by(Item.position).all()
-    return [item_to_response(item, db_list.columns, db) for item in items]
+    values = load_item_values(items, db_list, db)
+    return [item_response(item, values[item.id]) for item in items]
 
 
-@router.post("", response_model=ItemResponse, status_code=status.HTTP_201_CREATED)
-def create_item(list_id: str, data: ItemCreate, db: Session = Depends(get_db)):
-    db_list = db.query(List).filter(List.id == list_id).first()
+@router.get("/changes", response_model=ItemChangesResponse)
+def get_item_changes(
+    list_id: str,
+    since: int = Query(0, ge=0, description="version from the previous sync; 0 for everything"),
+    db: Session = Depends(get_read_db)
+):
+    """Items created, updated or deleted after version ``since`` (delta sync)."""
+    # Read the high-water mark first: a write committed after it is at worst sent twice
+    version = current_change_seq(db)
+    db_list = schema_cache.get(db, list_id)
     if not db_list:
         raise HTTPException(status_code=404, detail="List not found")
     
-    # Get column info
-    column_info = {col.id: {'type': col.column_type, 'config': col.config or {}} for col in db_list.columns}
+    # A version from the future (e.g. the database was restored) can't be patched
+    full = since == 0 or since > version
+    query = db.query(Item).filter(Item.list_id == list_id)
+    if not full:
+        query = query.filter(Item.change_seq > since)
+    items = query.order_by(Item.position).all()
+    
+    live = [item for item in items if item.deleted_at is None]
+    values = load_item_values(live, db_list, db)
+    purged_ids = []
+    if not full:
+        purged_ids = [
+            row.item_id for row in db.query(ItemTombstone.item_id)
+            .filter(ItemTombstone.list_id == list_id, ItemTombstone.change_seq > since)
+        ]
+    
+    return ItemChangesResponse(
+        version=version,
+        since=since,
+        full=full,
+        items=[item_response(item, values[item.id]) for item in live],
+        deleted_ids=[] if full else [item.id for item in items if item.deleted_at is not None],
+        purged_ids=purged_ids,
+        columns=db_list.columns if full or db_list.columns_version > since else None,
+    )
+
+
+def _create_item(db: Session, list_id: str, data: ItemCreate) -> ItemResponse:
+    db_list = schema_cache.get(db, list_id)
+    if not db_list:
+        raise HTTPException(status_code=404, detail="List not found")
     
     # Get next position
     max_pos = db.query(Item).filter(Item.list_id == list_id).count()
     
     # Create item
-    item = Item(list_id=list_id, position=max_pos)
+    item = Item(list_id=list_id, position=max_pos, change_seq=next_change_seq(db))
     db.add(item)
     db.flush()
     
@@ -162,10 +235,10 @@ def create_item(list_id: str, data: ItemCreate, db: Session = Depends(get_db)):
     
     # Create item values
     for column_id, value in values_to_create.items():
-        if column_id not in column_info:
+        if column_id not in db_list.column_types:
             continue
         
-        col_type = column_info[column_id]['type']
+        col_type = db_list.column_types[column_id]
         value_fields = get_value_for_column(value, col_type)
         
         item_value = ItemValue(
@@ -175,16 +248,22 @@ def create_item(list_id: str, data: ItemCreate, db: Session = Depends(get_db)):
         )
         db.add(item_value)
     
-    db.commit()
-    
-    # Reload item
-    item = db.query(Item).filter(Item.id == item.id).first()
-    return item_to_response(item, db_list.columns, db)
+    db.flush()
+    response = item_to_response(item, db_list.columns, db)
+    cache_after_commit(db, db_list.values_key, item.id, item.change_seq, response.values)
+    return response
+
+
+@router.post("", response_model=ItemResponse, status_code=status.HTTP_201_CREATED)
+def create_item(list_id: str, data: ItemCreate, writer: Writer = Depends(get_writer)):
+    item = writer.run(_create_item, list_id, data)
+    publish_item(list_id, item)
+    return item
 
 
 @router.get("/{item_id}", response_model=ItemResponse)
-def get_item(list_id: str, item_id: str, db: Session = Depends(get_db)):
-    db_list = db.query(List).filter(List.id == list_id).first()
+def get_item(list_id: str, item_id: str, db: Session = Depends(get_read_db)):
+    db_list = schema_cache.get(db, list_id)
     if not db_list:
         raise HTTPException(status_code=404, detail="List not found")
     
@@ -192,12 +271,11 @@ def get_item(list_id: str, item_id: str, db: Session = Depends(get_db)):
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     
-    return item_to_response(item, db_list.columns, db)
+    return item_response(item, load_item_values([item], db_list, db)[item.id])
 
 
-@router.put("/{item_id}", response_model=ItemResponse)
-def update_item(list_id: str, item_id: str, data: ItemUpdate, db: Session = Depends(get_db)):
-    db_list = db.query(List).filter(List.id == list_id).first()
+def _update_item(db: Session, list_id: str, item_id: str, data: ItemUpdate) -> ItemResponse:
+    db_list = schema_cache.get(db, list_id)
     if not db_list:
         raise HTTPException(status_code=404, detail="List not found")
     
@@ -205,7 +283,7 @@ def update_item(list_id: str, item_id: str, data: ItemUpdate, db: Session = Depe
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     
-    column_types = {col.id: col.column_type for col in db_list.columns}
+    column_types = db_list.column_types
     
     # Update item values
     for column_id, value in data.values.items():
@@ -234,30 +312,40 @@ def update_item(list_id: str, item_id: str, data: ItemUpdate, db: Session = Depe
     
     # Explicitly update the modified timestamp
     item.updated_at = datetime.utcnow()
+    item.change_seq = next_change_seq(db)
     
-    db.commit()
-    
-    # Reload item
-    item = db.query(Item).filter(Item.id == item.id).first()
-    return item_to_response(item, db_list.columns, db)
+    db.flush()
+    response = item_to_response(item, db_list.columns, db)
+    cache_after_commit(db, db_list.values_key, item.id, item.change_seq, response.values)
+    return response
 
 
-@router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_item(list_id: str, item_id: str, db: Session = Depends(get_db)):
+@router.put("/{item_id}", response_model=ItemResponse)
+def update_item(list_id: str, item_id: str, data: ItemUpdate, writer: Writer = Depends(get_writer)):
+    item = writer.run(_update_item, list_id, item_id, data)
+    publish_item(list_id, item)
+    return item
+
+
+def _delete_item(db: Session, list_id: str, item_id: str):
     item = db.query(Item).filter(Item.id == item_id, Item.list_id == list_id).first()
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     
     # Soft delete — use bulk update to avoid triggering onupdate for updated_at
     db.query(Item).filter(Item.id == item_id).update(
-        {"deleted_at": datetime.utcnow()}, synchronize_session="fetch"
+        {"deleted_at": datetime.utcnow(), "change_seq": next_change_seq(db)}, synchronize_session="fetch"
     )
-    db.commit()
 
 
-@router.post("/{item_id}/restore", response_model=ItemResponse)
-def restore_item(list_id: str, item_id: str, db: Session = Depends(get_db)):
-    db_list = db.query(List).filter(List.id == list_id).first()
+@router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_item(list_id: str, item_id: str, writer: Writer = Depends(get_writer)):
+    writer.run(_delete_item, list_id, item_id)
+    publish_item_deleted(list_id, item_id)
+
+
+def _restore_item(db: Session, list_id: str, item_id: str) -> ItemResponse:
+    db_list = schema_cache.get(db, list_id)
     if not db_list:
         raise HTTPException(status_code=404, detail="List not found")
     
@@ -269,19 +357,31 @@ def restore_item(list_id: str, item_id: str, db: Session = Depends(get_db)):
     
     # Use bulk update to only clear deleted_at without touching updated_at
     db.query(Item).filter(Item.id == item_id).update(
-        {"deleted_at": None}, synchronize_session="fetch"
+        {"deleted_at": None, "change_seq": next_change_seq(db)}, synchronize_session="fetch"
     )
-    db.commit()
-    
-    item = db.query(Item).filter(Item.id == item_id).first()
-    return item_to_response(item, db_list.columns, db)
+    response = item_to_response(item, db_list.columns, db)
+    cache_after_commit(db, db_list.values_key, item.id, item.change_seq, response.values)
+    return response
 
 
-@router.delete("/{item_id}/permanent", status_code=status.HTTP_204_NO_CONTENT)
-def permanent_delete_item(list_id: str, item_id: str, db: Session = Depends(get_db)):
+@router.post("/{item_id}/restore", response_model=ItemResponse)
+def restore_item(list_id: str, item_id: str, writer: Writer = Depends(get_writer)):
+    item = writer.run(_restore_item, list_id, item_id)
+    publish_item(list_id, item)
+    return item
+
+
+def _permanent_delete_item(db: Session, list_id: str, item_id: str):
     item = db.query(Item).filter(Item.id == item_id, Item.list_id == list_id).first()
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     
+    record_tombstone(db, item)
     db.delete(item)
-    db.commit()
+
+
+@router.delete("/{item_id}/permanent", status_code=status.HTTP_204_NO_CONTENT)
+def permanent_delete_item(list_id: str, item_id: str, writer: Writer = Depends(get_writer)):
+    writer.run(_permanent_delete_item, list_id, item_id)
+    item_cache.discard([item_id])
+    publish_item_deleted(list_id, item_id, purged=True)
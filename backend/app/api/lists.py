@@ -1,7 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import ReadSessionLocal, get_db, get_read_db
 from app.models import List, Column, View
+from app.services.changes import mark_list_items_changed, mark_schema_changed
+from app.services.events import (
+    event_broker, publish_columns, publish_list, publish_list_deleted, publish_resync
+)
+from app.services.schema_cache import schema_cache
 from app.schemas import (
     ListCreate, ListUpdate, ListResponse, ListSummary,
     ColumnCreate, ColumnUpdate, ColumnResponse, ColumnReorder
@@ -13,7 +21,7 @@ router = APIRouter(prefix="/lists", tags=["lists"])
 @router.get("", response_model=list[ListSummary])
 def get_lists(
     favorite_only: bool = False,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     query = db.query(List)
     if favorite_only:
@@ -61,8 +69,8 @@ def create_list(data: ListCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/{list_id}", response_model=ListResponse)
-def get_list(list_id: str, db: Session = Depends(get_db)):
-    db_list = db.query(List).filter(List.id == list_id).first()
+def get_list(list_id: str, db: Session = Depends(get_read_db)):
+    db_list = schema_cache.get(db, list_id)
     if not db_list:
         raise HTTPException(status_code=404, detail="List not found")
     return db_list
@@ -78,8 +86,11 @@ def update_list(list_id: str, data: ListUpdate, db: Session = Depends(get_db)):
     for key, value in update_data.items():
         setattr(db_list, key, value)
     
+    mark_schema_changed(db, list_id)
     db.commit()
+    schema_cache.invalidate(list_id)
     db.refresh(db_list)
+    publish_list(list_id, db_list)
     return db_list
 
 
@@ -91,12 +102,57 @@ def delete_list(list_id: str, db: Session = Depends(get_db)):
     
     db.delete(db_list)
     db.commit()
+    schema_cache.invalidate(list_id)
+    publish_list_deleted(list_id)
+
+
+# Seconds between keep-alive comments on an idle event stream
+EVENTS_KEEPALIVE_SECONDS = 15.0
+
+
+def _list_exists(list_id: str) -> bool:
+    db = ReadSessionLocal()
+    try:
+        return schema_cache.get(db, list_id) is not None
+    finally:
+        db.close()
+
+
+@router.get("/{list_id}/events")
+async def stream_list_events(list_id: str, request: Request):
+    """Stream changes to a list's items and columns as Server-Sent Events.
+
+    The first event is ``ready``; clients should refetch on it if they were
+    reconnecting, since events sent while they were away are not replayed.
+    """
+    if not await asyncio.to_thread(_list_exists, list_id):
+        raise HTTPException(status_code=404, detail="List not found")
+    subscription = event_broker.subscribe(list_id)
+
+    async def events():
+        try:
+            yield "event: ready\ndata: {}\n\n"
+            while True:
+                try:
+                    yield await asyncio.wait_for(subscription.queue.get(), EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+        finally:
+            event_broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 # Column endpoints
 @router.get("/{list_id}/columns", response_model=list[ColumnResponse])
-def get_columns(list_id: str, db: Session = Depends(get_db)):
-    db_list = db.query(List).filter(List.id == list_id).first()
+def get_columns(list_id: str, db: Session = Depends(get_read_db)):
+    db_list = schema_cache.get(db, list_id)
     if not db_list:
         raise HTTPException(status_code=404, detail="List not found")
     return db_list.columns
@@ -120,8 +176,11 @@ def create_column(list_id: str, data: ColumnCreate, db: Session = Depends(get_db
         config=data.config
     )
     db.add(column)
+    mark_schema_changed(db, list_id, columns=True)
     db.commit()
+    schema_cache.invalidate(list_id)
     db.refresh(column)
+    publish_columns(db, list_id)
     return column
 
 
@@ -138,7 +197,10 @@ def reorder_columns(list_id: str, data: ColumnReorder, db: Session = Depends(get
         if column:
             column.position = position
     
+    mark_schema_changed(db, list_id, columns=True)
     db.commit()
+    schema_cache.invalidate(list_id)
+    publish_columns(db, list_id)
     
     # Return updated columns in new order
     return db.query(Column).filter(Column.list_id == list_id).order_by(Column.position).all()
@@ -151,11 +213,20 @@ def update_column(list_id: str, column_id: str, data: ColumnUpdate, db: Session
         raise HTTPException(status_code=404, detail="Column not found")
     
     update_data = data.model_dump(exclude_unset=True)
+    type_changed = "column_type" in update_data and update_data["column_type"] != column.column_type
     for key, value in update_data.items():
         setattr(column, key, value)
     
+    mark_schema_changed(db, list_id, columns=True)
+    if type_changed:
+        # Stored values now read differently; every item goes out in the next delta
+        mark_list_items_changed(db, list_id)
     db.commit()
+    schema_cache.invalidate(list_id)
     db.refresh(column)
+    publish_columns(db, list_id)
+    if type_changed:
+        publish_resync(list_id)
     return column
 
 
@@ -166,4 +237,7 @@ def delete_column(list_id: str, column_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Column not found")
     
     db.delete(column)
+    mark_schema_changed(db, list_id, columns=True)
     db.commit()
+    schema_cache.invalidate(list_id)
+    publish_columns(db, list_id)
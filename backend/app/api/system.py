@@ -1,28 +1,30 @@
 import os
 import sys
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from pathlib import Path
-import json
-import sqlite3
 from datetime import datetime
 
-from app.database import SessionLocal, get_db
+from app import startup
+from app.api.items import _permanent_delete_item, _restore_item
+from app.database import ReadSessionLocal, get_read_db
 from app.models import List, Column, Item, ItemValue, View
 from app.config import DATA_DIR
 from app.schemas import ItemResponse
+from app.services.config_store import CONFIG_PATH, config_store, get_base_dir
+from app.services.events import event_broker, publish_item, publish_item_deleted
+from app.services.backups import BackupInProgress, backup_service
+from app.services.item_cache import item_cache
+from app.services.metrics import request_metrics
+from app.services.replication import replicator
+from app.services.schema_cache import schema_cache
+from app.services.write_queue import Writer, get_writer, write_coordinator
 
 router = APIRouter(prefix="/api/system", tags=["system"])
 
 
-def get_base_dir() -> Path:
-    """Get the base directory for config file."""
-    if getattr(sys, 'frozen', False):
-        return Path(sys.executable).parent
-    return Path(__file__).parent.parent.parent.parent
-
-
 def get_version() -> str:
     """Read the build version from the VERSION file."""
     # Frozen exe: VERSION is next to the executable or in _MEIPASS
@@ -41,22 +43,12 @@ def get_version() -> str:
     return "dev"
 
 
-CONFIG_PATH = get_base_dir() / "config.json"
 DB_PATH = DATA_DIR / "listabob.db"
 
 
 def get_config():
-    """Read config file."""
-    if not CONFIG_PATH.exists():
-        return {}
-    with open(CONFIG_PATH, "r") as f:
-        return json.load(f)
-
-
-def save_config(config: dict):
-    """Save config file."""
-    with open(CONFIG_PATH, "w") as f:
-        json.dump(config, f, indent=2)
+    """Read config (cached, reloaded when the file changes)."""
+    return config_store.get()
 
 
 class StatsResponse(BaseModel):
@@ -66,6 +58,14 @@ class StatsResponse(BaseModel):
     total_views: int
     total_values: int
     database_size_mb: float
+    gemini_queue: dict = {}
+    startup_ms: dict = {}
+    write_queue: dict = {}
+    backup: dict = {}
+    replication: dict = {}
+    events: dict = {}
+    schema_cache: dict = {}
+    item_cache: dict = {}
 
 
 class ConfigResponse(BaseModel):
@@ -127,39 +127,46 @@ def get_system_version():
 @router.put("/config")
 def update_system_config(request: UpdateConfigRequest):
     """Update system configuration."""
-    config = get_config()
+    changes = {}
     
     if request.backup_path is not None:
-        config["backup_path"] = request.backup_path
+        changes["backup_path"] = request.backup_path
     
     if request.use_tristate_sort is not None:
-        config["use_tristate_sort"] = request.use_tristate_sort
+        changes["use_tristate_sort"] = request.use_tristate_sort
     
     if request.unknown_sort_position is not None:
         if request.unknown_sort_position not in ("top", "bottom"):
             raise HTTPException(status_code=400, detail="unknown_sort_position must be 'top' or 'bottom'")
-        config["unknown_sort_position"] = request.unknown_sort_position
+        changes["unknown_sort_position"] = request.unknown_sort_position
     
     if request.confirm_delete is not None:
-        config["confirm_delete"] = request.confirm_delete
+        changes["confirm_delete"] = request.confirm_delete
     
     if request.gemini_api_key is not None and request.gemini_api_key.strip():
-        config["gemini_api_key"] = request.gemini_api_key
+        changes["gemini_api_key"] = request.gemini_api_key
     
     if request.gemini_model is not None:
-        config["gemini_model"] = request.gemini_model
+        changes["gemini_model"] = request.gemini_model
     
     if request.gemini_system_prompt is not None:
-        config["gemini_system_prompt"] = request.gemini_system_prompt
+        changes["gemini_system_prompt"] = request.gemini_system_prompt
     
-    save_config(config)
+    # Applied to the current file under the store's lock, so concurrent updates don't drop each other's keys
+    config_store.update(**changes)
     return {"success": True}
 
 
+def _gemini_queue() -> dict:
+    # The limiter is only imported once a Gemini route has been used
+    limiter = sys.modules.get("app.services.rate_limiter")
+    return limiter.rate_limiter.snapshot() if limiter else {}
+
+
 @router.get("/stats", response_model=StatsResponse)
 def get_stats():
     """Get database statistics."""
-    db = SessionLocal()
+    db = ReadSessionLocal()
     try:
         total_lists = db.query(List).count()
         total_items = db.query(Item).count()
@@ -167,8 +174,12 @@ def get_stats():
         total_views = db.query(View).count()
         total_values = db.query(ItemValue).count()
         
-        # Get database file size
-        db_size_bytes = DB_PATH.stat().st_size if DB_PATH.exists() else 0
+        # Get database file size (including the WAL, which holds recent writes)
+        db_size_bytes = sum(
+            path.stat().st_size
+            for path in (DB_PATH, DB_PATH.with_name(DB_PATH.name + "-wal"))
+            if path.exists()
+        )
         db_size_mb = round(db_size_bytes / (1024 * 1024), 2)
         
         return StatsResponse(
@@ -177,42 +188,52 @@ def get_stats():
             total_columns=total_columns,
             total_views=total_views,
             total_values=total_values,
-            database_size_mb=db_size_mb
+            database_size_mb=db_size_mb,
+            gemini_queue=_gemini_queue(),
+            startup_ms=startup.summary(),
+            write_queue=write_coordinator.snapshot(),
+            backup=backup_service.snapshot(),
+            replication=replicator.snapshot(),
+            events=event_broker.snapshot(),
+            schema_cache=schema_cache.snapshot(),
+            item_cache=item_cache.snapshot(),
         )
     finally:
         db.close()
 
 
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Request and database metrics in Prometheus text format."""
+    return PlainTextResponse(request_metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @router.post("/change-password")
 def change_password(request: ChangePasswordRequest):
     """Change the system password."""
-    if not CONFIG_PATH.exists():
+    if not config_store.exists():
         raise HTTPException(status_code=500, detail="Config file not found")
     
-    config = get_config()
-    
     # Verify current password
-    if config.get("password") != request.current_password:
+    if config_store.get_value("password") != request.current_password:
         raise HTTPException(status_code=401, detail="Current password is incorrect")
     
     # Update password and revoke timestamp to invalidate all sessions
-    config["password"] = request.new_password
-    config["revoke_timestamp"] = datetime.utcnow().isoformat()
-    
-    save_config(config)
+    config_store.update(
+        password=request.new_password,
+        revoke_timestamp=datetime.utcnow().isoformat(),
+    )
     
     return {"success": True, "message": "Password changed successfully. Please log in again."}
 
 
-@router.post("/backup", response_model=BackupResponse)
+@router.post("/backup", response_model=BackupResponse, status_code=202)
 def backup_database(request: BackupRequest):
-    """Backup the database to the specified path."""
+    """Start a backup to the specified path; poll /backup/status for the result."""
     backup_dir = Path(request.backup_path)
     
     # Save the backup path to config
-    config = get_config()
-    config["backup_path"] = request.backup_path
-    save_config(config)
+    config_store.update(backup_path=request.backup_path)
     
     # Validate backup path
     if not backup_dir.exists():
@@ -224,26 +245,19 @@ def backup_database(request: BackupRequest):
     if not backup_dir.is_dir():
         raise HTTPException(status_code=400, detail="Backup path must be a directory")
     
-    # Create backup filename with timestamp
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_filename = f"listabob_backup_{timestamp}.db"
-    backup_file_path = backup_dir / backup_filename
-    
     try:
-        # Use SQLite's safe backup API
-        source_conn = sqlite3.connect(str(DB_PATH))
-        dest_conn = sqlite3.connect(str(backup_file_path))
-        source_conn.backup(dest_conn)
-        dest_conn.close()
-        source_conn.close()
-        
-        return BackupResponse(
-            success=True,
-            message=f"Database backed up successfully",
-            backup_file=str(backup_file_path)
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Backup failed: {str(e)}")
+        # Stepped online copy plus integrity check on the backup service's thread
+        backup_service.start_manual(backup_dir)
+    except BackupInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    return BackupResponse(success=True, message="Backup started")
+
+
+@router.get("/backup/status")
+def get_backup_status():
+    """Progress of a running backup, last success and the next scheduled run."""
+    return backup_service.snapshot()
 
 
 # --- Recycle Bin Endpoints ---
@@ -265,7 +279,7 @@ class RecycleBinItemResponse(BaseModel):
 
 
 @router.get("/recycle-bin", response_model=list[RecycleBinItemResponse])
-def get_recycle_bin(db: Session = Depends(get_db)):
+def get_recycle_bin(db: Session = Depends(get_read_db)):
     """Get all soft-deleted items across all lists."""
     deleted_items = (
         db.query(Item)
@@ -275,21 +289,14 @@ def get_recycle_bin(db: Session = Depends(get_db)):
     )
     
     results = []
-    # Cache list info to avoid repeated queries
-    list_cache: dict[str, List] = {}
     for item in deleted_items:
-        if item.list_id not in list_cache:
-            db_list = db.query(List).filter(List.id == item.list_id).first()
-            if db_list:
-                list_cache[item.list_id] = db_list
-        
-        db_list = list_cache.get(item.list_id)
+        db_list = schema_cache.get(db, item.list_id)
         if not db_list:
             continue
         
         # Build values dict
         from app.api.items import extract_value
-        column_types = {col.id: col.column_type for col in db_list.columns}
+        column_types = db_list.column_types
         values = {}
         item_values = db.query(ItemValue).filter(ItemValue.item_id == item.id).all()
         for iv in item_values:
@@ -312,34 +319,34 @@ def get_recycle_bin(db: Session = Depends(get_db)):
     return results
 
 
+def _deleted_item_list_id(db: Session, item_id: str) -> str:
+    list_id = db.query(Item.list_id).filter(Item.id == item_id, Item.deleted_at.isnot(None)).scalar()
+    if list_id is None:
+        raise HTTPException(status_code=404, detail="Deleted item not found")
+    return list_id
+
+
 @router.post("/recycle-bin/{item_id}/restore", response_model=ItemResponse)
-def restore_from_recycle_bin(item_id: str, db: Session = Depends(get_db)):
+def restore_from_recycle_bin(
+    item_id: str,
+    db: Session = Depends(get_read_db),
+    writer: Writer = Depends(get_writer),
+):
     """Restore a soft-deleted item from the recycle bin."""
-    item = db.query(Item).filter(Item.id == item_id, Item.deleted_at.isnot(None)).first()
-    if not item:
-        raise HTTPException(status_code=404, detail="Deleted item not found")
-    
-    db_list = db.query(List).filter(List.id == item.list_id).first()
-    if not db_list:
-        raise HTTPException(status_code=404, detail="Parent list no longer exists")
-    
-    # Use bulk update to only clear deleted_at without touching updated_at
-    db.query(Item).filter(Item.id == item_id).update(
-        {"deleted_at": None}, synchronize_session="fetch"
-    )
-    db.commit()
-    
-    from app.api.items import item_to_response
-    item = db.query(Item).filter(Item.id == item_id).first()
-    return item_to_response(item, db_list.columns, db)
+    list_id = _deleted_item_list_id(db, item_id)
+    item = writer.run(_restore_item, list_id, item_id)
+    publish_item(list_id, item)
+    return item
 
 
 @router.delete("/recycle-bin/{item_id}", status_code=204)
-def permanent_delete_from_recycle_bin(item_id: str, db: Session = Depends(get_db)):
+def permanent_delete_from_recycle_bin(
+    item_id: str,
+    db: Session = Depends(get_read_db),
+    writer: Writer = Depends(get_writer),
+):
     """Permanently delete an item from the recycle bin."""
-    item = db.query(Item).filter(Item.id == item_id, Item.deleted_at.isnot(None)).first()
-    if not item:
-        raise HTTPException(status_code=404, detail="Deleted item not found")
-    
-    db.delete(item)
-    db.commit()
+    list_id = _deleted_item_list_id(db, item_id)
+    writer.run(_permanent_delete_item, list_id, item_id)
+    item_cache.discard([item_id])
+    publish_item_deleted(list_id, item_id, purged=True)
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import Template, List, Column, View
 from app.schemas import TemplateResponse, ListResponse
 
@@ -8,7 +8,7 @@ router = APIRouter(prefix="/templates", tags=["templates"])
 
 
 @router.get("", response_model=list[TemplateResponse])
-def get_templates(category: str | None = None, db: Session = Depends(get_db)):
+def get_templates(category: str | None = None, db: Session = Depends(get_read_db)):
     query = db.query(Template)
     if category:
         query = query.filter(Template.category == category)
@@ -16,7 +16,7 @@ def get_templates(category: str | None = None, db: Session = Depends(get_db)):
 
 
 @router.get("/{template_id}", response_model=TemplateResponse)
-def get_template(template_id: str, db: Session = Depends(get_db)):
+def get_template(template_id: str, db: Session = Depends(get_read_db)):
     template = db.query(Template).filter(Template.id == template_id).first()
     if not template:
         raise HTTPException(status_code=404, detail="Template not found")
@@ -1,15 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import List, View
 from app.schemas import ViewCreate, ViewUpdate, ViewResponse
+from app.services.changes import mark_schema_changed
+from app.services.schema_cache import schema_cache
 
 router = APIRouter(prefix="/lists/{list_id}/views", tags=["views"])
 
 
 @router.get("", response_model=list[ViewResponse])
-def get_views(list_id: str, db: Session = Depends(get_db)):
-    db_list = db.query(List).filter(List.id == list_id).first()
+def get_views(list_id: str, db: Session = Depends(get_read_db)):
+    db_list = schema_cache.get(db, list_id)
     if not db_list:
         raise HTTPException(status_code=404, detail="List not found")
     return db_list.views
@@ -32,7 +34,9 @@ def create_view(list_id: str, data: ViewCreate, db: Session = Depends(get_db)):
         position=max_pos
     )
     db.add(view)
+    mark_schema_changed(db, list_id)
     db.commit()
+    schema_cache.invalidate(list_id)
     db.refresh(view)
     return view
 
@@ -47,7 +51,9 @@ def update_view(list_id: str, view_id: str, data: ViewUpdate, db: Session = Depe
     for key, value in update_data.items():
         setattr(view, key, value)
     
+    mark_schema_changed(db, list_id)
     db.commit()
+    schema_cache.invalidate(list_id)
     db.refresh(view)
     return view
 
@@ -65,4 +71,6 @@ def delete_view(list_id: str, view_id: str, db: Session = Depends(get_db)):
             raise HTTPException(status_code=400, detail="Cannot delete the only view")
     
     db.delete(view)
+    mark_schema_changed(db, list_id)
     db.commit()
+    schema_cache.invalidate(list_id)
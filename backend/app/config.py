@@ -25,6 +25,10 @@ DATA_DIR.mkdir(parents=True, exist_ok=True)
 class Settings(BaseSettings):
     app_name: str = "Listabob"
     debug: bool = True
+    # Statements slower than this are logged with their query plan
+    slow_query_ms: float = 200.0
+    # Report per-request SQL counts in X-DB-Queries / X-DB-Time-ms (QUERY_HEADERS=1)
+    query_headers: bool = False
     
     # Database - use resolved data directory
     database_url: str = f"sqlite:///{DATA_DIR / 'listabob.db'}"
@@ -32,6 +36,9 @@ class Settings(BaseSettings):
     # File storage
     upload_dir: Path = DATA_DIR / "uploads"
     max_upload_size: int = 10 * 1024 * 1024  # 10MB
+
+    # Gemini API root; point at benchmarks.fake_gemini to work offline
+    gemini_base_url: str = "https://generativelanguage.googleapis.com/v1beta"
     
     class Config:
         env_file = ".env"
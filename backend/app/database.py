@@ -1,21 +1,176 @@
-from sqlalchemy import create_engine
+import threading
+import time
+from contextvars import ContextVar
+from pathlib import Path
+from urllib.parse import quote
+
+from fastapi import Request
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.pool import QueuePool
 from app.config import settings
+from app.logger import get_logger
+
+log = get_logger("listabob.db")
+
+
+class DBStats:
+    """Process-wide database counters, read by the metrics endpoint."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.statements = 0
+        self.statement_seconds = 0.0
+        self.rows = 0  # rows written (rowcount of INSERT/UPDATE/DELETE)
+        self.checkouts = 0
+        self.checkout_wait_seconds = 0.0
+
+    def record_statement(self, seconds: float, rowcount: int):
+        with self._lock:
+            self.statements += 1
+            self.statement_seconds += seconds
+            if rowcount > 0:
+                self.rows += rowcount
+
+    def record_checkout(self, seconds: float):
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_wait_seconds += seconds
+
+
+db_stats = DBStats()
+
+
+class QueryStats:
+    """Statements run on behalf of one request (see QueryStatsMiddleware)."""
+
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+# Set per request; copied into the threadpool that runs sync endpoints
+current_query_stats: ContextVar[QueryStats | None] = ContextVar("current_query_stats", default=None)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait for a connection."""
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            db_stats.record_checkout(time.perf_counter() - start)
+
+
+# Seconds a connection waits on another connection's (or worker process's) lock
+BUSY_TIMEOUT_SECONDS = 30
 
 engine = create_engine(
     settings.database_url,
-    connect_args={"check_same_thread": False}  # SQLite specific
+    connect_args={"check_same_thread": False, "timeout": BUSY_TIMEOUT_SECONDS},  # SQLite specific
+    poolclass=TimedQueuePool,
 )
 
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_conn, connection_record):
+    # WAL: readers don't block the writer or each other, across worker processes too
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_start"] = time.perf_counter()
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info.pop("query_start", time.perf_counter())
+    db_stats.record_statement(elapsed, cursor.rowcount)
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+    if elapsed * 1000 >= settings.slow_query_ms:
+        _log_slow_query(cursor, statement, parameters, executemany, elapsed)
+
+
+def _log_slow_query(cursor, statement, parameters, executemany, elapsed):
+    plan = ""
+    if not executemany and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        try:
+            # Raw DBAPI connection, so this doesn't re-enter the listeners
+            rows = cursor.connection.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+            plan = "\n".join(f"  {row[-1]}" for row in rows)
+        except Exception as e:
+            plan = f"  (no plan: {e})"
+    log.warning("SLOW QUERY  ms=%.1f  statement=%s\n%s", elapsed * 1000, " ".join(statement.split()), plan)
+
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+def _read_only_url(url) -> str:
+    """SQLite URI for the same database file, opened with mode=ro."""
+    path = Path(url.database).resolve().as_posix()
+    return f"sqlite:///file:{quote(path, safe='/:')}?mode=ro&uri=true"
+
+
+# Second pool for GET endpoints. Under WAL its readers work from a snapshot and
+# never take the write lock, so a long export can't block or delay a writer.
+read_engine = create_engine(
+    _read_only_url(engine.url),
+    connect_args={"check_same_thread": False, "timeout": BUSY_TIMEOUT_SECONDS},
+    poolclass=TimedQueuePool,
+)
+
+
+@event.listens_for(read_engine, "connect")
+def _set_read_pragmas(dbapi_conn, connection_record):
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA query_only=ON")
+    cursor.execute("PRAGMA temp_store=MEMORY")  # sorts / temp b-trees for big reads
+    cursor.execute("PRAGMA cache_size=-32768")  # 32 MB page cache per connection
+    cursor.execute("PRAGMA mmap_size=268435456")  # read pages straight from the OS cache
+    cursor.close()
+
+
+event.listen(read_engine, "before_cursor_execute", _before_cursor_execute)
+event.listen(read_engine, "after_cursor_execute", _after_cursor_execute)
+
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+
 class Base(DeclarativeBase):
     pass
 
 
-def get_db():
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def get_db(request: Request):
     db = SessionLocal()
+    try:
+        if request.method not in READ_METHODS:
+            # Take the write lock up front. A deferred transaction that reads and
+            # then writes can't wait for a writer in another worker to finish; it
+            # fails with "database is locked" instead of honouring the busy timeout.
+            db.connection().exec_driver_sql("BEGIN IMMEDIATE")
+        yield db
+    finally:
+        db.close()
+
+
+def get_read_db():
+    """Session on the read-only engine, for endpoints that only read."""
+    db = ReadSessionLocal()
     try:
         yield db
     finally:
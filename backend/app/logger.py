@@ -1,53 +1,122 @@
 """
 Central logging configuration for Listabob.
 Writes to DATA_DIR/logs/listabob.log with rotation.
+
+Loggers only put records on a queue; a background listener thread does the
+formatting and the file / console writes, so logging never blocks the event
+loop on disk I/O. Optional config.json keys:
+
+- ``log_format``: ``"text"`` (default) or ``"json"`` for one JSON object per line
+- ``log_levels``: per-subsystem levels, e.g. ``{"listabob.chat": "INFO"}``
+
+Both are read once at startup.
 """
+import atexit
+import json
 import logging
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
-from pathlib import Path
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 from app.config import DATA_DIR
+from app.services.config_store import config_store
 
 LOG_DIR = DATA_DIR / "logs"
 LOG_DIR.mkdir(parents=True, exist_ok=True)
 LOG_FILE = LOG_DIR / "listabob.log"
 
+ROOT_LOGGER = "listabob"
+
 _configured = False
+_listener: QueueListener | None = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log shippers."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            entry["exception"] = record.exc_text or self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves record formatting to the listener thread.
+
+    The stock ``prepare`` runs the full formatter in the caller's thread, which
+    is the cost we want off the request path. Only the cheap ``msg % args``
+    merge happens here: arguments may be mutated later, or be ORM objects that
+    must not be lazy-loaded from another thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            # Tracebacks hold frames that may change once we return
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        return record
+
+
+def _build_formatter() -> logging.Formatter:
+    if config_store.get_value("log_format") == "json":
+        return JsonFormatter()
+    return logging.Formatter(
+        fmt="%(asctime)s  %(levelname)-8s  %(name)s  %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
+
+def _configure():
+    global _configured, _listener
+
+    formatter = _build_formatter()
+
+    # Rotating file: max 5 MB, keep 3 backups
+    file_handler = RotatingFileHandler(
+        LOG_FILE,
+        maxBytes=5 * 1024 * 1024,
+        backupCount=3,
+        encoding="utf-8",
+    )
+    file_handler.setLevel(logging.DEBUG)
+    file_handler.setFormatter(formatter)
+
+    # Also echo to stdout so uvicorn captures it
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setLevel(logging.INFO)
+    stream_handler.setFormatter(formatter)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(logging.DEBUG)
+    root.addHandler(_DeferredQueueHandler(log_queue))
+    root.propagate = False
+
+    levels = config_store.get_value("log_levels") or {}
+    for name, level in levels.items():
+        logging.getLogger(name).setLevel(str(level).upper())
 
+    _configured = True
 
-def get_logger(name: str = "listabob") -> logging.Logger:
-    """Return a configured logger. Safe to call multiple times."""
-    global _configured
 
-    logger = logging.getLogger(name)
+def get_logger(name: str = ROOT_LOGGER) -> logging.Logger:
+    """Return a configured logger. Safe to call multiple times.
 
+    Loggers below ``listabob`` (e.g. ``listabob.chat``) share its queue handler.
+    """
     if not _configured:
-        logger.setLevel(logging.DEBUG)
-
-        formatter = logging.Formatter(
-            fmt="%(asctime)s  %(levelname)-8s  %(name)s  %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S",
-        )
-
-        # Rotating file: max 5 MB, keep 3 backups
-        file_handler = RotatingFileHandler(
-            LOG_FILE,
-            maxBytes=5 * 1024 * 1024,
-            backupCount=3,
-            encoding="utf-8",
-        )
-        file_handler.setLevel(logging.DEBUG)
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-
-        # Also echo to stdout so uvicorn captures it
-        stream_handler = logging.StreamHandler(sys.stdout)
-        stream_handler.setLevel(logging.INFO)
-        stream_handler.setFormatter(formatter)
-        logger.addHandler(stream_handler)
-
-        logger.propagate = False
-        _configured = True
-
-    return logger
+        _configure()
+    return logging.getLogger(name)
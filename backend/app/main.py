@@ -1,29 +1,102 @@
-import os
+from app import startup  # first, so the phase timings start here
+
+import asyncio
+import importlib
+import re
 import sys
+from contextlib import asynccontextmanager
 from pathlib import Path
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
 from app.config import settings
 from app.database import engine, Base
-from app.api import lists, items, views, templates, imports, exports, auth, system, chat, external
-from app.migrations import run_migrations
+from app.api import lists, items, views, templates, auth, system, external
+from app.migrations import ensure_schema
 from app.logger import get_logger
+from app.services.compression import CompressionMiddleware
+from app.services.metrics import MetricsMiddleware, QueryStatsMiddleware
+from app.services import replication, write_queue
+from app.services.backups import backup_service
+from app.services.static_files import StaticManifest
 
 log = get_logger("listabob")
+startup.mark("imports")
 
-# Run lightweight migrations for existing databases (before create_all for new ones)
-run_migrations()
 log.info("Listabob starting up")
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Rarely used routers (and httpx, which only they need) are imported on the
+# first request to their paths: (path pattern, module, include prefix)
+LAZY_ROUTERS = [
+    (re.compile(r"/api/chat(/|$)"), "app.api.chat", ""),
+    (re.compile(r"/api/lists/[^/]+/columns/[^/]+/ai-fill(/|$)"), "app.api.ai_fill", "/api"),
+    (re.compile(r"/api/import/"), "app.api.imports", "/api"),
+    (re.compile(r"/api/export/"), "app.api.exports", "/api"),
+]
+# The API docs need every route
+DOCS_PATHS = ("/docs", "/redoc", "/openapi.json")
+SPA_ROUTE = "/{full_path:path}"
+
+
+def load_lazy_router(entry):
+    """Import and mount one lazy router, keeping the SPA catch-all route last."""
+    pattern, module_name, prefix = entry
+    module = importlib.import_module(module_name)
+    app.include_router(module.router, prefix=prefix)
+    app.router.routes.sort(key=lambda route: getattr(route, "path", None) == SPA_ROUTE)
+    app.openapi_schema = None
+    LAZY_ROUTERS.remove(entry)
+    log.debug("Loaded router %s", module_name)
+
+
+class LazyRouterMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if LAZY_ROUTERS and scope["type"] in ("http", "websocket"):
+            path = scope["path"]
+            for entry in list(LAZY_ROUTERS):
+                if path in DOCS_PATHS or entry[0].match(path):
+                    load_lazy_router(entry)
+        await self.app(scope, receive, send)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup.mark("server")
+    # Migrations + create_all, skipped when the stored schema fingerprint matches.
+    # Here rather than at import so worker processes don't race at startup.
+    schema_updated = await asyncio.to_thread(ensure_schema, engine, Base.metadata)
+    startup.mark("schema")
+    timings = "  ".join(f"{phase}={ms:.0f}ms" for phase, ms in startup.summary().items())
+    log.info("STARTUP  %s  schema_updated=%s", timings, schema_updated)
+    write_queue.start_from_config()
+    replication.start_from_config()
+    # Checks config backup_schedule once a minute; idle unless enabled
+    backup_service.start()
+    try:
+        yield
+    finally:
+        # Only present if the AI fill router was ever used
+        ai_fill = sys.modules.get("app.api.ai_fill")
+        if ai_fill is not None:
+            await ai_fill.cancel_running_jobs()
+        await asyncio.to_thread(backup_service.stop)
+        # Commits whatever writes are still queued
+        await asyncio.to_thread(write_queue.write_coordinator.stop)
+        # After the last writes, so they make it into the replica
+        await asyncio.to_thread(replication.replicator.stop)
+        # Created on first use by get_gemini_client
+        client = getattr(app.state, "gemini_client", None)
+        if client is not None:
+            await client.aclose()
+
 
 app = FastAPI(
     title=settings.app_name,
     description="A smart information-tracking app for managing lists and structured data",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Configure CORS for frontend (development mode)
@@ -35,17 +108,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Imports the lazy routers; innermost, so metrics include the one-off import
+app.add_middleware(LazyRouterMiddleware)
+# Per-request SQL statement counts (X-DB-Queries / X-DB-Time-ms when query_headers is on)
+app.add_middleware(QueryStatsMiddleware)
+# gzip / brotli / zstd for JSON and CSV responses; inside metrics, so sizes are bytes on the wire
+app.add_middleware(CompressionMiddleware)
+# Per-route latency / size / status counters for /api/system/metrics
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/api")
 app.include_router(lists.router, prefix="/api")
 app.include_router(items.router, prefix="/api")
 app.include_router(views.router, prefix="/api")
 app.include_router(templates.router, prefix="/api")
-app.include_router(imports.router, prefix="/api")
-app.include_router(exports.router, prefix="/api")
 app.include_router(external.router, prefix="/api")
 app.include_router(system.router)
-app.include_router(chat.router)
 
 
 @app.get("/api/health")
@@ -69,19 +148,19 @@ print(f"Looking for static files at: {static_dir}")
 print(f"Static dir exists: {static_dir.exists()}")
 
 if static_dir.exists():
-    # Mount static assets
-    app.mount("/assets", StaticFiles(directory=str(static_dir / "assets")), name="assets")
-    
-    # Serve index.html for all non-API routes (SPA routing)
-    @app.get("/{full_path:path}")
-    async def serve_spa(full_path: str):
-        # Check if it's a static file
-        file_path = static_dir / full_path
-        if file_path.is_file():
-            return FileResponse(file_path)
-        # Otherwise serve index.html for SPA routing
-        return FileResponse(static_dir / "index.html")
+    # Read once; requests are served from memory with cache headers and compression
+    spa_files = StaticManifest(static_dir)
+    log.info("Static files: %d files, %d KB in memory", len(spa_files.entries), spa_files.total_bytes() // 1024)
+
+    # Serve files from the build, and index.html for all other non-API routes (SPA routing)
+    @app.api_route("/{full_path:path}", methods=["GET", "HEAD"])
+    async def serve_spa(full_path: str, request: Request):
+        return await spa_files.response(full_path, request.headers)
 else:
     @app.get("/")
     def root():
         return {"message": f"Welcome to {settings.app_name} API", "docs": "/docs"}
+
+
+startup.mark("routes")
+startup.report_import_profile()
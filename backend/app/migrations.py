@@ -1,31 +1,71 @@
 """Lightweight startup migrations for existing SQLite databases."""
-import sqlite3
-from pathlib import Path
-from app.config import DATA_DIR
+import zlib
 
 
-DB_PATH = DATA_DIR / "listabob.db"
-
 # Each migration: (table, column_name, column_def)
 MIGRATIONS = [
     ("items", "deleted_at", "DATETIME DEFAULT NULL"),
+    ("items", "change_seq", "INTEGER NOT NULL DEFAULT 0"),
+    ("lists", "schema_seq", "INTEGER NOT NULL DEFAULT 0"),
+    ("lists", "columns_seq", "INTEGER NOT NULL DEFAULT 0"),
+]
+
+# Indexes on existing tables (create_all only indexes the tables it creates):
+# (table, index_name, columns)
+INDEX_MIGRATIONS = [
+    ("items", "ix_items_list_change_seq", "list_id, change_seq"),
 ]
 
 
-def run_migrations():
-    """Check for missing columns and add them via ALTER TABLE."""
-    if not DB_PATH.exists():
-        return
-
-    conn = sqlite3.connect(str(DB_PATH))
-    try:
-        cursor = conn.cursor()
-        for table, column, col_def in MIGRATIONS:
-            cursor.execute(f"PRAGMA table_info({table})")
-            existing_columns = {row[1] for row in cursor.fetchall()}
-            if column not in existing_columns:
-                print(f"Migration: Adding column '{column}' to table '{table}'")
-                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {col_def}")
+def schema_fingerprint(metadata) -> int:
+    """Signed 32-bit hash of the model tables and the migration list.
+
+    Stored in ``PRAGMA user_version`` once the schema is in place, so later
+    starts can skip the migration checks and ``create_all`` introspection.
+    Any model or migration change produces a different value.
+    """
+    parts = [repr(MIGRATIONS), repr(INDEX_MIGRATIONS)]
+    for table in metadata.sorted_tables:
+        parts.append(table.name)
+        parts += [f"{c.name}:{c.type}:{c.nullable}" for c in table.columns]
+        parts += sorted(str(index.name) for index in table.indexes)
+    value = zlib.crc32("|".join(parts).encode())
+    return value - (1 << 32) if value >= 1 << 31 else value
+
+
+def run_migrations(conn):
+    """Add missing columns via ALTER TABLE, and missing indexes."""
+    for table, column, col_def in MIGRATIONS:
+        existing_columns = {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table})")}
+        if existing_columns and column not in existing_columns:
+            print(f"Migration: Adding column '{column}' to table '{table}'")
+            conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {col_def}")
+    for table, index_name, columns in INDEX_MIGRATIONS:
+        if conn.exec_driver_sql(f"PRAGMA table_info({table})").first() is not None:
+            conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({columns})")
+
+
+def ensure_schema(engine, metadata) -> bool:
+    """Bring the database up to date; returns False if it already was.
+
+    Runs at application startup (not at import), once per worker process.
+    The check is a single PRAGMA read; when work is needed it happens under
+    an exclusive lock and is re-checked first, so workers starting together
+    don't race each other.
+    """
+    fingerprint = schema_fingerprint(metadata)
+    with engine.connect() as conn:
+        if conn.exec_driver_sql("PRAGMA user_version").scalar() == fingerprint:
+            return False
+        conn.rollback()
+
+        conn.exec_driver_sql("BEGIN EXCLUSIVE")
+        if conn.exec_driver_sql("PRAGMA user_version").scalar() == fingerprint:
+            conn.rollback()
+            return False
+        # Existing databases get their missing columns before create_all adds new tables
+        run_migrations(conn)
+        metadata.create_all(bind=conn)
+        conn.exec_driver_sql(f"PRAGMA user_version = {fingerprint}")
         conn.commit()
-    finally:
-        conn.close()
+    return True
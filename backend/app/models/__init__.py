@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import String, Text, Boolean, Integer, DateTime, ForeignKey, JSON
+from sqlalchemy import String, Text, Boolean, Integer, DateTime, ForeignKey, JSON, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
 
@@ -21,6 +21,10 @@ class List(Base):
     template_id: Mapped[str | None] = mapped_column(String(36))
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Change sequence of the last change to its settings, columns or views (see services/changes.py)
+    schema_seq: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    # Change sequence of the last change to its columns only (what delta sync resends)
+    columns_seq: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
     
     # Relationships
     columns: Mapped[list["Column"]] = relationship("Column", back_populates="list", cascade="all, delete-orphan", order_by="Column.position")
@@ -54,6 +58,12 @@ class Item(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     deleted_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True, default=None)
+    # Change sequence of the last write to the item or its values (see services/changes.py)
+    change_seq: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    
+    __table_args__ = (
+        Index("ix_items_list_change_seq", "list_id", "change_seq"),
+    )
     
     # Relationships
     list: Mapped["List"] = relationship("List", back_populates="items")
@@ -104,3 +114,26 @@ class Template(Base):
     columns_config: Mapped[dict] = mapped_column(JSON, nullable=False)
     sample_data: Mapped[dict | None] = mapped_column(JSON)
     is_builtin: Mapped[bool] = mapped_column(Boolean, default=True)
+
+
+class ChangeCounter(Base):
+    """Single row holding the last change sequence number handed out."""
+    __tablename__ = "change_counter"
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    value: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class ItemTombstone(Base):
+    """Record of a permanently deleted item, so delta sync can report it."""
+    __tablename__ = "item_tombstones"
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    list_id: Mapped[str] = mapped_column(String(36), nullable=False)
+    item_id: Mapped[str] = mapped_column(String(36), nullable=False)
+    change_seq: Mapped[int] = mapped_column(Integer, nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_item_tombstones_list_change_seq", "list_id", "change_seq"),
+    )
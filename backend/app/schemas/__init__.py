@@ -140,6 +140,16 @@ class ItemResponse(BaseModel):
         from_attributes = True
 
 
+class ItemChangesResponse(BaseModel):
+    version: int  # high-water mark: pass it as ``since`` next time
+    since: int
+    full: bool  # items is the whole list; replace the cache instead of patching it
+    items: list[ItemResponse] = []  # created, updated or restored
+    deleted_ids: list[str] = []  # soft-deleted
+    purged_ids: list[str] = []  # permanently deleted
+    columns: list[ColumnResponse] | None = None  # set when the columns changed
+
+
 # View Schemas
 class ViewBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=255)
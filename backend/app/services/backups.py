@@ -0,0 +1,350 @@
+"""
+Online database backups: stepped copies, verification and rotation.
+
+Copies use SQLite's backup API ``pages`` pages at a time with a ``sleep``
+between steps, so a large database is copied without holding the source
+connection for the whole run. Under WAL the copy only ever holds a read
+snapshot, so writers are never blocked. SQLite restarts a stepped backup
+when another connection writes in between; after ``MAX_RESTARTS`` restarts
+the copy is finished in a single step instead of chasing a busy database.
+Stopping the service abandons a copy in progress at its next step.
+
+Every copy is checked with ``PRAGMA integrity_check`` before it is kept, and
+optionally gzipped. The scheduler (config ``backup_schedule``) writes
+``listabob_auto_<timestamp>.db[.gz]`` files to ``backup_path`` and prunes
+them to a number of hourly, daily and weekly copies. Manual backups
+(``listabob_backup_*``) go through the same copy and check but are never
+pruned.
+"""
+import gzip
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from app.database import engine
+from app.logger import get_logger
+from app.services.config_store import config_store
+
+log = get_logger("listabob.backup")
+
+DB_PATH = Path(engine.url.database)
+
+AUTO_PREFIX = "listabob_auto_"
+MANUAL_PREFIX = "listabob_backup_"
+TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+AUTO_PATTERN = re.compile(rf"^{AUTO_PREFIX}(\d{{8}}_\d{{6}})\.db(\.gz)?$")
+# Stops two worker processes running the same scheduled backup
+LOCK_NAME = ".listabob_backup.lock"
+STALE_LOCK_SECONDS = 3600
+
+MAX_RESTARTS = 5
+# How often the scheduler checks whether a backup is due
+POLL_SECONDS = 60
+
+DEFAULT_SCHEDULE = {
+    "enabled": False,
+    "interval_minutes": 60,
+    "keep_hourly": 24,
+    "keep_daily": 7,
+    "keep_weekly": 4,
+    "compress": False,
+    "pages": 512,
+    "sleep_ms": 10,
+}
+
+
+class BackupError(Exception):
+    pass
+
+
+class BackupInProgress(BackupError):
+    pass
+
+
+class BackupCancelled(BackupError):
+    """The service is stopping; the partial copy is discarded."""
+
+
+class _Restarted(Exception):
+    """Raised from the progress callback to give up on stepping."""
+
+
+def schedule_config() -> dict:
+    return {**DEFAULT_SCHEDULE, **(config_store.get_value("backup_schedule", None) or {})}
+
+
+def backup_time(path: Path) -> datetime | None:
+    """Timestamp of a scheduled backup, from its file name."""
+    match = AUTO_PATTERN.match(path.name)
+    return datetime.strptime(match.group(1), TIMESTAMP_FORMAT) if match else None
+
+
+def rotation_keep(paths: list[Path], hourly: int, daily: int, weekly: int) -> set[Path]:
+    """Newest backup of each of the last N hours, days and ISO weeks."""
+    dated = sorted(((backup_time(p), p) for p in paths if backup_time(p)), reverse=True)
+    keep = {dated[0][1]} if dated else set()
+    buckets = (
+        (hourly, lambda t: (t.date(), t.hour)),
+        (daily, lambda t: t.date()),
+        (weekly, lambda t: t.isocalendar()[:2]),
+    )
+    for count, bucket_of in buckets:
+        seen = set()
+        for when, path in dated:
+            bucket = bucket_of(when)
+            if bucket not in seen and len(seen) < count:
+                seen.add(bucket)
+                keep.add(path)
+    return keep
+
+
+class BackupService:
+    def __init__(self, db_path: Path = DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._running = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._manual_thread: threading.Thread | None = None
+        self.state: dict = {
+            "running": False,
+            "kind": None,
+            "phase": None,
+            "pages_done": 0,
+            "pages_total": 0,
+            "restarts": 0,
+            "last_success_at": None,
+            "last_file": None,
+            "last_bytes": 0,
+            "last_duration_ms": 0.0,
+            "last_error": None,
+            "last_error_at": None,
+            "next_run_at": None,
+        }
+
+    def _update(self, **fields):
+        with self._lock:
+            self.state.update(fields)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            state = dict(self.state)
+        total = state["pages_total"]
+        state["percent"] = round(state["pages_done"] / total * 100, 1) if total else 0.0
+        state["scheduled"] = bool(schedule_config()["enabled"])
+        return state
+
+    # --- Copy ---
+
+    def _copy(self, dest: Path, pages: int, sleep: float):
+        restarts = 0
+        previous = None
+        pages_total = 0
+
+        def progress(status, remaining, total):
+            nonlocal restarts, previous, pages_total
+            if self._stop.is_set():
+                raise BackupCancelled("Backup cancelled: the server is shutting down")
+            if previous is not None and remaining > previous:
+                restarts += 1
+                self._update(restarts=restarts)
+                if restarts > MAX_RESTARTS:
+                    raise _Restarted()
+            previous = remaining
+            pages_total = total
+            self._update(pages_done=total - remaining, pages_total=total)
+
+        source = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            target = sqlite3.connect(dest)
+            try:
+                try:
+                    source.backup(target, pages=pages, progress=progress, sleep=sleep)
+                except _Restarted:
+                    log.info("BACKUP  restarted %d times, finishing in one step", restarts)
+                    source.backup(target)
+                    self._update(pages_done=pages_total)
+            finally:
+                target.close()
+        finally:
+            source.close()
+
+    @staticmethod
+    def _verify(path: Path):
+        conn = sqlite3.connect(path)
+        try:
+            rows = conn.execute("PRAGMA integrity_check").fetchall()
+            # A single row "ok" means the copy is sound
+            if rows != [("ok",)]:
+                raise BackupError("Integrity check failed: " + "; ".join(row[0] for row in rows[:5]))
+            # The copy keeps WAL mode; make it a self-contained single file
+            conn.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _compress(path: Path) -> Path:
+        target = path.with_name(path.name + ".gz")
+        with open(path, "rb") as src, gzip.open(target, "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        path.unlink()
+        return target
+
+    def run(self, backup_dir: Path, kind: str = "manual", compress: bool = False,
+            pages: int = DEFAULT_SCHEDULE["pages"], sleep_ms: float = DEFAULT_SCHEDULE["sleep_ms"]) -> Path:
+        """Copy, verify and (optionally) compress one backup; returns the file."""
+        if not self._running.acquire(blocking=False):
+            raise BackupInProgress("A backup is already running")
+        try:
+            return self._run(backup_dir, kind, compress, pages, sleep_ms)
+        finally:
+            self._running.release()
+
+    def start_manual(self, backup_dir: Path):
+        """Run a manual backup on its own thread; follow it with ``snapshot()``."""
+        if not self._running.acquire(blocking=False):
+            raise BackupInProgress("A backup is already running")
+        # Visible as running before the thread gets going
+        self._update(running=True, kind="manual", phase="starting", pages_done=0, pages_total=0, restarts=0)
+        schedule = schedule_config()
+
+        def work():
+            try:
+                self._run(backup_dir, "manual", False, int(schedule["pages"]), float(schedule["sleep_ms"]))
+            except Exception:
+                pass  # Logged and kept in last_error by _run
+            finally:
+                self._running.release()
+
+        self._manual_thread = threading.Thread(target=work, name="listabob-backup-manual", daemon=True)
+        self._manual_thread.start()
+
+    def _run(self, backup_dir: Path, kind: str, compress: bool, pages: int, sleep_ms: float) -> Path:
+        """One backup; the caller holds ``_running``."""
+        started = time.perf_counter()
+        prefix = AUTO_PREFIX if kind == "auto" else MANUAL_PREFIX
+        final = backup_dir / f"{prefix}{datetime.now().strftime(TIMESTAMP_FORMAT)}.db"
+        partial = final.with_name(final.name + ".partial")
+        try:
+            self._update(running=True, kind=kind, phase="copying", pages_done=0, pages_total=0, restarts=0)
+            self._copy(partial, pages, sleep_ms / 1000)
+            if self._stop.is_set():
+                raise BackupCancelled("Backup cancelled: the server is shutting down")
+            self._update(phase="verifying")
+            self._verify(partial)
+            os.replace(partial, final)
+            if compress:
+                self._update(phase="compressing")
+                final = self._compress(final)
+        except Exception as e:
+            partial.unlink(missing_ok=True)
+            self._update(last_error=str(e), last_error_at=datetime.now().isoformat())
+            if isinstance(e, BackupCancelled):
+                log.info("BACKUP CANCELLED  kind=%s", kind)
+            else:
+                log.error("BACKUP FAILED  kind=%s  error=%s", kind, e)
+            raise
+        finally:
+            self._update(running=False, phase=None)
+
+        elapsed = (time.perf_counter() - started) * 1000
+        size = final.stat().st_size
+        self._update(
+            last_success_at=datetime.now().isoformat(), last_file=str(final),
+            last_bytes=size, last_duration_ms=round(elapsed, 1), last_error=None,
+        )
+        log.info("BACKUP  kind=%s  file=%s  bytes=%d  ms=%.0f", kind, final.name, size, elapsed)
+        return final
+
+    # --- Schedule ---
+
+    def prune(self, backup_dir: Path, hourly: int, daily: int, weekly: int) -> list[Path]:
+        """Delete scheduled backups outside the rotation policy."""
+        paths = [p for p in backup_dir.iterdir() if backup_time(p)]
+        keep = rotation_keep(paths, hourly, daily, weekly)
+        removed = [p for p in paths if p not in keep]
+        for path in removed:
+            path.unlink(missing_ok=True)
+        if removed:
+            log.info("BACKUP PRUNED  files=%d  kept=%d", len(removed), len(keep))
+        return removed
+
+    @staticmethod
+    def _acquire_dir_lock(backup_dir: Path) -> Path | None:
+        lock = backup_dir / LOCK_NAME
+        try:
+            if time.time() - lock.stat().st_mtime > STALE_LOCK_SECONDS:
+                lock.unlink(missing_ok=True)
+        except FileNotFoundError:
+            pass
+        try:
+            os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            return None
+        return lock
+
+    def run_scheduled(self) -> Path | None:
+        """Take a scheduled backup if one is due; returns the new file, if any."""
+        schedule = schedule_config()
+        backup_path = config_store.get_value("backup_path", "")
+        if not schedule["enabled"] or not backup_path:
+            self._update(next_run_at=None)
+            return None
+        backup_dir = Path(backup_path)
+        backup_dir.mkdir(parents=True, exist_ok=True)
+
+        # The newest file in the directory is the schedule's state, shared by
+        # worker processes and kept across restarts
+        interval = float(schedule["interval_minutes"]) * 60
+        newest = max(filter(None, (backup_time(p) for p in backup_dir.iterdir())), default=None)
+        if newest is not None:
+            due = newest.timestamp() + interval
+            self._update(next_run_at=datetime.fromtimestamp(due).isoformat())
+            if time.time() < due:
+                return None
+
+        lock = self._acquire_dir_lock(backup_dir)
+        if lock is None:
+            return None
+        try:
+            path = self.run(
+                backup_dir, kind="auto", compress=bool(schedule["compress"]),
+                pages=int(schedule["pages"]), sleep_ms=float(schedule["sleep_ms"]),
+            )
+            self.prune(backup_dir, int(schedule["keep_hourly"]), int(schedule["keep_daily"]), int(schedule["keep_weekly"]))
+            self._update(next_run_at=datetime.fromtimestamp(time.time() + interval).isoformat())
+            return path
+        finally:
+            lock.unlink(missing_ok=True)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_scheduled()
+            except BackupInProgress:
+                pass
+            except Exception:
+                log.exception("Scheduled backup failed")
+            self._stop.wait(POLL_SECONDS)
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="listabob-backup", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the scheduler; a backup in progress is abandoned at its next step."""
+        self._stop.set()
+        for thread in (self._thread, self._manual_thread):
+            if thread is not None:
+                thread.join()
+        self._thread = self._manual_thread = None
+
+
+backup_service = BackupService()
@@ -0,0 +1,67 @@
+"""
+Token-aware packing of AI completion batches.
+
+Items are packed in order into batches whose estimated prompt size stays
+under a token budget, so one huge prompt doesn't time out and many tiny ones
+don't waste round trips. Estimates use the usual ~4 characters per token rule
+of thumb, which is close enough for sizing.
+"""
+import json
+from typing import Any
+
+from app.services.config_store import config_store
+
+CHARS_PER_TOKEN = 4
+DEFAULT_TOKEN_BUDGET = 6000
+DEFAULT_MAX_ITEMS = 50
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN)
+
+
+def estimate_item_tokens(item_context: dict[str, Any]) -> int:
+    """Approximate prompt tokens for one "Item N:" block."""
+    lines = ["Item 000:"]
+    for col_name, value in item_context.items():
+        rendered = value if isinstance(value, str) else json.dumps(value, default=str)
+        lines.append(f"  {col_name}: {rendered}")
+    # A few extra tokens for the answer slot in the output array
+    return estimate_tokens("\n".join(lines)) + 4
+
+
+def token_budget() -> int:
+    return int(config_store.get_value("ai_batch_token_budget", DEFAULT_TOKEN_BUDGET))
+
+
+def max_items_per_batch() -> int:
+    return int(config_store.get_value("ai_batch_max_items", DEFAULT_MAX_ITEMS))
+
+
+def plan_batches(
+    item_tokens: list[int],
+    budget: int | None = None,
+    overhead: int = 0,
+    max_items: int | None = None,
+) -> list[list[int]]:
+    """Group item indices into consecutive batches.
+
+    ``overhead`` is the fixed cost of the system instruction and framing. An
+    item that alone exceeds the budget still gets a batch of its own.
+    """
+    budget = budget if budget is not None else token_budget()
+    max_items = max_items if max_items is not None else max_items_per_batch()
+    available = max(1, budget - overhead)
+
+    batches: list[list[int]] = []
+    current: list[int] = []
+    used = 0
+    for index, tokens in enumerate(item_tokens):
+        if current and (used + tokens > available or len(current) >= max_items):
+            batches.append(current)
+            current, used = [], 0
+        current.append(index)
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
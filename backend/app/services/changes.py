@@ -0,0 +1,56 @@
+"""
+Change sequence numbers for delta sync.
+
+Every write to an item stamps ``Item.change_seq`` with the next value of a
+single database-wide counter; changes to a list's settings, columns or
+views stamp ``List.schema_seq`` (the schema cache's version), changes to its
+columns also ``List.columns_seq`` (when delta sync resends the columns), and
+permanent deletes leave an ``ItemTombstone``. The counter is bumped inside
+the writing transaction, which holds SQLite's write lock until it commits,
+so sequence order is commit order: a client that has seen everything up to
+N can ask for ``change_seq > N`` and miss nothing.
+
+Existing rows start at 0, so only a full sync (``since=0``) returns them
+until they are next written.
+"""
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models import Item, ItemTombstone, List
+
+_NEXT_SQL = text(
+    "INSERT INTO change_counter (id, value) VALUES (1, 1) "
+    "ON CONFLICT(id) DO UPDATE SET value = value + 1 RETURNING value"
+)
+
+
+def next_change_seq(db: Session) -> int:
+    """Take the next sequence number (within the caller's write transaction)."""
+    return db.execute(_NEXT_SQL).scalar_one()
+
+
+def current_change_seq(db: Session) -> int:
+    """The last sequence number handed out: the high-water mark for a sync."""
+    return db.execute(text("SELECT value FROM change_counter WHERE id = 1")).scalar() or 0
+
+
+def mark_schema_changed(db: Session, list_id: str, columns: bool = False) -> int:
+    """Stamp a change to a list's settings or views, or with ``columns`` to its columns."""
+    seq = next_change_seq(db)
+    # Keep updated_at: a column edit shouldn't move the list to the top
+    values = {"schema_seq": seq, "updated_at": List.updated_at}
+    if columns:
+        values["columns_seq"] = seq
+    db.query(List).filter(List.id == list_id).update(values, synchronize_session=False)
+    return seq
+
+
+def mark_list_items_changed(db: Session, list_id: str) -> int:
+    """Stamp every item of a list, e.g. when a column type change alters their values."""
+    seq = next_change_seq(db)
+    db.query(Item).filter(Item.list_id == list_id).update({"change_seq": seq}, synchronize_session=False)
+    return seq
+
+
+def record_tombstone(db: Session, item: Item):
+    db.add(ItemTombstone(list_id=item.list_id, item_id=item.id, change_seq=next_change_seq(db)))
@@ -0,0 +1,157 @@
+"""
+Server-side store for item chat conversations.
+
+Each session keeps the system instruction (list name + item context) and the
+message history in their own SQLite file (DATA_DIR/chat_sessions.db), so the
+browser only sends the newest message on each turn. Sessions idle for longer
+than ``chat_session_ttl_hours`` are purged.
+
+A session may also remember a Gemini ``cachedContents`` resource holding its
+system instruction, so long prompts are uploaded once rather than every turn.
+"""
+import asyncio
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from app.config import DATA_DIR
+from app.services.config_store import config_store
+
+SESSIONS_PATH = DATA_DIR / "chat_sessions.db"
+
+DEFAULT_TTL_HOURS = 24
+
+
+class ChatSessionStore:
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    @property
+    def ttl_seconds(self) -> float:
+        return float(config_store.get_value("chat_session_ttl_hours", DEFAULT_TTL_HOURS)) * 3600
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " id TEXT PRIMARY KEY,"
+                " list_name TEXT NOT NULL,"
+                " system_instruction TEXT NOT NULL,"
+                " cached_content TEXT,"
+                " cached_model TEXT,"
+                " cached_expires_at REAL,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS messages ("
+                " session_id TEXT NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,"
+                " seq INTEGER NOT NULL,"
+                " role TEXT NOT NULL,"
+                " content TEXT NOT NULL,"
+                " PRIMARY KEY (session_id, seq))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_sessions_updated ON sessions (updated_at)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def create(self, list_name: str, system_instruction: str, history: list[tuple[str, str]]) -> str:
+        """Start a session, optionally seeded with earlier (role, content) turns."""
+        session_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            self._purge(db, now)
+            db.execute(
+                "INSERT INTO sessions (id, list_name, system_instruction, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (session_id, list_name, system_instruction, now, now),
+            )
+            db.executemany(
+                "INSERT INTO messages (session_id, seq, role, content) VALUES (?, ?, ?, ?)",
+                [(session_id, i, role, content) for i, (role, content) in enumerate(history)],
+            )
+            db.commit()
+        return session_id
+
+    def get(self, session_id: str) -> dict | None:
+        """Session metadata plus ``messages`` as (role, content) tuples, or None if unknown/expired."""
+        with self._lock:
+            db = self._db()
+            row = db.execute(
+                "SELECT list_name, system_instruction, cached_content, cached_model, cached_expires_at"
+                " FROM sessions WHERE id = ? AND updated_at >= ?",
+                (session_id, time.time() - self.ttl_seconds),
+            ).fetchone()
+            if row is None:
+                return None
+            messages = db.execute(
+                "SELECT role, content FROM messages WHERE session_id = ? ORDER BY seq",
+                (session_id,),
+            ).fetchall()
+        return {
+            "id": session_id,
+            "list_name": row[0],
+            "system_instruction": row[1],
+            "cached_content": row[2],
+            "cached_model": row[3],
+            "cached_expires_at": row[4],
+            "messages": [(role, content) for role, content in messages],
+        }
+
+    def append(self, session_id: str, turns: list[tuple[str, str]]):
+        with self._lock:
+            db = self._db()
+            start = db.execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM messages WHERE session_id = ?", (session_id,),
+            ).fetchone()[0]
+            db.executemany(
+                "INSERT INTO messages (session_id, seq, role, content) VALUES (?, ?, ?, ?)",
+                [(session_id, start + i, role, content) for i, (role, content) in enumerate(turns)],
+            )
+            db.execute("UPDATE sessions SET updated_at = ? WHERE id = ?", (time.time(), session_id))
+            db.commit()
+
+    def set_cached_content(self, session_id: str, name: str | None, model: str | None, expires_at: float | None):
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "UPDATE sessions SET cached_content = ?, cached_model = ?, cached_expires_at = ? WHERE id = ?",
+                (name, model, expires_at, session_id),
+            )
+            db.commit()
+
+    def delete(self, session_id: str) -> str | None:
+        """Remove a session. Returns its cached content name so the caller can release it."""
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT cached_content FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+            db.commit()
+        return row[0] if row else None
+
+    def _purge(self, db: sqlite3.Connection, now: float):
+        db.execute("DELETE FROM sessions WHERE updated_at < ?", (now - self.ttl_seconds,))
+
+    # -- async helpers ----------------------------------------------------
+
+    async def acreate(self, list_name: str, system_instruction: str, history: list[tuple[str, str]]) -> str:
+        return await asyncio.to_thread(self.create, list_name, system_instruction, history)
+
+    async def aget(self, session_id: str) -> dict | None:
+        return await asyncio.to_thread(self.get, session_id)
+
+    async def aappend(self, session_id: str, turns: list[tuple[str, str]]):
+        await asyncio.to_thread(self.append, session_id, turns)
+
+
+chat_sessions = ChatSessionStore(SESSIONS_PATH)
@@ -0,0 +1,227 @@
+"""
+Persistent cache of AI completion results.
+
+Entries live in their own SQLite file (DATA_DIR/ai_cache.db) so database
+backups and migrations never touch them. Keys are a SHA-256 over the model,
+system instruction, target column spec and item context; values are the
+already-normalised result as JSON. Entries expire after a TTL and the
+least recently used ones are evicted once the file grows past a size cap.
+
+Identical requests that arrive while a call is in flight share its result
+instead of each going upstream.
+"""
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from app.config import DATA_DIR
+from app.logger import get_logger
+from app.services.config_store import config_store
+
+log = get_logger("listabob.ai_cache")
+
+CACHE_PATH = DATA_DIR / "ai_cache.db"
+
+DEFAULT_TTL_HOURS = 24 * 30
+DEFAULT_MAX_MB = 50
+
+
+def make_key(model: str, system_instruction: str, target: Any, item_context: Any) -> str:
+    """Stable hash of everything that influences a completion."""
+    raw = json.dumps(
+        [model, system_instruction, target, item_context],
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.collapsed = 0
+
+    # -- settings ---------------------------------------------------------
+
+    @property
+    def ttl_seconds(self) -> float:
+        return float(config_store.get_value("ai_cache_ttl_hours", DEFAULT_TTL_HOURS)) * 3600
+
+    @property
+    def max_bytes(self) -> int:
+        return int(float(config_store.get_value("ai_cache_max_mb", DEFAULT_MAX_MB)) * 1024 * 1024)
+
+    # -- storage ----------------------------------------------------------
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS completions ("
+                " key TEXT PRIMARY KEY,"
+                " model TEXT,"
+                " value TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_used_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_completions_last_used ON completions (last_used_at)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, keys: list[str]) -> dict[str, Any]:
+        """Return {key: value} for every key that is cached and not expired."""
+        if not keys:
+            return {}
+        now = time.time()
+        cutoff = now - self.ttl_seconds
+        found: dict[str, Any] = {}
+        with self._lock:
+            db = self._db()
+            unique = list(dict.fromkeys(keys))
+            for start in range(0, len(unique), 500):
+                chunk = unique[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = db.execute(
+                    f"SELECT key, value FROM completions WHERE key IN ({marks}) AND created_at >= ?",
+                    (*chunk, cutoff),
+                ).fetchall()
+                for key, value in rows:
+                    found[key] = json.loads(value)
+            if found:
+                db.executemany(
+                    "UPDATE completions SET last_used_at = ? WHERE key = ?",
+                    [(now, k) for k in found],
+                )
+                db.commit()
+        self.hits += sum(1 for k in keys if k in found)
+        self.misses += sum(1 for k in keys if k not in found)
+        return found
+
+    def put_many(self, entries: dict[str, Any], model: str | None = None):
+        if not entries:
+            return
+        now = time.time()
+        rows = []
+        for key, value in entries.items():
+            encoded = json.dumps(value, ensure_ascii=False)
+            rows.append((key, model, encoded, len(key) + len(encoded), now, now))
+        with self._lock:
+            db = self._db()
+            db.executemany(
+                "INSERT OR REPLACE INTO completions (key, model, value, size, created_at, last_used_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            db.commit()
+            self._evict(db)
+
+    def _evict(self, db: sqlite3.Connection):
+        """Drop expired rows, then least recently used rows until under the size cap."""
+        db.execute("DELETE FROM completions WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+        limit = self.max_bytes
+        if total > limit:
+            target = int(limit * 0.9)
+            excess = total - target
+            victims = []
+            for key, size in db.execute("SELECT key, size FROM completions ORDER BY last_used_at"):
+                victims.append((key,))
+                excess -= size
+                if excess <= 0:
+                    break
+            db.executemany("DELETE FROM completions WHERE key = ?", victims)
+            log.info("AI CACHE EVICT  removed=%d  total_bytes=%d  limit=%d", len(victims), total, limit)
+        db.commit()
+
+    def clear(self):
+        with self._lock:
+            db = self._db()
+            db.execute("DELETE FROM completions")
+            db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, size = self._db().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM completions"
+            ).fetchone()
+        return {
+            "entries": count,
+            "bytes": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "collapsed": self.collapsed,
+        }
+
+    # -- async helpers ----------------------------------------------------
+
+    async def aget_many(self, keys: list[str]) -> dict[str, Any]:
+        return await asyncio.to_thread(self.get_many, keys)
+
+    async def aput_many(self, entries: dict[str, Any], model: str | None = None):
+        await asyncio.to_thread(self.put_many, entries, model)
+
+    async def singleflight(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``compute`` once per key; concurrent callers await the same result."""
+        existing = self._inflight.get(key)
+        if existing is not None:
+            self.collapsed += 1
+            await asyncio.wait({existing})
+            if not existing.cancelled():
+                return existing.result()
+            # The leading request was cancelled (client went away); try ourselves
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        model: str | None = None,
+        refresh: bool = False,
+    ) -> Any:
+        """Return the cached value for ``key`` or compute, store and return it."""
+        if not refresh:
+            found = await self.aget_many([key])
+            if key in found:
+                return found[key]
+
+        async def _compute_and_store():
+            value = await compute()
+            await self.aput_many({key: value}, model)
+            return value
+
+        return await self.singleflight(key, _compute_and_store)
+
+
+completion_cache = CompletionCache(CACHE_PATH)
@@ -0,0 +1,189 @@
+"""
+Content-negotiated response compression for the API.
+
+Item listings repeat the same column ids and names in every item, so they
+compress 6-8x. ``CompressionMiddleware`` picks zstd, brotli or gzip from
+``Accept-Encoding`` (zstd and brotli only when the ``zstandard`` /
+``brotli`` modules are installed) and compresses:
+
+- whole responses at or above ``MIN_SIZE`` bytes; smaller ones go out as-is
+- streamed responses (e.g. CSV export) chunk by chunk, flushing after each
+  chunk so the client still receives data as it is produced
+
+Server-sent events are left alone (they must not be buffered), as are
+responses that already carry a Content-Encoding (the precompressed static
+files) and non-text content types.
+"""
+import zlib
+
+from starlette.concurrency import run_in_threadpool
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+from app.services.static_files import accepted_encodings
+
+MIN_SIZE = 1024
+# Bodies this big are compressed in the threadpool rather than on the event loop
+THREADPOOL_SIZE = 256 * 1024
+# The static files handle their own encoding, so HTML/JS/CSS aren't listed
+COMPRESSIBLE_TYPES = ("application/json", "text/csv", "text/plain", "application/xml")
+
+# Fast settings: compression runs on every request
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+
+
+def available_encodings() -> tuple[str, ...]:
+    """Supported encodings, most preferred first."""
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return tuple(encodings)
+
+
+ENCODINGS = available_encodings()
+
+
+class _Compressor:
+    """Incremental compressor with a common interface for the three codecs."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+        elif encoding == "br":
+            self._obj = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._obj = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._obj.process(data)
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        """Emit everything so far without ending the stream."""
+        if self.encoding == "zstd":
+            return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        if self.encoding == "br":
+            return self._obj.flush()
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "zstd":
+            return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+        if self.encoding == "br":
+            return self._obj.finish()
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    compressor = _Compressor(encoding)
+    return compressor.compress(data) + compressor.finish()
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    if not accept_encoding:
+        return None
+    accepted = accepted_encodings(accept_encoding)
+    for encoding in ENCODINGS:
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+def _compressible(headers: list) -> bool:
+    content_type = ""
+    for key, value in headers:
+        if key == b"content-encoding":
+            return False
+        if key == b"content-type":
+            content_type = value.decode("latin-1").lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for key, value in scope["headers"]:
+            if key == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor: _Compressor | None = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk decides whether to compress
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                headers = list(start_message.get("headers", []))
+                if (
+                    not _compressible(headers)
+                    or start_message["status"] in (204, 304)
+                    or (not more_body and len(body) < self.minimum_size)
+                ):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                headers = [(k, v) for k, v in headers if k != b"content-length"]
+                headers.append((b"content-encoding", encoding.encode()))
+                if not any(k == b"vary" for k, _ in headers):
+                    headers.append((b"vary", b"Accept-Encoding"))
+                if not more_body:
+                    # Complete body: compress in one go and send a Content-Length
+                    if len(body) >= THREADPOOL_SIZE:
+                        data = await run_in_threadpool(compress, body, encoding)
+                    else:
+                        data = compress(body, encoding)
+                    headers.append((b"content-length", str(len(data)).encode()))
+                    await send({**start_message, "headers": headers})
+                    await send({"type": "http.response.body", "body": data})
+                    return
+                await send({**start_message, "headers": headers})
+                compressor = _Compressor(encoding)
+
+            if more_body:
+                data = compressor.compress(body) + compressor.flush()
+            else:
+                data = compressor.compress(body) + compressor.finish()
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,157 @@
+"""
+In-memory cache of config.json shared by the auth, system and chat routers.
+
+The file is parsed once and re-read only when its mtime or size changes.
+Writes go through a temp file plus rename so readers never see a partial file.
+The expected auth token is derived once per load, so token checks are a
+plain string comparison instead of a file read and a SHA-256.
+"""
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+
+def get_base_dir() -> Path:
+    """Get the base directory for config file."""
+    if getattr(sys, 'frozen', False):
+        return Path(sys.executable).parent
+    return Path(__file__).parent.parent.parent.parent
+
+
+CONFIG_PATH = get_base_dir() / "config.json"
+
+DEFAULT_CONFIG = {
+    "password": "listabob",
+    "revoke_timestamp": "2026-01-01T00:00:00Z",
+    "backup_path": "",
+}
+
+
+def generate_token(password: str, revoke_timestamp: str) -> str:
+    """Generate a token from password and timestamp."""
+    combined = f"{password}:{revoke_timestamp}"
+    return hashlib.sha256(combined.encode()).hexdigest()
+
+
+class ConfigStore:
+    """Thread-safe cached view of a JSON config file."""
+
+    def __init__(self, path: Path, check_interval: float = 1.0):
+        self.path = path
+        # Minimum seconds between stat() calls; 0 checks on every access
+        self.check_interval = check_interval
+        self._lock = threading.RLock()
+        self._data: dict = {}
+        self._signature: tuple[int, int] | None = None
+        self._token: str | None = None
+        self._checked_at = 0.0
+
+    def _stat_signature(self) -> tuple[int, int] | None:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _set(self, data: dict, signature: tuple[int, int] | None):
+        self._data = data
+        self._signature = signature
+        if "password" in data and "revoke_timestamp" in data:
+            self._token = generate_token(data["password"], data["revoke_timestamp"])
+        else:
+            self._token = None
+
+    def _refresh(self, force: bool = False):
+        """Reload the file if it changed since the last check. Caller holds the lock.
+
+        ``force`` skips the ``check_interval`` throttle.
+        """
+        now = time.monotonic()
+        if not force and self._checked_at and now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+
+        signature = self._stat_signature()
+        if signature == self._signature:
+            return
+        if signature is None:
+            self._set({}, None)
+            return
+        with open(self.path, "r") as f:
+            data = json.load(f)
+        self._set(data, signature)
+
+    def exists(self) -> bool:
+        with self._lock:
+            self._refresh()
+            return self._signature is not None
+
+    def get(self) -> dict:
+        """Return a copy of the current config ({} if the file is missing)."""
+        with self._lock:
+            self._refresh()
+            return dict(self._data)
+
+    def get_value(self, key: str, default=None):
+        with self._lock:
+            self._refresh()
+            return self._data.get(key, default)
+
+    def workers(self) -> int:
+        """Number of server processes the standalone app runs (``server.workers``)."""
+        return max(1, int((self.get_value("server", None) or {}).get("workers", 1)))
+
+    def expected_token(self) -> str | None:
+        """Token derived from the current password and revoke_timestamp."""
+        with self._lock:
+            self._refresh()
+            return self._token
+
+    def save(self, config: dict):
+        """Atomically replace the config file and the cached copy."""
+        data = dict(config)
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(
+                prefix=".config-", suffix=".tmp", dir=str(self.path.parent)
+            )
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(data, f, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+            self._set(data, self._stat_signature())
+            self._checked_at = time.monotonic()
+
+    def update(self, **changes) -> dict:
+        """Apply changes on top of the current config and save it."""
+        with self._lock:
+            # Another worker process may have saved within the throttle interval
+            self._refresh(force=True)
+            config = dict(self._data)
+            config.update(changes)
+            self.save(config)
+            return config
+
+    def ensure_exists(self, defaults: dict) -> dict:
+        """Create the file with defaults if it is missing; return the config."""
+        with self._lock:
+            self._refresh(force=True)
+            if self._signature is None:
+                self.save(defaults)
+            return self.get()
+
+
+config_store = ConfigStore(CONFIG_PATH)
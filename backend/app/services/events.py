@@ -0,0 +1,151 @@
+"""
+In-process fan-out of list change events to Server-Sent Events clients.
+
+Write handlers call the ``publish_*`` helpers after their transaction has
+committed; ``GET /api/lists/{list_id}/events`` streams the events of one
+list. An event is serialized once, however many clients follow the list,
+and publishing to a list nobody follows is a dictionary lookup.
+
+Every subscriber has a bounded queue. When a client reads too slowly and
+its queue fills up, its backlog is dropped and replaced by one ``resync``
+event telling it to refetch, so a stalled tab never holds up writers or
+grows memory.
+
+Events only reach clients connected to the same server process; with
+several workers a client also refetches whenever it (re)connects.
+"""
+import asyncio
+import json
+import threading
+
+from fastapi.encoders import jsonable_encoder
+
+from app.logger import get_logger
+from app.models import Column
+from app.schemas import ColumnResponse
+
+log = get_logger("listabob.events")
+
+QUEUE_SIZE = 256
+RESYNC = "event: resync\ndata: {}\n\n"
+
+
+class Subscription:
+    def __init__(self, list_id: str, loop: asyncio.AbstractEventLoop):
+        self.list_id = list_id
+        self.loop = loop
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.overflows = 0
+
+    def offer(self, message: str):
+        """Queue a message; runs on the subscriber's event loop."""
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.overflows += 1
+            self.queue.put_nowait(RESYNC)
+            log.debug("EVENTS OVERFLOW  list=%s  overflows=%d", self.list_id, self.overflows)
+            return
+        self.queue.put_nowait(message)
+
+
+class EventBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: dict[str, set[Subscription]] = {}
+        self.published = 0
+        self.delivered = 0
+
+    def subscribe(self, list_id: str) -> Subscription:
+        subscription = Subscription(list_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.setdefault(list_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.list_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.list_id]
+
+    def has_subscribers(self, list_id: str) -> bool:
+        return list_id in self._subscribers
+
+    def publish(self, list_id: str, event: str, data):
+        """Send an event to everyone following the list; callable from any thread."""
+        with self._lock:
+            subscribers = tuple(self._subscribers.get(list_id, ()))
+        if not subscribers:
+            return
+        message = f"event: {event}\ndata: {json.dumps(jsonable_encoder(data), separators=(',', ':'))}\n\n"
+        delivered = 0
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, message)
+                delivered += 1
+            except RuntimeError:  # the subscriber's event loop has closed
+                self.unsubscribe(subscription)
+        with self._lock:
+            self.published += 1
+            self.delivered += delivered
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            subscribers = [s for group in self._subscribers.values() for s in group]
+            return {
+                "lists": len(self._subscribers),
+                "subscribers": len(subscribers),
+                "published": self.published,
+                "delivered": self.delivered,
+                "overflows": sum(s.overflows for s in subscribers),
+            }
+
+
+event_broker = EventBroker()
+
+
+# --- Event helpers for the write paths ---
+
+def publish_item(list_id: str, item):
+    """An item was created, updated or restored; ``item`` is its ItemResponse."""
+    event_broker.publish(list_id, "item", item)
+
+
+def publish_item_deleted(list_id: str, item_id: str, purged: bool = False):
+    event_broker.publish(list_id, "item_deleted", {"id": item_id, "purged": purged})
+
+
+def publish_values(list_id: str, column_id: str, values: dict):
+    """One column changed for many items, e.g. an AI fill batch: {item_id: value}."""
+    event_broker.publish(list_id, "values", {"column_id": column_id, "values": values})
+
+
+def publish_columns(db, list_id: str):
+    """The list's columns changed; sends the full, ordered list (queried only if anyone listens)."""
+    if event_broker.has_subscribers(list_id):
+        columns = db.query(Column).filter(Column.list_id == list_id).order_by(Column.position).all()
+        event_broker.publish(list_id, "columns", [ColumnResponse.model_validate(c) for c in columns])
+
+
+def publish_resync(list_id: str):
+    """Too much changed to describe (e.g. a column type change); clients refetch."""
+    event_broker.publish(list_id, "resync", {})
+
+
+def publish_list(list_id: str, db_list):
+    if not event_broker.has_subscribers(list_id):
+        return
+    event_broker.publish(list_id, "list", {
+        "id": db_list.id,
+        "name": db_list.name,
+        "description": db_list.description,
+        "icon": db_list.icon,
+        "color": db_list.color,
+        "is_favorite": db_list.is_favorite,
+    })
+
+
+def publish_list_deleted(list_id: str):
+    event_broker.publish(list_id, "list_deleted", {"id": list_id})
@@ -0,0 +1,111 @@
+"""
+Shared HTTP client for Gemini API calls.
+
+One pooled ``httpx.AsyncClient`` is created in the FastAPI lifespan and
+reused by every chat endpoint, so calls reuse warm keep-alive connections
+instead of paying a TCP + TLS handshake each time.
+
+The API root comes from ``gemini_base_url`` in config.json, falling back to
+the ``GEMINI_BASE_URL`` environment variable / settings default, so the app
+can be pointed at ``benchmarks.fake_gemini`` for offline testing.
+"""
+import httpx
+from fastapi import HTTPException, Request
+
+from app.config import settings
+from app.logger import get_logger
+from app.services.config_store import config_store
+from app.services.rate_limiter import INTERACTIVE, send_with_retry
+
+log = get_logger("listabob.chat")
+
+# Per-endpoint timeouts (connect is kept short everywhere)
+CHAT_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+# For streams the read timeout is the longest allowed gap between chunks
+CHAT_STREAM_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+COMPLETION_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+ITEM_COMPLETION_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+BATCH_COMPLETION_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+MODELS_TIMEOUT = httpx.Timeout(15.0, connect=10.0)
+
+POOL_LIMITS = httpx.Limits(
+    max_connections=20,
+    max_keepalive_connections=10,
+    keepalive_expiry=120.0,
+)
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def gemini_base_url() -> str:
+    """Configured Gemini API root (read when the shared client is created)."""
+    return (config_store.get_value("gemini_base_url") or settings.gemini_base_url).rstrip("/")
+
+
+def create_gemini_client(base_url: str | None = None, **kwargs) -> httpx.AsyncClient:
+    """Build the pooled client. HTTP/2 is used when the ``h2`` package is installed."""
+    base_url = base_url or gemini_base_url()
+    kwargs.setdefault("http2", _http2_available())
+    kwargs.setdefault("limits", POOL_LIMITS)
+    kwargs.setdefault("timeout", CHAT_TIMEOUT)
+    return httpx.AsyncClient(base_url=base_url, **kwargs)
+
+
+async def get_gemini_client(request: Request) -> httpx.AsyncClient:
+    """FastAPI dependency returning the app-wide Gemini client.
+
+    The pooled keep-alive client is created on first use rather than at
+    startup, so apps that never call Gemini don't pay for it; the lifespan
+    closes it on shutdown. Being async, it runs on the event loop rather
+    than in the threadpool, so concurrent first requests can't each create
+    a client.
+    """
+    client = getattr(request.app.state, "gemini_client", None)
+    if client is None or client.is_closed:
+        client = create_gemini_client()
+        request.app.state.gemini_client = client
+    return client
+
+
+async def send_gemini(
+    client: httpx.AsyncClient,
+    method: str,
+    url: str,
+    *,
+    params: dict,
+    timeout: httpx.Timeout,
+    json: dict | None = None,
+    priority: int = INTERACTIVE,
+    stream: bool = False,
+) -> httpx.Response:
+    """Send a Gemini request through the shared rate limiter with retries."""
+    request = client.build_request(method, url, params=params, json=json, timeout=timeout)
+    # Rough prompt size (~4 bytes per token) until Gemini reports real usage
+    tokens = len(request.content) // 4 if json is not None else 0
+    return await send_with_retry(client, request, tokens=tokens, priority=priority, stream=stream)
+
+
+def raise_for_rate_limit(resp: httpx.Response):
+    """Surface a 429 that outlasted our retries as a 429, not a generic 500."""
+    if resp.status_code == 429:
+        headers = {"Retry-After": resp.headers["retry-after"]} if "retry-after" in resp.headers else None
+        raise HTTPException(
+            status_code=429,
+            detail="Gemini rate limit reached. Please try again shortly.",
+            headers=headers,
+        )
+
+
+def response_text(resp: httpx.Response, model_name: str) -> str:
+    """Text of the first candidate, or a 502 if the body isn't the expected shape."""
+    try:
+        return resp.json()["candidates"][0]["content"]["parts"][0]["text"]
+    except (ValueError, KeyError, IndexError, TypeError):
+        log.error("GEMINI MALFORMED RESPONSE  model=%s  body=%r", model_name, resp.text[:200])
+        raise HTTPException(status_code=502, detail="Gemini returned a malformed response.")
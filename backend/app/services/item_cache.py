@@ -0,0 +1,137 @@
+"""
+Bounded in-memory LRU cache of decoded item values.
+
+Reading a list decodes every ``ItemValue`` row through ``extract_value``.
+This cache keeps each item's decoded ``{column_id: value}`` dict, keyed by
+item id and stamped with the list's ``values_key`` (its column ids and
+types, see services/schema_cache.py) and the item's ``change_seq``. An entry
+is only used while both still match: every write to an item's values takes a
+new ``change_seq`` (see services/changes.py) and adding, removing or retyping
+a column changes the key, so a stale entry is simply a miss, including after
+a write by another worker process. View and list-settings edits leave the
+cached items alone.
+
+Item writes put their result straight into the cache (write-through), but
+only once their transaction has committed: ``cache_after_commit`` parks the
+values on the session and a session ``after_commit`` hook applies them.
+
+The size is bounded by an estimate of the memory the entries use (config
+``item_cache_mb``, 0 disables the cache); the least recently used entries
+are evicted first.
+"""
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.services.config_store import config_store
+
+DEFAULT_MAX_MB = 32
+# Per-entry bookkeeping: the OrderedDict node, key and entry tuple
+ENTRY_OVERHEAD = 200
+PENDING_KEY = "item_cache_pending"
+
+
+def _size_of(value: Any) -> int:
+    """Rough memory footprint of a decoded value."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_size_of(k) + _size_of(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_size_of(v) for v in value)
+    return size
+
+
+class ItemCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # item_id -> (values_key, change_seq, values, size)
+        self._entries: OrderedDict[str, tuple[int, int, dict, int]] = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def max_bytes(self) -> int:
+        return int(float(config_store.get_value("item_cache_mb", DEFAULT_MAX_MB)) * 1024 * 1024)
+
+    def get_many(self, values_key: int, items: list[tuple[str, int]]) -> dict[str, dict]:
+        """Cached values for the (item_id, change_seq) pairs that are current."""
+        found = {}
+        with self._lock:
+            for item_id, change_seq in items:
+                entry = self._entries.get(item_id)
+                if entry is not None and entry[0] == values_key and entry[1] == change_seq:
+                    self._entries.move_to_end(item_id)
+                    found[item_id] = entry[2]
+            self.hits += len(found)
+            self.misses += len(items) - len(found)
+        return found
+
+    def put_many(self, values_key: int, entries: list[tuple[str, int, dict]]):
+        """Store (item_id, change_seq, values) for items decoded under ``values_key``."""
+        max_bytes = self.max_bytes
+        sized = [
+            (item_id, change_seq, values, ENTRY_OVERHEAD + _size_of(values))
+            for item_id, change_seq, values in entries
+        ] if max_bytes > 0 else []
+        with self._lock:
+            for item_id, change_seq, values, size in sized:
+                old = self._entries.pop(item_id, None)
+                if old is not None:
+                    self.bytes -= old[3]
+                if size > max_bytes:
+                    continue
+                self._entries[item_id] = (values_key, change_seq, values, size)
+                self.bytes += size
+            # Also shrinks the cache after item_cache_mb is lowered
+            while self._entries and self.bytes > max_bytes:
+                _, old = self._entries.popitem(last=False)
+                self.bytes -= old[3]
+                self.evictions += 1
+
+    def discard(self, item_ids):
+        with self._lock:
+            for item_id in item_ids:
+                old = self._entries.pop(item_id, None)
+                if old is not None:
+                    self.bytes -= old[3]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+item_cache = ItemCache()
+
+
+def cache_after_commit(db: Session, values_key: int, item_id: str, change_seq: int, values: dict):
+    """Write an item's values through to the cache once ``db`` commits.
+
+    Call it last in a write unit, so a unit that raises never stages anything.
+    """
+    db.info.setdefault(PENDING_KEY, []).append((values_key, item_id, change_seq, values))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session: Session):
+    for values_key, item_id, change_seq, values in session.info.pop(PENDING_KEY, ()):
+        item_cache.put_many(values_key, [(item_id, change_seq, values)])
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(session: Session):
+    session.info.pop(PENDING_KEY, None)
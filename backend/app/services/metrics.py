@@ -0,0 +1,203 @@
+"""
+Request metrics in Prometheus text format.
+
+``MetricsMiddleware`` is a plain ASGI middleware: per request it takes two
+clock readings and bumps a few counters, so the cost is negligible whether
+or not anything scrapes ``/api/system/metrics``. Text is only rendered when
+the endpoint is called. Routes are labelled by their path template (e.g.
+``/api/lists/{list_id}/items``), which keeps label cardinality bounded.
+
+``QueryStatsMiddleware`` counts the SQL statements each request runs; with
+the ``query_headers`` setting on it reports them in ``X-DB-Queries`` /
+``X-DB-Time-ms`` headers.
+"""
+import bisect
+import threading
+import time
+
+from app.config import settings
+from app.database import QueryStats, current_query_stats, db_stats
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str, lines: list[str]):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class RequestMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.latency: dict[tuple[str, str], _Histogram] = {}
+        self.sizes: dict[tuple[str, str], _Histogram] = {}
+        self.responses: dict[tuple[str, str, int], int] = {}
+        self.started_at = time.time()
+
+    def observe(self, method: str, route: str, status: int, seconds: float, size: int):
+        key = (method, route)
+        with self._lock:
+            latency = self.latency.get(key)
+            if latency is None:
+                latency = self.latency[key] = _Histogram(LATENCY_BUCKETS)
+                self.sizes[key] = _Histogram(SIZE_BUCKETS)
+            latency.observe(seconds)
+            self.sizes[key].observe(size)
+            status_key = (method, route, status)
+            self.responses[status_key] = self.responses.get(status_key, 0) + 1
+
+    def render(self) -> str:
+        lines: list[str] = []
+        with self._lock:
+            lines.append("# HELP listabob_http_request_duration_seconds Request latency by route.")
+            lines.append("# TYPE listabob_http_request_duration_seconds histogram")
+            for (method, route), hist in sorted(self.latency.items()):
+                hist.render(
+                    "listabob_http_request_duration_seconds",
+                    f'method="{method}",route="{_escape(route)}"', lines,
+                )
+            lines.append("# HELP listabob_http_response_size_bytes Response body size by route.")
+            lines.append("# TYPE listabob_http_response_size_bytes histogram")
+            for (method, route), hist in sorted(self.sizes.items()):
+                hist.render(
+                    "listabob_http_response_size_bytes",
+                    f'method="{method}",route="{_escape(route)}"', lines,
+                )
+            lines.append("# HELP listabob_http_responses_total Responses by route and status code.")
+            lines.append("# TYPE listabob_http_responses_total counter")
+            for (method, route, status), count in sorted(self.responses.items()):
+                lines.append(
+                    f'listabob_http_responses_total{{method="{method}",route="{_escape(route)}",'
+                    f'status="{status}"}} {count}'
+                )
+            lines.append("# HELP listabob_http_requests_in_flight Requests currently being handled.")
+            lines.append("# TYPE listabob_http_requests_in_flight gauge")
+            lines.append(f"listabob_http_requests_in_flight {self.in_flight}")
+
+        db = db_stats
+        lines += [
+            "# HELP listabob_db_statements_total SQL statements executed.",
+            "# TYPE listabob_db_statements_total counter",
+            f"listabob_db_statements_total {db.statements}",
+            "# HELP listabob_db_statement_seconds_total Time spent executing SQL statements.",
+            "# TYPE listabob_db_statement_seconds_total counter",
+            f"listabob_db_statement_seconds_total {db.statement_seconds}",
+            "# HELP listabob_db_rows_written_total Rows inserted, updated or deleted.",
+            "# TYPE listabob_db_rows_written_total counter",
+            f"listabob_db_rows_written_total {db.rows}",
+            "# HELP listabob_db_connection_checkouts_total Connections taken from the pool.",
+            "# TYPE listabob_db_connection_checkouts_total counter",
+            f"listabob_db_connection_checkouts_total {db.checkouts}",
+            "# HELP listabob_db_connection_wait_seconds_total Time spent waiting for a pooled connection.",
+            "# TYPE listabob_db_connection_wait_seconds_total counter",
+            f"listabob_db_connection_wait_seconds_total {db.checkout_wait_seconds}",
+            "# HELP listabob_process_start_time_seconds Start time of the process.",
+            "# TYPE listabob_process_start_time_seconds gauge",
+            f"listabob_process_start_time_seconds {self.started_at}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics()
+
+
+def _route_label(scope) -> str:
+    """Path template of the route the router matched, e.g. ``/api/lists/{list_id}``."""
+    route = scope.get("route")
+    if route is None:
+        return "<unmatched>"
+    template = getattr(route, "path_format", None)
+    if template is None:
+        return scope["path"]
+    path = scope["path"]
+    # Newer FastAPI versions report a route of an included router with its own
+    # path, without the include prefix; the prefix is whatever precedes the match
+    if not route.path_regex.match(path):
+        for i, char in enumerate(path):
+            if char == "/" and i and route.path_regex.match(path[i:]):
+                return path[:i] + template
+    return template
+
+
+class MetricsMiddleware:
+    def __init__(self, app, metrics: RequestMetrics = request_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        start = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        metrics.in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.in_flight -= 1
+            metrics.observe(
+                scope["method"], _route_label(scope), status, time.perf_counter() - start, size,
+            )
+
+
+class QueryStatsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.query_headers:
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-queries", str(stats.count).encode()))
+                headers.append((b"x-db-time-ms", f"{stats.seconds * 1000:.1f}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_query_stats.reset(token)
@@ -0,0 +1,245 @@
+"""
+Process-wide rate limiting and retry for upstream Gemini calls.
+
+Two token buckets (requests per minute and tokens per minute, both read from
+config) are shared by every caller. Waiters are served strictly by priority,
+so an interactive chat request is admitted before queued bulk fill batches.
+``send_with_retry`` retries 429 and 5xx responses with jittered exponential
+backoff, honouring ``Retry-After`` and Gemini's ``retryDelay`` hints.
+"""
+import asyncio
+import heapq
+import itertools
+import random
+import re
+import time
+
+import httpx
+
+from app.logger import get_logger
+from app.services.config_store import config_store
+
+log = get_logger("listabob.ratelimit")
+
+INTERACTIVE = 0
+BULK = 1
+_LANE_NAMES = {INTERACTIVE: "interactive", BULK: "bulk"}
+
+DEFAULT_RPM = 60
+DEFAULT_TPM = 1_000_000
+DEFAULT_MAX_RETRIES = 4
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 30.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class _Bucket:
+    def __init__(self):
+        self.capacity = 0.0
+        self.level = 0.0
+        self.updated = time.monotonic()
+
+    def configure(self, per_minute: float):
+        if per_minute != self.capacity:
+            # Start full on first use / after a limit change
+            self.level = per_minute if self.capacity == 0 else min(self.level, per_minute)
+            self.capacity = per_minute
+
+    def refill(self, now: float):
+        if self.capacity > 0:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60.0)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` is available (0 when unlimited or ready)."""
+        if self.capacity <= 0:
+            return 0.0
+        # A request larger than the whole bucket waits for a full bucket
+        amount = min(amount, self.capacity)
+        missing = amount - self.level
+        return 0.0 if missing <= 0 else missing * 60.0 / self.capacity
+
+    def take(self, amount: float):
+        if self.capacity > 0:
+            self.level -= amount
+
+
+class RateLimiter:
+    def __init__(self):
+        self._requests = _Bucket()
+        self._tokens = _Bucket()
+        self._waiters: list = []
+        self._seq = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+        self.stats = {
+            "admitted": {"interactive": 0, "bulk": 0},
+            "total_wait_ms": {"interactive": 0.0, "bulk": 0.0},
+            "max_wait_ms": {"interactive": 0.0, "bulk": 0.0},
+            "retries": 0,
+            "rate_limited": 0,
+            "server_errors": 0,
+        }
+
+    def _configure(self):
+        self._requests.configure(float(config_store.get_value("gemini_rpm", DEFAULT_RPM) or 0))
+        self._tokens.configure(float(config_store.get_value("gemini_tpm", DEFAULT_TPM) or 0))
+
+    async def acquire(self, tokens: int, priority: int = INTERACTIVE):
+        """Wait until one request and ``tokens`` tokens may be spent."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        entry = [priority, next(self._seq), tokens, future, time.monotonic()]
+        heapq.heappush(self._waiters, entry)
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if not future.done() or future.cancelled():
+                entry[3] = None  # leave a tombstone; _dispatch skips it
+            else:
+                # Admitted just as we were cancelled: give the capacity back
+                self._requests.level += 1
+                self._tokens.level += tokens
+            self._dispatch()
+            raise
+
+    def charge(self, tokens: int):
+        """Account for tokens used beyond the estimate (e.g. model output)."""
+        self._tokens.refill(time.monotonic())
+        self._tokens.take(tokens)
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._configure()
+        now = time.monotonic()
+        self._requests.refill(now)
+        self._tokens.refill(now)
+
+        while self._waiters:
+            priority, _, tokens, future, queued_at = self._waiters[0]
+            if future is None or future.done():
+                heapq.heappop(self._waiters)
+                continue
+            wait = max(self._requests.wait_time(1), self._tokens.wait_time(tokens))
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+            heapq.heappop(self._waiters)
+            self._requests.take(1)
+            self._tokens.take(tokens)
+            lane = _LANE_NAMES.get(priority, "bulk")
+            waited_ms = (now - queued_at) * 1000
+            self.stats["admitted"][lane] += 1
+            self.stats["total_wait_ms"][lane] += waited_ms
+            self.stats["max_wait_ms"][lane] = max(self.stats["max_wait_ms"][lane], waited_ms)
+            future.set_result(None)
+
+    def snapshot(self) -> dict:
+        depth = {"interactive": 0, "bulk": 0}
+        for priority, _, _, future, _ in self._waiters:
+            if future is not None and not future.done():
+                depth[_LANE_NAMES.get(priority, "bulk")] += 1
+        admitted = self.stats["admitted"]
+        total_wait = self.stats["total_wait_ms"]
+        return {
+            "requests_per_minute": self._requests.capacity,
+            "tokens_per_minute": self._tokens.capacity,
+            "queue_depth": depth,
+            "admitted": dict(admitted),
+            "avg_wait_ms": {
+                lane: round(total_wait[lane] / admitted[lane], 1) if admitted[lane] else 0.0
+                for lane in admitted
+            },
+            "max_wait_ms": {lane: round(v, 1) for lane, v in self.stats["max_wait_ms"].items()},
+            "retries": self.stats["retries"],
+            "rate_limited": self.stats["rate_limited"],
+            "server_errors": self.stats["server_errors"],
+        }
+
+
+rate_limiter = RateLimiter()
+
+
+def _retry_delay(resp: httpx.Response) -> float | None:
+    """Server-suggested delay from Retry-After or a Gemini RetryInfo detail."""
+    header = resp.headers.get("retry-after")
+    if header:
+        try:
+            return max(0.0, float(header))
+        except ValueError:
+            pass
+    try:
+        details = resp.json().get("error", {}).get("details", [])
+    except Exception:
+        return None
+    for detail in details if isinstance(details, list) else []:
+        match = re.fullmatch(r"(\d+(?:\.\d+)?)s", str(detail.get("retryDelay", "")))
+        if match:
+            return float(match.group(1))
+    return None
+
+
+def _charge_actual_usage(resp: httpx.Response, estimated: int):
+    """Correct the token bucket with the usage Gemini reports."""
+    try:
+        usage = resp.json().get("usageMetadata") or {}
+    except Exception:
+        return
+    actual = int(usage.get("promptTokenCount") or estimated) + int(usage.get("candidatesTokenCount") or 0)
+    if actual != estimated:
+        rate_limiter.charge(actual - estimated)
+
+
+async def send_with_retry(
+    client: httpx.AsyncClient,
+    request: httpx.Request,
+    *,
+    tokens: int,
+    priority: int = INTERACTIVE,
+    stream: bool = False,
+) -> httpx.Response:
+    """Send ``request`` through the limiter, retrying throttled and 5xx responses.
+
+    The last response is returned as-is once retries run out, so callers keep
+    their own status handling.
+    """
+    max_retries = int(config_store.get_value("gemini_max_retries", DEFAULT_MAX_RETRIES))
+    attempt = 0
+    while True:
+        await rate_limiter.acquire(tokens, priority)
+        try:
+            resp = await client.send(request, stream=stream)
+        except (httpx.ConnectError, httpx.RemoteProtocolError) as e:
+            if attempt >= max_retries:
+                raise
+            delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+            log.warning("GEMINI RETRY  attempt=%d  error=%s  sleep=%.1fs", attempt + 1, e, delay)
+        else:
+            if resp.status_code not in RETRY_STATUSES:
+                if resp.status_code == 200 and not stream:
+                    _charge_actual_usage(resp, tokens)
+                return resp
+            if resp.status_code == 429:
+                rate_limiter.stats["rate_limited"] += 1
+            else:
+                rate_limiter.stats["server_errors"] += 1
+            if stream:
+                await resp.aread()
+            if attempt >= max_retries:
+                return resp
+            backoff = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+            suggested = _retry_delay(resp)
+            if suggested is not None and suggested > BACKOFF_CAP:
+                log.warning("GEMINI GIVE UP  status=%d  retry_after=%.0fs", resp.status_code, suggested)
+                return resp
+            delay = suggested + random.uniform(0, 0.5) if suggested is not None else backoff
+            if stream:
+                await resp.aclose()
+            log.warning(
+                "GEMINI RETRY  attempt=%d  status=%d  sleep=%.1fs", attempt + 1, resp.status_code, delay,
+            )
+        rate_limiter.stats["retries"] += 1
+        attempt += 1
+        await asyncio.sleep(delay)
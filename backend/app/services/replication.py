@@ -0,0 +1,495 @@
+"""
+Continuous replication: ships the SQLite WAL to ``<backup_path>/replica``.
+
+With config ``"replication": {"enabled": true}`` a thread reads new committed
+frames from ``listabob.db-wal`` every ``interval_seconds`` and writes them,
+gzipped, as numbered *segments*. A *generation* is a snapshot of the whole
+database plus the segments that follow it; a new one starts at every server
+start and every ``snapshot_interval_hours``, and generations older than
+``retention_hours`` are deleted.
+
+Layout::
+
+    replica/generations/<generation>/meta.json
+    replica/generations/<generation>/snapshot.db.gz
+    replica/generations/<generation>/wal/<seq>_<epoch ms>.seg.gz
+
+A WAL frame is a full page image, so restoring is: unpack the snapshot,
+then write each committed page over it in order (``restore`` below, or
+``python -m app.services.replication restore``).
+
+No frame may be lost between two reads. SQLite only restarts the WAL (and
+overwrites old frames) when no reader still uses it, so the replicator
+always opens its next read transaction before releasing the previous one.
+Left alone that would let the WAL grow forever; every ``checkpoint_pages``
+frames the replicator ships the rest while holding the write lock, runs a
+passive checkpoint, and lets the WAL start over.
+"""
+import argparse
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.logger import get_logger
+from app.services.config_store import config_store
+
+log = get_logger("listabob.replication")
+
+WAL_MAGIC = (0x377F0682, 0x377F0683)
+WAL_HEADER_SIZE = 32
+FRAME_HEADER_SIZE = 24
+# Another worker process takes over replication if the lock isn't refreshed
+LOCK_NAME = ".replica.lock"
+STALE_LOCK_SECONDS = 30
+
+DEFAULT_REPLICATION = {
+    "enabled": False,
+    "interval_seconds": 1.0,
+    "snapshot_interval_hours": 24,
+    "retention_hours": 72,
+    "checkpoint_pages": 1000,
+}
+
+
+class ReplicationError(Exception):
+    pass
+
+
+def replication_config() -> dict:
+    return {**DEFAULT_REPLICATION, **(config_store.get_value("replication", None) or {})}
+
+
+def default_replica_dir() -> Path | None:
+    backup_path = config_store.get_value("backup_path", "")
+    return Path(backup_path) / "replica" if backup_path else None
+
+
+def wal_checksum(data: bytes, s0: int, s1: int, big_endian: bool) -> tuple[int, int]:
+    """SQLite's cumulative WAL checksum over ``data`` (a multiple of 8 bytes)."""
+    words = struct.unpack(f"{'>' if big_endian else '<'}{len(data) // 4}I", data)
+    for i in range(0, len(words), 2):
+        s0 = (s0 + words[i] + s1) & 0xFFFFFFFF
+        s1 = (s1 + words[i + 1] + s0) & 0xFFFFFFFF
+    return s0, s1
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _write_atomic(path: Path, data: bytes):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+class WalReader:
+    """Reads committed frames appended to a WAL file since the last call."""
+
+    def __init__(self, wal_path: Path):
+        self.wal_path = wal_path
+        self.salt: tuple[int, int] | None = None
+        self.frame = 0
+        self.checksum = (0, 0)
+        self.page_size = 0
+
+    def read(self) -> tuple[bytes, int]:
+        """Raw frames (header + page) of the complete transactions, and their count."""
+        try:
+            f = open(self.wal_path, "rb")
+        except FileNotFoundError:
+            return b"", 0
+        with f:
+            header = f.read(WAL_HEADER_SIZE)
+            if len(header) < WAL_HEADER_SIZE:
+                return b"", 0
+            magic, _, page_size, _, salt1, salt2, c1, c2 = struct.unpack(">8I", header)
+            if magic not in WAL_MAGIC:
+                return b"", 0
+            big_endian = bool(magic & 1)
+            if (salt1, salt2) != self.salt:
+                # The WAL was restarted: new salts, frames start over at 0
+                if wal_checksum(header[:24], 0, 0, big_endian) != (c1, c2):
+                    return b"", 0
+                self.salt, self.frame, self.checksum, self.page_size = (salt1, salt2), 0, (c1, c2), page_size
+
+            frame_size = FRAME_HEADER_SIZE + page_size
+            f.seek(WAL_HEADER_SIZE + self.frame * frame_size)
+            committed: list[bytes] = []
+            pending: list[bytes] = []
+            checksum, frame = self.checksum, self.frame
+            while True:
+                raw = f.read(frame_size)
+                if len(raw) < frame_size:
+                    break
+                _, commit_size, fs1, fs2, fc1, fc2 = struct.unpack(">6I", raw[:FRAME_HEADER_SIZE])
+                if (fs1, fs2) != self.salt:
+                    break  # left over from before the last restart
+                checksum = wal_checksum(raw[:8], *checksum, big_endian)
+                checksum = wal_checksum(raw[FRAME_HEADER_SIZE:], *checksum, big_endian)
+                if checksum != (fc1, fc2):
+                    break  # torn or stale frame
+                pending.append(raw)
+                frame += 1
+                if commit_size:
+                    committed.extend(pending)
+                    pending.clear()
+                    self.frame, self.checksum = frame, checksum
+            return b"".join(committed), len(committed)
+
+
+class Replicator:
+    def __init__(self, db_path: Path | None = None):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._reader_conn: sqlite3.Connection | None = None
+        self._wal: WalReader | None = None
+        self._dir_lock: Path | None = None
+        self.replica_dir: Path | None = None
+        self.generation: str | None = None
+        self.generation_started = 0.0
+        self.seq = 0
+        self.state: dict = {
+            "generation": None,
+            "segments": 0,
+            "frames": 0,
+            "bytes": 0,
+            "checkpoints": 0,
+            "last_shipped_at": None,
+            "last_error": None,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"enabled": self.running, "active": self.generation is not None, **self.state}
+
+    def _update(self, **fields):
+        with self._lock:
+            self.state.update(fields)
+
+    # --- Read locks ---
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+
+    def _hold_read(self):
+        """Open a new read transaction, then release the previous one."""
+        conn = self._connect()
+        conn.execute("BEGIN")
+        conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        previous, self._reader_conn = self._reader_conn, conn
+        if previous is not None:
+            previous.close()
+
+    def _release_read(self):
+        if self._reader_conn is not None:
+            self._reader_conn.close()
+            self._reader_conn = None
+
+    # --- Generations ---
+
+    def _generation_dir(self) -> Path:
+        return self.replica_dir / "generations" / self.generation
+
+    def _start_generation(self):
+        """Snapshot the database; segments from the current WAL position follow it."""
+        self.generation = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        self.seq = 0
+        gen_dir = self._generation_dir()
+        (gen_dir / "wal").mkdir(parents=True)
+
+        fd, tmp = tempfile.mkstemp(suffix=".db", dir=gen_dir)
+        os.close(fd)
+        try:
+            source = sqlite3.connect(self.db_path, timeout=30)
+            target = sqlite3.connect(tmp)
+            try:
+                source.backup(target)  # one step: a read snapshot, never blocks writers
+                target.execute("PRAGMA journal_mode=DELETE")
+                page_size = target.execute("PRAGMA page_size").fetchone()[0]
+            finally:
+                target.close()
+                source.close()
+            with open(tmp, "rb") as src, gzip.open(gen_dir / "snapshot.db.gz.tmp", "wb", compresslevel=6) as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            os.replace(gen_dir / "snapshot.db.gz.tmp", gen_dir / "snapshot.db.gz")
+        finally:
+            os.unlink(tmp)
+
+        self.generation_started = time.time()
+        meta = {"generation": self.generation, "snapshot_at_ms": _now_ms(), "page_size": page_size}
+        _write_atomic(gen_dir / "meta.json", json.dumps(meta).encode())
+        self._update(generation=self.generation)
+        log.info("REPLICA GENERATION  id=%s", self.generation)
+        self._prune_generations()
+
+    def _prune_generations(self):
+        retention_ms = float(replication_config()["retention_hours"]) * 3600 * 1000
+        generations = list_generations(self.replica_dir)
+        # A generation is needed until the one after it is older than the retention
+        for older, newer in zip(generations, generations[1:]):
+            if newer["snapshot_at_ms"] < _now_ms() - retention_ms and older["generation"] != self.generation:
+                shutil.rmtree(self.replica_dir / "generations" / older["generation"], ignore_errors=True)
+                log.info("REPLICA PRUNED  generation=%s", older["generation"])
+
+    # --- Shipping ---
+
+    def ship(self) -> int:
+        """Write committed frames since the last call as one segment; returns the frame count."""
+        data, frames = self._wal.read()
+        if not frames:
+            return 0
+        self.seq += 1
+        path = self._generation_dir() / "wal" / f"{self.seq:08d}_{_now_ms()}.seg.gz"
+        _write_atomic(path, gzip.compress(data, compresslevel=6))
+        with self._lock:
+            self.state["segments"] += 1
+            self.state["frames"] += frames
+            self.state["bytes"] += len(data)
+            self.state["last_shipped_at"] = datetime.now().isoformat()
+        return frames
+
+    def _checkpoint(self):
+        """Ship everything under the write lock, then let the WAL be reset."""
+        writer = self._connect()
+        try:
+            writer.execute("BEGIN IMMEDIATE")
+            try:
+                self.ship()
+                # Nothing new can be written; no read lock needed while checkpointing
+                self._release_read()
+                checkpointer = self._connect()
+                try:
+                    checkpointer.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+                finally:
+                    checkpointer.close()
+                self._hold_read()
+            finally:
+                writer.execute("COMMIT")
+        finally:
+            writer.close()
+        with self._lock:
+            self.state["checkpoints"] += 1
+
+    def tick(self):
+        config = replication_config()
+        self.ship()
+        if time.time() - self.generation_started >= float(config["snapshot_interval_hours"]) * 3600:
+            self._start_generation()
+        if self._wal.frame >= int(config["checkpoint_pages"]):
+            self._checkpoint()
+        else:
+            self._hold_read()
+        if self._dir_lock is not None:
+            os.utime(self._dir_lock)
+
+    # --- Thread ---
+
+    def _acquire_dir_lock(self) -> bool:
+        lock = self.replica_dir / LOCK_NAME
+        try:
+            if time.time() - lock.stat().st_mtime > STALE_LOCK_SECONDS:
+                lock.unlink(missing_ok=True)
+        except FileNotFoundError:
+            pass
+        try:
+            os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            return False
+        self._dir_lock = lock
+        return True
+
+    def _begin(self):
+        self._wal = WalReader(Path(f"{self.db_path}-wal"))
+        self._hold_read()
+        # Frames already in the WAL are part of the first snapshot
+        self._wal.read()
+        self._start_generation()
+
+    def _loop(self):
+        interval = float(replication_config()["interval_seconds"])
+        while True:
+            try:
+                if self.generation is not None:
+                    self.tick()
+                    self._update(last_error=None)
+                elif self._dir_lock is not None or self._acquire_dir_lock():
+                    self._begin()
+            except Exception as e:
+                log.exception("Replication failed")
+                self._update(last_error=str(e))
+                # Frames may have been missed: continue in a fresh generation
+                self._release_read()
+                self.generation = None
+                self._update(generation=None)
+            if self._stop.wait(interval if self.generation else STALE_LOCK_SECONDS / 2):
+                break
+        try:
+            if self.generation is not None:
+                self.ship()
+        finally:
+            self._release_read()
+            if self._dir_lock is not None:
+                self._dir_lock.unlink(missing_ok=True)
+                self._dir_lock = None
+            self.generation = None
+
+    def start(self, db_path: Path, replica_dir: Path):
+        if self._thread is None:
+            self.db_path, self.replica_dir = db_path, replica_dir
+            replica_dir.mkdir(parents=True, exist_ok=True)
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="listabob-replication", daemon=True)
+            self._thread.start()
+            log.info("REPLICATION started  replica=%s", replica_dir)
+
+    def stop(self):
+        """Ship the last frames and release the WAL."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+
+replicator = Replicator()
+
+
+def start_from_config():
+    """Start replication if config.json enables it (called from the lifespan)."""
+    replica_dir = default_replica_dir()
+    if replication_config()["enabled"] and replica_dir is not None:
+        from app.database import engine
+
+        replicator.start(Path(engine.url.database), replica_dir)
+
+
+# --- Restore ---
+
+def list_generations(replica_dir: Path) -> list[dict]:
+    """Generations with a complete snapshot, oldest first, with their time range."""
+    generations = []
+    root = replica_dir / "generations"
+    if not root.is_dir():
+        return generations
+    for gen_dir in sorted(root.iterdir()):
+        meta_path = gen_dir / "meta.json"
+        if not meta_path.exists():
+            continue
+        meta = json.loads(meta_path.read_text())
+        segments = _segments(gen_dir)
+        meta["segments"] = len(segments)
+        meta["last_segment_at_ms"] = segments[-1][1] if segments else meta["snapshot_at_ms"]
+        generations.append(meta)
+    return generations
+
+
+def _segments(gen_dir: Path) -> list[tuple[int, int, Path]]:
+    segments = []
+    for path in (gen_dir / "wal").glob("*.seg.gz"):
+        seq, stamp = path.name.split(".")[0].split("_")
+        segments.append((int(seq), int(stamp), path))
+    segments.sort()
+    return segments
+
+
+def _apply_frames(db_file, data: bytes, page_size: int):
+    frame_size = FRAME_HEADER_SIZE + page_size
+    pending: list[tuple[int, bytes]] = []
+    for offset in range(0, len(data), frame_size):
+        pgno, commit_size = struct.unpack(">2I", data[offset:offset + 8])
+        pending.append((pgno, data[offset + FRAME_HEADER_SIZE:offset + frame_size]))
+        if commit_size:
+            for page_number, page in pending:
+                db_file.seek((page_number - 1) * page_size)
+                db_file.write(page)
+            db_file.truncate(commit_size * page_size)
+            pending.clear()
+
+
+def restore(replica_dir: Path, output: Path, timestamp: datetime | None = None) -> dict:
+    """Rebuild the database at ``output`` as of ``timestamp`` (default: latest)."""
+    target_ms = int(timestamp.timestamp() * 1000) if timestamp else None
+    candidates = [
+        g for g in list_generations(replica_dir)
+        if target_ms is None or g["snapshot_at_ms"] <= target_ms
+    ]
+    if not candidates:
+        raise ReplicationError("No generation covers that time")
+    generation = candidates[-1]
+    gen_dir = replica_dir / "generations" / generation["generation"]
+
+    tmp = output.with_name(output.name + ".restoring")
+    with gzip.open(gen_dir / "snapshot.db.gz", "rb") as src, open(tmp, "wb") as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    applied = 0
+    restored_ms = generation["snapshot_at_ms"]
+    with open(tmp, "r+b") as db_file:
+        for _, stamp, path in _segments(gen_dir):
+            if target_ms is not None and stamp > target_ms:
+                break
+            _apply_frames(db_file, gzip.decompress(path.read_bytes()), generation["page_size"])
+            applied += 1
+            restored_ms = stamp
+
+    conn = sqlite3.connect(tmp)
+    try:
+        conn.execute("PRAGMA journal_mode=DELETE")
+        rows = conn.execute("PRAGMA integrity_check").fetchall()
+    finally:
+        conn.close()
+    if rows != [("ok",)]:
+        tmp.unlink()
+        raise ReplicationError("Restored database failed the integrity check")
+    os.replace(tmp, output)
+    return {
+        "generation": generation["generation"],
+        "segments": applied,
+        "restored_to": datetime.fromtimestamp(restored_ms / 1000).isoformat(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Listabob replica tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("list", "restore"):
+        p = sub.add_parser(name)
+        p.add_argument("--replica", type=Path, default=default_replica_dir(),
+                       help="replica directory (default: <backup_path>/replica)")
+    restore_parser = sub.choices["restore"]
+    restore_parser.add_argument("output", type=Path, help="database file to create; stop the server and move it over listabob.db")
+    restore_parser.add_argument("--timestamp", type=datetime.fromisoformat,
+                                help="local time, e.g. 2026-10-19T14:30:00 (default: latest)")
+    restore_parser.add_argument("--force", action="store_true", help="overwrite the output file")
+    args = parser.parse_args()
+    if args.replica is None:
+        parser.error("no --replica given and no backup_path in config.json")
+
+    if args.command == "list":
+        for g in list_generations(args.replica):
+            start = datetime.fromtimestamp(g["snapshot_at_ms"] / 1000)
+            end = datetime.fromtimestamp(g["last_segment_at_ms"] / 1000)
+            print(f"{g['generation']}  {start:%Y-%m-%d %H:%M:%S} .. {end:%Y-%m-%d %H:%M:%S}  segments={g['segments']}")
+        return
+    if args.output.exists() and not args.force:
+        parser.error(f"{args.output} exists (use --force to overwrite)")
+    result = restore(args.replica, args.output, args.timestamp)
+    print(f"Restored {args.output} to {result['restored_to']} "
+          f"(generation {result['generation']}, {result['segments']} segments)")
+
+
+if __name__ == "__main__":
+    main()
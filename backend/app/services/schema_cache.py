@@ -0,0 +1,155 @@
+"""
+In-memory cache of list schemas: a list's settings, columns and views.
+
+Almost every list endpoint needs the list's columns before it can touch an
+item. ``schema_cache.get(db, list_id)`` loads them once and then serves them
+from memory with no queries, together with the lookups handlers build over
+and over (column by id, column types, case-insensitive names).
+
+Entries are read-only snapshots. Each carries the list's ``schema_seq`` as
+its version: every write to a list's settings, columns or views calls
+``mark_schema_changed`` in its transaction and ``schema_cache.invalidate``
+after committing. A load that races with an invalidation is not stored.
+
+Invalidation only reaches the process that made the change. With several
+server workers an entry is therefore re-checked against ``lists.schema_seq``
+(one indexed lookup) when it is more than ``REVALIDATE_SECONDS`` old.
+"""
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from app.models import Column, List, View
+from app.services.config_store import config_store
+
+# How stale an entry may be before it is re-checked, with several workers
+REVALIDATE_SECONDS = 1.0
+
+
+class CachedColumn:
+    __slots__ = ("id", "list_id", "name", "column_type", "position", "is_required", "config", "created_at")
+
+    def __init__(self, column: Column):
+        self.id = column.id
+        self.list_id = column.list_id
+        self.name = column.name
+        self.column_type = column.column_type
+        self.position = column.position
+        self.is_required = column.is_required
+        self.config = dict(column.config) if column.config else column.config
+        self.created_at = column.created_at
+
+
+class CachedView:
+    __slots__ = ("id", "list_id", "name", "view_type", "config", "is_default", "position", "created_at")
+
+    def __init__(self, view: View):
+        self.id = view.id
+        self.list_id = view.list_id
+        self.name = view.name
+        self.view_type = view.view_type
+        self.config = dict(view.config) if view.config else view.config
+        self.is_default = view.is_default
+        self.position = view.position
+        self.created_at = view.created_at
+
+
+class ListSchema:
+    """A list with its columns and views; attribute-compatible with the models for responses."""
+
+    __slots__ = (
+        "id", "name", "description", "icon", "color", "is_favorite", "template_id",
+        "created_at", "updated_at", "version", "columns_version", "columns", "views",
+        "column_by_id", "column_types", "column_by_name", "column_names", "values_key", "checked_at",
+    )
+
+    def __init__(self, db_list: List, columns: list[Column], views: list[View]):
+        self.id = db_list.id
+        self.name = db_list.name
+        self.description = db_list.description
+        self.icon = db_list.icon
+        self.color = db_list.color
+        self.is_favorite = db_list.is_favorite
+        self.template_id = db_list.template_id
+        self.created_at: datetime = db_list.created_at
+        self.updated_at: datetime = db_list.updated_at
+        self.version: int = db_list.schema_seq
+        self.columns_version: int = db_list.columns_seq
+        self.columns = [CachedColumn(c) for c in columns]
+        self.views = [CachedView(v) for v in views]
+        self.column_by_id = {c.id: c for c in self.columns}
+        self.column_types = {c.id: c.column_type for c in self.columns}
+        # Case-insensitive name lookup, as used by the external API
+        self.column_by_name = {c.name.lower(): c for c in self.columns}
+        self.column_names = {c.id: c.name for c in self.columns}
+        # Changes only when decoded item values can: a column added, removed or retyped
+        self.values_key = hash(frozenset(self.column_types.items()))
+        self.checked_at = time.monotonic()
+
+
+def _load(db: Session, list_id: str) -> ListSchema | None:
+    db_list = db.query(List).filter(List.id == list_id).first()
+    if db_list is None:
+        return None
+    columns = db.query(Column).filter(Column.list_id == list_id).order_by(Column.position).all()
+    views = db.query(View).filter(View.list_id == list_id).order_by(View.position).all()
+    return ListSchema(db_list, columns, views)
+
+
+class SchemaCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: dict[str, ListSchema] = {}
+        # Bumped by invalidate(); a load that started before a bump is discarded
+        self._generations: dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, db: Session, list_id: str) -> ListSchema | None:
+        """The list's schema, or None if the list doesn't exist."""
+        with self._lock:
+            entry = self._entries.get(list_id)
+            generation = self._generations.get(list_id, 0)
+        if entry is not None and not self._is_stale(db, entry):
+            with self._lock:
+                self.hits += 1
+            return entry
+
+        entry = _load(db, list_id)
+        with self._lock:
+            self.misses += 1
+            if entry is not None and self._generations.get(list_id, 0) == generation:
+                self._entries[list_id] = entry
+        return entry
+
+    def _is_stale(self, db: Session, entry: ListSchema) -> bool:
+        now = time.monotonic()
+        if now - entry.checked_at < REVALIDATE_SECONDS or config_store.workers() == 1:
+            return False
+        version = db.query(List.schema_seq).filter(List.id == entry.id).scalar()
+        if version != entry.version:
+            return True
+        entry.checked_at = now
+        return False
+
+    def invalidate(self, list_id: str):
+        """Drop a list's entry; call after committing a change to its settings, columns or views."""
+        with self._lock:
+            self._entries.pop(list_id, None)
+            self._generations[list_id] = self._generations.get(list_id, 0) + 1
+            self.invalidations += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "lists": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+
+schema_cache = SchemaCache()
@@ -0,0 +1,214 @@
+"""
+In-memory manifest of the built frontend (``frontend/dist``).
+
+The directory is walked once at startup; every request is then a dict lookup,
+with no filesystem stat. Per file the manifest keeps the bytes, content type
+and a content-hash ETag, plus compressed variants:
+
+- ``.br`` / ``.gz`` files written next to the originals at build time
+  (``python -m app.services.static_files ../frontend/dist``) are used as-is
+- otherwise gzip (and brotli, if the module is installed) is produced on the
+  first request that accepts it and kept in memory
+
+Vite's content-hashed files under ``assets/`` are served as immutable with a
+one-year max-age. Everything else (``index.html``, ``sw.js``, the PWA
+manifest, icons) gets ``no-cache`` so the browser revalidates with
+``If-None-Match`` and usually gets an empty 304.
+"""
+import gzip
+import hashlib
+import mimetypes
+import re
+import sys
+from pathlib import Path
+
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import FileResponse, Response
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+# Vite output names look like index-BkR2xQ4a.js
+HASHED_NAME = re.compile(r"[-.][A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# Bigger files are served from disk instead of being held in memory
+MAX_MEMORY_BYTES = 4 * 1024 * 1024
+# Smaller bodies aren't worth a Content-Encoding
+MIN_COMPRESS_BYTES = 1024
+
+# Don't trust the platform registry (Windows often maps .js to text/plain)
+MEDIA_TYPES = {
+    ".js": "text/javascript; charset=utf-8",
+    ".mjs": "text/javascript; charset=utf-8",
+    ".css": "text/css; charset=utf-8",
+    ".html": "text/html; charset=utf-8",
+    ".json": "application/json",
+    ".webmanifest": "application/manifest+json",
+    ".svg": "image/svg+xml",
+    ".map": "application/json",
+    ".wasm": "application/wasm",
+}
+COMPRESSIBLE_SUFFIXES = {".js", ".mjs", ".css", ".html", ".json", ".webmanifest", ".svg", ".map", ".txt", ".xml"}
+
+# Preference order when the client accepts several
+ENCODINGS = ("br", "gzip")
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def accepted_encodings(header: str) -> set[str]:
+    """Codings from an Accept-Encoding header, minus those with q=0."""
+    accepted = set()
+    for part in header.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding.strip())
+    return accepted
+
+
+class StaticEntry:
+    __slots__ = ("path", "media_type", "etag", "cache_control", "data", "variants", "compressible")
+
+    def __init__(self, path: Path, rel: str):
+        self.path = path
+        suffix = path.suffix.lower()
+        self.media_type = MEDIA_TYPES.get(suffix) or mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        immutable = rel.startswith("assets/") and HASHED_NAME.search(path.name)
+        self.cache_control = IMMUTABLE if immutable else REVALIDATE
+        self.variants: dict[str, bytes] = {}
+
+        size = path.stat().st_size
+        if size > MAX_MEMORY_BYTES:
+            self.data = None
+            self.compressible = False
+            self.etag = f'"{size:x}-{path.stat().st_mtime_ns:x}"'
+            return
+
+        self.data = path.read_bytes()
+        self.etag = '"' + hashlib.sha1(self.data).hexdigest()[:20] + '"'
+        self.compressible = suffix in COMPRESSIBLE_SUFFIXES and size >= MIN_COMPRESS_BYTES
+        if self.compressible:
+            for encoding, ext in ENCODING_SUFFIXES.items():
+                precompressed = path.with_name(path.name + ext)
+                if precompressed.is_file():
+                    self.variants[encoding] = precompressed.read_bytes()
+
+    def pick_encoding(self, accept_encoding: str) -> str | None:
+        if not self.compressible:
+            return None
+        accepted = accepted_encodings(accept_encoding)
+        for encoding in ENCODINGS:
+            if encoding in accepted and (encoding in self.variants or encoding == "gzip" or brotli):
+                return encoding
+        return None
+
+    def variant(self, encoding: str) -> bytes:
+        body = self.variants.get(encoding)
+        if body is None:
+            # Two threads may race here; both produce the same bytes
+            body = self.variants[encoding] = _compress(self.data, encoding)
+        return body
+
+    def variant_etag(self, encoding: str | None) -> str:
+        return self.etag if encoding is None else f'{self.etag[:-1]}-{encoding}"'
+
+
+class StaticManifest:
+    """Files under ``root`` keyed by their URL path (no leading slash)."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.entries: dict[str, StaticEntry] = {}
+        for path in sorted(root.rglob("*")):
+            if not path.is_file() or path.suffix in (".br", ".gz"):
+                continue
+            rel = path.relative_to(root).as_posix()
+            self.entries[rel] = StaticEntry(path, rel)
+        self.index = self.entries.get("index.html")
+
+    def total_bytes(self) -> int:
+        return sum(len(e.data) for e in self.entries.values() if e.data is not None)
+
+    def lookup(self, path: str) -> StaticEntry | None:
+        """The file for ``path``; unknown non-asset paths fall back to index.html (SPA routing)."""
+        entry = self.entries.get(path.lstrip("/"))
+        if entry is not None:
+            return entry
+        if path.lstrip("/").startswith("assets/"):
+            return None
+        return self.index
+
+    async def response(self, path: str, headers) -> Response:
+        entry = self.lookup(path)
+        if entry is None:
+            return Response("Not Found", status_code=404, media_type="text/plain")
+        if entry.data is None:
+            return FileResponse(entry.path, media_type=entry.media_type, headers={"Cache-Control": entry.cache_control})
+
+        encoding = entry.pick_encoding(headers.get("accept-encoding", ""))
+        etag = entry.variant_etag(encoding)
+        response_headers = {"ETag": etag, "Cache-Control": entry.cache_control}
+        if entry.compressible:
+            response_headers["Vary"] = "Accept-Encoding"
+
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, entry, etag):
+            return Response(status_code=304, headers=response_headers)
+
+        if encoding is None:
+            body = entry.data
+        else:
+            body = entry.variants.get(encoding)
+            if body is None:
+                body = await run_in_threadpool(entry.variant, encoding)
+            response_headers["Content-Encoding"] = encoding
+        return Response(body, media_type=entry.media_type, headers=response_headers)
+
+
+def _etag_matches(if_none_match: str, entry: StaticEntry, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Any representation of the same content counts (and weak W/ prefixes are ignored)
+    tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    return etag in tags or entry.etag in tags or any(t.startswith(entry.etag[:-1] + "-") for t in tags)
+
+
+def precompress(root: Path) -> int:
+    """Write .gz (and .br, if brotli is installed) next to each compressible file."""
+    written = 0
+    for path in sorted(root.rglob("*")):
+        if not path.is_file() or path.suffix.lower() not in COMPRESSIBLE_SUFFIXES:
+            continue
+        data = path.read_bytes()
+        if len(data) < MIN_COMPRESS_BYTES:
+            continue
+        for encoding, ext in ENCODING_SUFFIXES.items():
+            if encoding == "br" and brotli is None:
+                continue
+            body = _compress(data, encoding)
+            if len(body) < len(data):
+                path.with_name(path.name + ext).write_bytes(body)
+                written += 1
+    return written
+
+
+if __name__ == "__main__":
+    target = Path(sys.argv[1] if len(sys.argv) > 1 else "../frontend/dist")
+    count = precompress(target)
+    print(f"Wrote {count} precompressed files under {target}" + ("" if brotli else " (gzip only; install brotli for .br)"))
@@ -0,0 +1,214 @@
+"""
+Optional single-writer queue with group commit for item writes.
+
+With config ``"write_coordinator": true`` a dedicated thread owns all item
+writes (grid edits, AI fill batches, v1 API writes). Request handlers hand it
+a *write unit* -- a function taking a Session -- and wait on a future. The
+thread takes whatever units are pending, runs each inside its own savepoint
+and commits them together in one transaction: one lock acquisition and one
+fsync for the whole batch, and no ``database is locked`` errors between
+writers of this process. A unit that raises only rolls back its savepoint;
+its caller gets the exception, the rest of the batch still commits.
+
+Units must not leak ORM objects out of the writer's session: flush, build
+the response (e.g. ``item_to_response``) inside the unit and return that.
+
+Without the option, ``get_writer`` hands out a ``DirectWriter`` that runs the
+unit on a request-scoped session and commits it straight away.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.logger import get_logger
+from app.services.config_store import config_store
+
+log = get_logger("listabob.db")
+
+DEFAULT_MAX_BATCH = 64
+
+WriteUnit = Callable[..., Any]
+
+
+def _begin_immediate(db: Session):
+    # Take SQLite's write lock before reading, see database.get_db
+    db.connection().exec_driver_sql("BEGIN IMMEDIATE")
+
+
+class DirectWriter:
+    """Runs a write unit on its own session and commits it immediately."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def run(self, unit: WriteUnit, *args) -> Any:
+        _begin_immediate(self.db)
+        try:
+            result = unit(self.db, *args)
+            self.db.commit()
+        except BaseException:
+            self.db.rollback()
+            raise
+        return result
+
+
+class WriteCoordinator:
+    def __init__(self, session_factory=SessionLocal, max_batch: int = DEFAULT_MAX_BATCH):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self.units = 0
+        self.failed_units = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.max_batch_seen = 0
+        self.commit_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="listabob-writer", daemon=True)
+            self._thread.start()
+            log.info("WRITE COORDINATOR started  max_batch=%d", self.max_batch)
+
+    def stop(self):
+        """Finish the pending units, then stop the thread."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, unit: WriteUnit, *args) -> Future:
+        future: Future = Future()
+        self._queue.put((unit, args, future))
+        return future
+
+    def run(self, unit: WriteUnit, *args) -> Any:
+        """Queue a unit and block until its batch has committed."""
+        return self.submit(unit, *args).result()
+
+    def _loop(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch = [first]
+            # Group commit: everything that queued up during the previous commit
+            while len(batch) < self.max_batch:
+                try:
+                    entry = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is None:
+                    stopping = True
+                    break
+                batch.append(entry)
+            self._commit(batch)
+
+    def _commit(self, batch: list):
+        started = time.perf_counter()
+        outcomes = []
+        db = self.session_factory()
+        try:
+            _begin_immediate(db)
+            for unit, args, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                savepoint = db.begin_nested()
+                try:
+                    result = unit(db, *args)
+                    savepoint.commit()
+                    outcomes.append((future, result, None))
+                except BaseException as e:
+                    savepoint.rollback()
+                    outcomes.append((future, None, e))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            log.exception("WRITE BATCH FAILED  units=%d", len(batch))
+            with self._lock:
+                self.failed_batches += 1
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            db.close()
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.batches += 1
+            self.units += len(outcomes)
+            self.failed_units += sum(1 for _, _, error in outcomes if error is not None)
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
+            self.commit_seconds += elapsed
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.running,
+                "pending": self._queue.qsize(),
+                "units": self.units,
+                "failed_units": self.failed_units,
+                "batches": self.batches,
+                "failed_batches": self.failed_batches,
+                "avg_batch": round(self.units / self.batches, 2) if self.batches else 0.0,
+                "max_batch": self.max_batch_seen,
+                "avg_batch_ms": round(self.commit_seconds / self.batches * 1000, 2) if self.batches else 0.0,
+            }
+
+
+write_coordinator = WriteCoordinator()
+
+Writer = DirectWriter | WriteCoordinator
+
+
+def start_from_config():
+    """Start the coordinator if config.json enables it (called from the lifespan)."""
+    if config_store.get_value("write_coordinator", False):
+        write_coordinator.max_batch = int(config_store.get_value("write_max_batch", DEFAULT_MAX_BATCH))
+        write_coordinator.start()
+
+
+def run_write(unit: WriteUnit, *args) -> Any:
+    """Run a write unit outside a request (e.g. from a background job)."""
+    if write_coordinator.running:
+        return write_coordinator.run(unit, *args)
+    db = SessionLocal()
+    try:
+        return DirectWriter(db).run(unit, *args)
+    finally:
+        db.close()
+
+
+def get_writer():
+    """FastAPI dependency: the write coordinator, or a direct writer.
+
+    Handlers using it must not also take ``get_db`` for writing: with the
+    coordinator on, a request session holding the write lock would block
+    the writer thread it is waiting for.
+    """
+    if write_coordinator.running:
+        yield write_coordinator
+        return
+    db = SessionLocal()
+    try:
+        yield DirectWriter(db)
+    finally:
+        db.close()
@@ -0,0 +1,77 @@
+"""
+Startup timing and the optional import profiler.
+
+Import this module before anything heavy: its import time is the reference
+point for the phase breakdown logged once the server is ready.
+
+Set ``LISTABOB_PROFILE_IMPORTS=1`` to time every module imported during
+startup (works in the frozen exe too, unlike ``python -X importtime``);
+the slowest ones are printed once the app module has loaded.
+"""
+import builtins
+import os
+import sys
+import time
+
+_started = time.perf_counter()
+_last = _started
+phases: dict[str, float] = {}
+
+
+def mark(phase: str):
+    """Record the time since the previous mark as ``phase`` (in ms)."""
+    global _last
+    now = time.perf_counter()
+    phases[phase] = round((now - _last) * 1000, 1)
+    _last = now
+
+
+def summary() -> dict[str, float]:
+    return {**phases, "total": round((_last - _started) * 1000, 1)}
+
+
+# -- import profiler ------------------------------------------------------
+
+_import_times: dict[str, tuple[float, float]] = {}  # module -> (inclusive, self) seconds
+_stack: list[float] = []
+_original_import = builtins.__import__
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level == 0 and name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+    _stack.append(0.0)
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.perf_counter() - start
+        children = _stack.pop()
+        if _stack:
+            _stack[-1] += elapsed
+        key = name if level == 0 else f"{'.' * level}{name}"
+        if key not in _import_times:
+            _import_times[key] = (elapsed, elapsed - children)
+
+
+def profiling_imports() -> bool:
+    return builtins.__import__ is _timed_import
+
+
+def start_import_profile():
+    builtins.__import__ = _timed_import
+
+
+def report_import_profile(limit: int = 25):
+    """Print the slowest imports and stop profiling."""
+    if not profiling_imports():
+        return
+    builtins.__import__ = _original_import
+    rows = sorted(_import_times.items(), key=lambda kv: kv[1][1], reverse=True)[:limit]
+    print(f"{'self ms':>9} {'total ms':>9}  module")
+    for module, (inclusive, own) in rows:
+        print(f"{own * 1000:9.1f} {inclusive * 1000:9.1f}  {module}")
+
+
+if os.environ.get("LISTABOB_PROFILE_IMPORTS") and not profiling_imports():
+    start_import_profile()
@@ -0,0 +1 @@
+"""Offline benchmarks for the Listabob backend. Run from ``backend/`` with ``python -m benchmarks.<name>``."""
@@ -0,0 +1,188 @@
+"""
+Latency and throughput of the chat router against the fake Gemini server.
+
+    python -m benchmarks.chat_endpoints --requests 200 --concurrency 1 8 32 \
+        --batch-sizes 1 10 50 --latency 0.05 --jitter 0.05 --error-rate 0.02
+
+Drives ``/api/chat``, ``/complete``, ``/complete-item`` and
+``/complete-batch`` in-process (ASGI transport, so no server port is needed
+for the app itself) and prints p50/p95/p99 latency and requests per second
+for every endpoint and concurrency level. A throwaway data directory and
+config are used, the rate limiter is disabled unless ``--rpm`` is given, and
+completion requests bypass the cache unless ``--cache`` is passed.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+_DATA_DIR = tempfile.mkdtemp(prefix="listabob-bench-")
+os.environ.setdefault("LISTABOB_DATA_DIR", _DATA_DIR)
+
+import httpx  # noqa: E402
+
+from app.services.config_store import config_store  # noqa: E402
+from benchmarks.fake_gemini import FakeGeminiServer  # noqa: E402
+
+ITEM_CONTEXT = {
+    "Title": "The Left Hand of Darkness",
+    "Author": "Ursula K. Le Guin",
+    "Year": 1969,
+    "Notes": "Envoy Genly Ai visits the planet Gethen.",
+}
+
+
+def _chat_body(i: int, cache: bool) -> dict:
+    return {
+        "list_name": "Books",
+        "item_context": ITEM_CONTEXT,
+        "messages": [{"role": "user", "content": f"Summarise this book ({i})"}],
+    }
+
+
+def _complete_body(i: int, cache: bool) -> dict:
+    return {
+        "list_name": "Books",
+        "item_context": {**ITEM_CONTEXT, "Id": i},
+        "target_column": "Genre",
+        "column_type": "choice",
+        "column_config": {"choices": ["Fantasy", "Science fiction", "Mystery"]},
+        "refresh": not cache,
+    }
+
+
+def _complete_item_body(i: int, cache: bool) -> dict:
+    return {
+        "list_name": "Books",
+        "item_context": {**ITEM_CONTEXT, "Id": i},
+        "target_columns": [
+            {"name": "Genre", "column_type": "text"},
+            {"name": "Tags", "column_type": "multiple_choice", "config": {"choices": ["classic", "award"]}},
+        ],
+        "refresh": not cache,
+    }
+
+
+def _batch_body(batch_size: int):
+    def body(i: int, cache: bool) -> dict:
+        return {
+            "list_name": "Books",
+            "items": [{"item_context": {**ITEM_CONTEXT, "Id": f"{i}-{j}"}} for j in range(batch_size)],
+            "target_column": "Genre",
+            "column_type": "text",
+            "refresh": not cache,
+        }
+    return body
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def _run_scenario(client, path: str, make_body, requests: int, concurrency: int, cache: bool) -> dict:
+    timings: list[float] = []
+    errors: dict[int, int] = {}
+    counter = iter(range(requests))
+
+    async def worker():
+        for i in counter:
+            start = time.perf_counter()
+            resp = await client.post(path, json=make_body(i, cache))
+            timings.append(time.perf_counter() - start)
+            if resp.status_code != 200:
+                errors[resp.status_code] = errors.get(resp.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    ms = [t * 1000 for t in timings]
+    return {
+        "requests": len(timings),
+        "errors": errors,
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p95_ms": round(percentile(ms, 95), 2),
+        "p99_ms": round(percentile(ms, 99), 2),
+        "throughput_rps": round(len(timings) / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+async def run(args) -> list[dict]:
+    from app.main import app
+
+    scenarios = [
+        ("/api/chat", "chat", _chat_body),
+        ("/api/chat/complete", "complete", _complete_body),
+        ("/api/chat/complete-item", "complete-item", _complete_item_body),
+    ]
+    scenarios += [
+        ("/api/chat/complete-batch", f"complete-batch[{n}]", _batch_body(n)) for n in args.batch_sizes
+    ]
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300.0) as client:
+        for path, label, make_body in scenarios:
+            for concurrency in args.concurrency:
+                stats = await _run_scenario(client, path, make_body, args.requests, concurrency, args.cache)
+                stats.update(endpoint=label, concurrency=concurrency)
+                results.append(stats)
+                errors = ", ".join(f"{code}x{count}" for code, count in sorted(stats["errors"].items())) or "-"
+                print(
+                    f"{label:<20} c={concurrency:<3} n={stats['requests']:<5} "
+                    f"p50={stats['p50_ms']:8.2f}ms  p95={stats['p95_ms']:8.2f}ms  "
+                    f"p99={stats['p99_ms']:8.2f}ms  {stats['throughput_rps']:8.1f} req/s  errors={errors}"
+                )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=100, help="requests per endpoint and concurrency")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--latency", type=float, default=0.05, help="fake server delay per call (s)")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--rpm", type=int, default=0, help="gemini_rpm for the run (0 = unlimited)")
+    parser.add_argument("--max-retries", type=int, default=2)
+    parser.add_argument("--cache", action="store_true", help="allow completion cache hits")
+    parser.add_argument("--output", type=Path, help="also write results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="keep app logging (slows the run)")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        # Per-request log lines to stdout would dominate the timings
+        logging.disable(logging.ERROR)
+
+    with FakeGeminiServer(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        error_status=args.error_status, malformed_rate=args.malformed_rate, seed=args.seed,
+    ) as server:
+        config_store.path = Path(_DATA_DIR) / "config.json"
+        config_store.save({
+            "gemini_api_key": "bench",
+            "gemini_model": "gemini-2.0-flash",
+            "gemini_base_url": server.base_url,
+            "gemini_rpm": args.rpm,
+            "gemini_tpm": 0,
+            "gemini_max_retries": args.max_retries,
+        })
+        results = asyncio.run(run(args))
+        print(f"fake server calls: {server.app.state.calls}")
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
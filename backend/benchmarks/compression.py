@@ -0,0 +1,114 @@
+"""
+Response compression benchmark: bytes on the wire and latency per encoding.
+
+    python -m benchmarks.compression --items 10000 --iterations 10
+
+Builds one synthetic list (see ``benchmarks.dataset``) in a throwaway data
+directory and fetches the item listings and the CSV export with each
+``Accept-Encoding`` the server supports. For every encoding it reports the
+compressed size, the p50 server time (request to last byte, in-process), and
+the estimated transfer time over a few typical links, which is what users
+on VPN and mobile connections actually wait for.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.endpoints import percentile
+
+# Link speeds in megabits per second
+LINKS = {"3g": 1.5, "vpn": 10.0, "lan": 100.0}
+
+
+def _fetch(client, url: str, headers: dict) -> tuple[bytes, str | None]:
+    with client.stream("GET", url, headers=headers) as resp:
+        resp.raise_for_status()
+        raw = b"".join(resp.iter_raw())
+        return raw, resp.headers.get("content-encoding")
+
+
+def run(args):
+    data_dir = Path(args.data_dir or tempfile.mkdtemp(prefix="listabob-bench-"))
+    os.environ["LISTABOB_DATA_DIR"] = str(data_dir)
+
+    import logging
+    from fastapi.testclient import TestClient
+
+    from app.services.config_store import DEFAULT_CONFIG, config_store
+
+    config_store.path = data_dir / "config.json"
+    config_store.save(dict(DEFAULT_CONFIG))
+
+    from app.database import Base, SessionLocal, engine
+    from app.main import app
+    from app.migrations import ensure_schema
+    from app.services.compression import ENCODINGS
+    from benchmarks.dataset import generate
+
+    if not args.verbose:
+        logging.disable(logging.INFO)
+
+    ensure_schema(engine, Base.metadata)
+    db = SessionLocal()
+    try:
+        list_id = generate(db, lists=1, items_per_list=args.items, sparsity=args.sparsity, deleted_ratio=0)[0]
+    finally:
+        db.close()
+
+    results = {}
+    with TestClient(app) as client:
+        token = client.post("/api/auth/login", json={"password": DEFAULT_CONFIG["password"]}).json()["token"]
+        auth = {"Authorization": f"Bearer {token}"}
+        endpoints = {
+            "items_list": (f"/api/lists/{list_id}/items", {}),
+            "v1_items": (f"/api/v1/lists/{list_id}/items", auth),
+            "csv_export": (f"/api/export/csv/{list_id}", {}),
+        }
+        for name, (url, headers) in endpoints.items():
+            results[name] = {}
+            for encoding in ("identity",) + ENCODINGS:
+                request_headers = {**headers, "Accept-Encoding": encoding}
+                _fetch(client, url, request_headers)  # warm-up
+                timings = []
+                for _ in range(args.iterations):
+                    start = time.perf_counter()
+                    raw, used = _fetch(client, url, request_headers)
+                    timings.append((time.perf_counter() - start) * 1000)
+                expected = None if encoding == "identity" else encoding
+                if used != expected:
+                    print(f"  warning: {name} asked for {encoding}, got {used or 'identity'}")
+                p50 = percentile(timings, 50)
+                transfer = {link: round(len(raw) * 8 / (mbps * 1_000_000) * 1000, 1) for link, mbps in LINKS.items()}
+                results[name][encoding] = {"bytes": len(raw), "p50_ms": round(p50, 2), "transfer_ms": transfer}
+
+    for name, by_encoding in results.items():
+        identity = by_encoding["identity"]["bytes"]
+        print(f"\n{name} ({args.items} items)")
+        print(f"  {'encoding':<9} {'bytes':>11} {'ratio':>6} {'p50 ms':>8}   " + "  ".join(f"{link + ' ms':>9}" for link in LINKS))
+        for encoding, r in by_encoding.items():
+            print(
+                f"  {encoding:<9} {r['bytes']:11,d} {identity / r['bytes']:5.1f}x {r['p50_ms']:8.1f}   "
+                + "  ".join(f"{r['p50_ms'] + r['transfer_ms'][link]:9.0f}" for link in LINKS)
+            )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({"items": args.items, "results": results}, indent=2))
+        print(f"Wrote {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--sparsity", type=float, default=0.2)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--data-dir", help="keep the database here instead of a temp dir")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="keep app logging")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Synthetic dataset generator for benchmarks.
+
+    python -m benchmarks.dataset --lists 5 --items 2000 --sparsity 0.3 --deleted 0.05
+
+Writes straight into the database configured for the app (set
+``LISTABOB_DATA_DIR`` to keep it away from real data). Every list gets the
+same column mix: ``--columns-per-type`` columns of each ``ColumnType`` (or
+only the types given with ``--types``). Values are stored exactly as the
+items API would store them, so reads exercise the normal code paths.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.api.items import get_value_for_column
+from app.models import List, Column, Item, ItemValue, View, generate_uuid
+from app.schemas import ColumnType
+
+WORDS = (
+    "alpha bravo charlie delta echo foxtrot golf hotel india juliet kilo lima "
+    "mike november oscar papa quebec romeo sierra tango uniform victor whiskey"
+).split()
+CHOICES = ["Backlog", "Planned", "In progress", "Blocked", "Done"]
+TAGS = ["red", "green", "blue", "urgent", "later", "home", "work", "idea"]
+PEOPLE = ["Ada Lovelace", "Grace Hopper", "Alan Turing", "Edsger Dijkstra", "Barbara Liskov"]
+PLACES = ["Lisbon", "Osaka", "Nairobi", "Toronto", "Melbourne", "Reykjavik"]
+BASE_DATE = datetime(2024, 1, 1)
+
+
+def _column_config(column_type: ColumnType) -> dict | None:
+    if column_type == ColumnType.CHOICE:
+        return {"choices": CHOICES}
+    if column_type == ColumnType.MULTIPLE_CHOICE:
+        return {"choices": TAGS}
+    if column_type == ColumnType.RATING:
+        return {"max": 5}
+    return None
+
+
+def _fake_value(column_type: ColumnType, rng: random.Random, n: int):
+    if column_type == ColumnType.TEXT:
+        return f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {n}"
+    if column_type == ColumnType.LONGTEXT:
+        return " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 80)))
+    if column_type == ColumnType.NUMBER:
+        return rng.randint(0, 10_000)
+    if column_type == ColumnType.CURRENCY:
+        return round(rng.uniform(1, 5_000), 2)
+    if column_type == ColumnType.DATE:
+        return (BASE_DATE + timedelta(days=rng.randint(0, 730))).date().isoformat()
+    if column_type == ColumnType.DATETIME:
+        return (BASE_DATE + timedelta(minutes=rng.randint(0, 730 * 24 * 60))).isoformat()
+    if column_type == ColumnType.CHOICE:
+        return rng.choice(CHOICES)
+    if column_type == ColumnType.MULTIPLE_CHOICE:
+        return rng.sample(TAGS, rng.randint(1, 3))
+    if column_type == ColumnType.BOOLEAN:
+        return rng.random() < 0.5
+    if column_type == ColumnType.HYPERLINK:
+        return f"https://example.com/{rng.choice(WORDS)}/{n}"
+    if column_type == ColumnType.IMAGE:
+        return {"url": f"https://example.com/img/{n}.png", "name": f"{n}.png"}
+    if column_type == ColumnType.ATTACHMENT:
+        return {"url": f"/uploads/{n}.pdf", "name": f"file-{n}.pdf", "size": rng.randint(1_000, 900_000)}
+    if column_type == ColumnType.RATING:
+        return rng.randint(1, 5)
+    if column_type == ColumnType.PERSON:
+        return rng.choice(PEOPLE)
+    if column_type == ColumnType.LOCATION:
+        return rng.choice(PLACES)
+    return f"value {n}"
+
+
+def generate(
+    db: Session,
+    lists: int = 3,
+    items_per_list: int = 1000,
+    column_types: list[ColumnType] | None = None,
+    columns_per_type: int = 1,
+    sparsity: float = 0.2,
+    deleted_ratio: float = 0.05,
+    seed: int = 1,
+) -> list[str]:
+    """Create ``lists`` lists of synthetic data and return their ids.
+
+    ``sparsity`` is the fraction of cells left empty and ``deleted_ratio``
+    the fraction of items that are soft-deleted (in the recycle bin).
+    """
+    rng = random.Random(seed)
+    column_types = column_types or list(ColumnType)
+    now = datetime.utcnow()
+    list_ids = []
+
+    for list_no in range(lists):
+        list_id = generate_uuid()
+        list_ids.append(list_id)
+        db.execute(insert(List), [{
+            "id": list_id,
+            "name": f"Benchmark list {list_no + 1}",
+            "description": f"{items_per_list} synthetic items",
+            "icon": "📊",
+            "is_favorite": False,
+            "created_at": now,
+            "updated_at": now,
+        }])
+
+        columns = []
+        for column_type in column_types:
+            for copy in range(columns_per_type):
+                suffix = f" {copy + 1}" if columns_per_type > 1 else ""
+                columns.append({
+                    "id": generate_uuid(),
+                    "list_id": list_id,
+                    "name": f"{column_type.value.replace('_', ' ').title()}{suffix}",
+                    "column_type": column_type.value,
+                    "position": len(columns),
+                    "is_required": False,
+                    "config": _column_config(column_type),
+                    "created_at": now,
+                })
+        db.execute(insert(Column), columns)
+        db.execute(insert(View), [{
+            "id": generate_uuid(),
+            "list_id": list_id,
+            "name": "All Items",
+            "view_type": "grid",
+            "is_default": True,
+            "position": 0,
+            "created_at": now,
+        }])
+
+        items, values = [], []
+        for position in range(items_per_list):
+            item_id = generate_uuid()
+            created = now - timedelta(minutes=items_per_list - position)
+            deleted = rng.random() < deleted_ratio
+            items.append({
+                "id": item_id,
+                "list_id": list_id,
+                "position": position,
+                "created_at": created,
+                "updated_at": created,
+                "deleted_at": now if deleted else None,
+            })
+            for column in columns:
+                if rng.random() < sparsity:
+                    continue
+                column_type = ColumnType(column["column_type"])
+                stored = get_value_for_column(_fake_value(column_type, rng, position), column_type.value)
+                values.append({"id": generate_uuid(), "item_id": item_id, "column_id": column["id"], **stored})
+
+        db.execute(insert(Item), items)
+        for start in range(0, len(values), 5000):
+            db.execute(insert(ItemValue), values[start:start + 5000])
+        db.commit()
+
+    return list_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--lists", type=int, default=3)
+    parser.add_argument("--items", type=int, default=1000, help="items per list")
+    parser.add_argument("--types", nargs="+", choices=[t.value for t in ColumnType], help="column types (default: all)")
+    parser.add_argument("--columns-per-type", type=int, default=1)
+    parser.add_argument("--sparsity", type=float, default=0.2, help="fraction of empty cells")
+    parser.add_argument("--deleted", type=float, default=0.05, help="fraction of soft-deleted items")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    from app.database import Base, SessionLocal, engine
+    from app.migrations import ensure_schema
+
+    ensure_schema(engine, Base.metadata)
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        list_ids = generate(
+            db,
+            lists=args.lists,
+            items_per_list=args.items,
+            column_types=[ColumnType(t) for t in args.types] if args.types else None,
+            columns_per_type=args.columns_per_type,
+            sparsity=args.sparsity,
+            deleted_ratio=args.deleted,
+            seed=args.seed,
+        )
+    finally:
+        db.close()
+    print(f"Created {len(list_ids)} lists x {args.items} items in {time.perf_counter() - started:.1f}s")
+    print(f"Database: {engine.url.database}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Endpoint benchmark: latency percentiles, SQL statement counts and peak memory.
+
+    python -m benchmarks.endpoints run --lists 3 --items 2000 --iterations 30 --output before.json
+    python -m benchmarks.endpoints diff before.json after.json
+
+``run`` builds a synthetic database (see ``benchmarks.dataset``) in a
+throwaway data directory, then calls the main endpoints in-process through
+FastAPI's TestClient. For each scenario it records p50/p95/p99 latency,
+SQL statements per call and the peak Python memory allocated during one
+call (measured on a separate pass, since tracemalloc slows everything down).
+
+``diff`` compares two result files and flags scenarios whose p50 latency or
+statement count grew by more than ``--threshold`` percent.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class Scenarios:
+    """The calls to measure. Each scenario takes the iteration number and returns a response."""
+
+    def __init__(self, client, list_id: str, token: str):
+        self.client = client
+        self.list_id = list_id
+        self.auth = {"Authorization": f"Bearer {token}"}
+        self.columns = client.get(f"/api/lists/{list_id}/columns").json()
+        self.by_type = {c["column_type"]: c for c in self.columns}
+        items = client.get(f"/api/lists/{list_id}/items").json()
+        self.item_ids = [i["id"] for i in items]
+        self.view_id = client.get(f"/api/lists/{list_id}/views").json()[0]["id"]
+        self.csv = client.get(f"/api/export/csv/{list_id}").content
+
+    def _item(self, i: int) -> str:
+        return self.item_ids[i % len(self.item_ids)]
+
+    def _values(self, i: int) -> dict:
+        values = {}
+        if "text" in self.by_type:
+            values[self.by_type["text"]["id"]] = f"Benchmark {i}"
+        if "number" in self.by_type:
+            values[self.by_type["number"]["id"]] = i
+        if "choice" in self.by_type:
+            values[self.by_type["choice"]["id"]] = "Done"
+        return values
+
+    def all(self) -> dict:
+        return {
+            "lists_index": lambda i: self.client.get("/api/lists"),
+            "items_list": lambda i: self.client.get(f"/api/lists/{self.list_id}/items"),
+            "item_get": lambda i: self.client.get(f"/api/lists/{self.list_id}/items/{self._item(i)}"),
+            "item_create": lambda i: self.client.post(
+                f"/api/lists/{self.list_id}/items", json={"values": self._values(i)},
+            ),
+            "item_update": lambda i: self.client.put(
+                f"/api/lists/{self.list_id}/items/{self._item(i)}", json={"values": self._values(i)},
+            ),
+            "views_list": lambda i: self.client.get(f"/api/lists/{self.list_id}/views"),
+            "view_update": lambda i: self.client.put(
+                f"/api/lists/{self.list_id}/views/{self.view_id}",
+                json={"config": {"sort": [{"column": self.columns[0]["id"], "dir": "asc" if i % 2 else "desc"}]}},
+            ),
+            "csv_export": lambda i: self.client.get(f"/api/export/csv/{self.list_id}"),
+            "csv_import_preview": lambda i: self.client.post(
+                "/api/import/csv/preview", files={"file": ("bench.csv", self.csv, "text/csv")},
+            ),
+            "csv_import_create": self._csv_create,
+            "recycle_bin": lambda i: self.client.get("/api/system/recycle-bin"),
+            "delete_restore": self._delete_restore,
+            "stats": lambda i: self.client.get("/api/system/stats"),
+            "v1_lists": lambda i: self.client.get("/api/v1/lists", headers=self.auth),
+            "v1_items": lambda i: self.client.get(f"/api/v1/lists/{self.list_id}/items", headers=self.auth),
+            "v1_item_update": lambda i: self.client.put(
+                f"/api/v1/lists/{self.list_id}/items/{self._item(i)}",
+                headers=self.auth, json={"values": {self.columns[0]["name"]: f"v1 {i}"}},
+            ),
+        }
+
+    def _csv_create(self, i: int):
+        preview = getattr(self, "_preview", None)
+        if preview is None:
+            preview = self._preview = self.client.post(
+                "/api/import/csv/preview", files={"file": ("bench.csv", self.csv, "text/csv")},
+            ).json()
+            self._rows = list(csv.DictReader(io.StringIO(self.csv.decode("utf-8"))))[:200]
+        return self.client.post("/api/import/csv/create", json={
+            "list_name": f"Imported {i}",
+            "columns": [{"name": c["name"], "column_type": c["guessed_type"]} for c in preview["columns"]],
+            "data": self._rows,
+        })
+
+    def _delete_restore(self, i: int):
+        item_id = self._item(i)
+        self.client.delete(f"/api/lists/{self.list_id}/items/{item_id}")
+        return self.client.post(f"/api/lists/{self.list_id}/items/{item_id}/restore")
+
+
+def _measure(call, iterations: int, warmup: int, counter: dict) -> dict:
+    for i in range(warmup):
+        call(i)
+
+    timings, statements, errors = [], [], 0
+    for i in range(warmup, warmup + iterations):
+        counter["n"] = 0
+        start = time.perf_counter()
+        resp = call(i)
+        timings.append((time.perf_counter() - start) * 1000)
+        statements.append(counter["n"])
+        if resp.status_code >= 400:
+            errors += 1
+
+    tracemalloc.start()
+    call(warmup + iterations)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "errors": errors,
+        "mean_ms": round(sum(timings) / len(timings), 3),
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "p99_ms": round(percentile(timings, 99), 3),
+        "sql_statements": round(sum(statements) / len(statements), 1),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def run(args):
+    data_dir = Path(args.data_dir or tempfile.mkdtemp(prefix="listabob-bench-"))
+    os.environ["LISTABOB_DATA_DIR"] = str(data_dir)
+
+    import logging
+    from sqlalchemy import event
+    from fastapi.testclient import TestClient
+
+    from app.services.config_store import DEFAULT_CONFIG, config_store
+
+    config_store.path = data_dir / "config.json"
+    config_store.save(dict(DEFAULT_CONFIG))
+
+    from app.database import Base, SessionLocal, engine, read_engine
+    from app.main import app
+    from app.migrations import ensure_schema
+    from app.schemas import ColumnType
+    from benchmarks.dataset import generate
+
+    if not args.verbose:
+        logging.disable(logging.INFO)
+
+    ensure_schema(engine, Base.metadata)
+    db = SessionLocal()
+    try:
+        list_ids = generate(
+            db,
+            lists=args.lists,
+            items_per_list=args.items,
+            column_types=[ColumnType(t) for t in args.types] if args.types else None,
+            sparsity=args.sparsity,
+            deleted_ratio=args.deleted,
+        )
+    finally:
+        db.close()
+
+    counter = {"n": 0}
+
+    def _count(*_):
+        counter["n"] += 1
+
+    event.listen(engine, "before_cursor_execute", _count)
+    event.listen(read_engine, "before_cursor_execute", _count)
+
+    results = {}
+    with TestClient(app) as client:
+        token = client.post("/api/auth/login", json={"password": DEFAULT_CONFIG["password"]}).json()["token"]
+        scenarios = Scenarios(client, list_ids[0], token).all()
+        selected = args.only or list(scenarios)
+        for name in selected:
+            results[name] = _measure(scenarios[name], args.iterations, args.warmup, counter)
+            r = results[name]
+            print(
+                f"{name:<20} p50={r['p50_ms']:9.2f}ms  p95={r['p95_ms']:9.2f}ms  p99={r['p99_ms']:9.2f}ms  "
+                f"sql={r['sql_statements']:7.1f}  peak={r['peak_kb']:9.1f}KB"
+                + (f"  errors={r['errors']}" if r["errors"] else "")
+            )
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "lists": args.lists,
+            "items_per_list": args.items,
+            "types": args.types or "all",
+            "sparsity": args.sparsity,
+            "deleted_ratio": args.deleted,
+            "iterations": args.iterations,
+        },
+        "results": results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"Wrote {args.output}")
+
+
+def diff(args):
+    before = json.loads(Path(args.before).read_text())["results"]
+    after = json.loads(Path(args.after).read_text())["results"]
+
+    def change(old: float, new: float) -> float:
+        return (new - old) / old * 100 if old else (0.0 if new == old else float("inf"))
+
+    regressions = 0
+    print(f"{'scenario':<20} {'p50 before':>11} {'p50 after':>10} {'Δ%':>7}   {'sql before':>10} {'sql after':>9} {'Δ%':>7}")
+    for name in sorted(set(before) | set(after)):
+        if name not in before or name not in after:
+            print(f"{name:<20} only in {'after' if name in after else 'before'}")
+            continue
+        b, a = before[name], after[name]
+        lat = change(b["p50_ms"], a["p50_ms"])
+        sql = change(b["sql_statements"], a["sql_statements"])
+        flag = ""
+        if lat > args.threshold or sql > args.threshold:
+            flag = "  << regression"
+            regressions += 1
+        print(
+            f"{name:<20} {b['p50_ms']:10.2f}ms {a['p50_ms']:9.2f}ms {lat:+6.1f}%   "
+            f"{b['sql_statements']:10.1f} {a['sql_statements']:9.1f} {sql:+6.1f}%{flag}"
+        )
+    if regressions:
+        print(f"{regressions} scenario(s) regressed by more than {args.threshold:.0f}%")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="run the benchmark")
+    run_parser.add_argument("--lists", type=int, default=3)
+    run_parser.add_argument("--items", type=int, default=1000, help="items per list")
+    run_parser.add_argument("--types", nargs="+", help="column types (default: all)")
+    run_parser.add_argument("--sparsity", type=float, default=0.2)
+    run_parser.add_argument("--deleted", type=float, default=0.05)
+    run_parser.add_argument("--iterations", type=int, default=20)
+    run_parser.add_argument("--warmup", type=int, default=2)
+    run_parser.add_argument("--only", nargs="+", help="run only these scenarios")
+    run_parser.add_argument("--data-dir", help="keep the database here instead of a temp dir")
+    run_parser.add_argument("--output", help="write results to this JSON file")
+    run_parser.add_argument("--verbose", action="store_true", help="keep app logging")
+    run_parser.set_defaults(func=run)
+
+    diff_parser = sub.add_parser("diff", help="compare two result files")
+    diff_parser.add_argument("before")
+    diff_parser.add_argument("after")
+    diff_parser.add_argument("--threshold", type=float, default=10.0, help="percent change to flag")
+    diff_parser.set_defaults(func=diff)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Local stand-in for the Gemini REST API.
+
+Serves ``models/{model}:generateContent``, ``models`` and
+``cachedContents`` with canned responses so chat code can be exercised without network access or an
+API key. Use ``FakeGeminiServer`` to run it on a free localhost port, or run
+it standalone and set ``gemini_base_url`` in config.json to its URL:
+
+    python -m benchmarks.fake_gemini --port 8765 --latency 0.3 --error-rate 0.05
+
+Latency, jitter, error responses and malformed JSON bodies can be injected
+to see how the chat router behaves when the upstream misbehaves.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import socket
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+
+def _reply_for(payload: dict) -> str:
+    """Produce a plausible answer based on what the prompt asks for."""
+    system = "".join(
+        p.get("text", "") for p in payload.get("systemInstruction", {}).get("parts", [])
+    )
+    match = re.search(r"JSON array of exactly (\d+)", system)
+    if match:
+        return json.dumps([f"value {i + 1}" for i in range(int(match.group(1)))])
+    match = re.search(r"JSON object with keys: (\[.*\])", system)
+    if match:
+        keys = re.findall(r"'([^']*)'", match.group(1))
+        return json.dumps({k: f"{k} value" for k in keys})
+    if "data completion assistant" in system:
+        return "fake value"
+    return "This is a reply from the fake Gemini server."
+
+
+def create_app(
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    error_rate: float = 0.0,
+    error_status: int = 503,
+    malformed_rate: float = 0.0,
+    seed: int | None = None,
+) -> FastAPI:
+    """Build the stand-in app.
+
+    Every response is delayed by ``latency`` plus up to ``jitter`` seconds.
+    A fraction ``error_rate`` of calls fail with ``error_status`` (429s carry
+    a Retry-After), and ``malformed_rate`` of successful calls return a
+    truncated JSON body.
+    """
+    app = FastAPI()
+    rng = random.Random(seed)
+    app.state.calls = 0
+    cached: dict[str, dict] = {}
+
+    async def _delay():
+        await asyncio.sleep(latency + rng.uniform(0, jitter))
+
+    def _fault() -> Response | None:
+        app.state.calls += 1
+        if rng.random() < error_rate:
+            headers = {"Retry-After": "1"} if error_status == 429 else None
+            body = {"error": {"code": error_status, "message": "Injected error", "status": "UNAVAILABLE"}}
+            return JSONResponse(body, status_code=error_status, headers=headers)
+        if rng.random() < malformed_rate:
+            return Response('{"candidates": [{"content": {"parts": [{"te', media_type="application/json")
+        return None
+
+    @app.get("/v1beta/models")
+    async def list_models():
+        await _delay()
+        fault = _fault()
+        if fault is not None:
+            return fault
+        return {"models": [{
+            "name": "models/gemini-2.0-flash",
+            "displayName": "Gemini 2.0 Flash (fake)",
+            "supportedGenerationMethods": ["generateContent"],
+        }]}
+
+    @app.post("/v1beta/models/{target}")
+    async def generate_content(target: str, request: Request):
+        await _delay()
+        fault = _fault()
+        if fault is not None:
+            return fault
+        payload = await request.json()
+        if "cachedContent" in payload:
+            entry = cached.get(payload["cachedContent"])
+            if entry is None:
+                return JSONResponse({"error": {"code": 404, "message": "CachedContent not found"}}, status_code=404)
+            payload = {**payload, "systemInstruction": entry["systemInstruction"]}
+        text = _reply_for(payload)
+        if target.endswith(":streamGenerateContent"):
+            return StreamingResponse(_stream(text), media_type="text/event-stream")
+        return {
+            "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}],
+            "usageMetadata": {
+                "promptTokenCount": len(json.dumps(payload)) // 4,
+                "candidatesTokenCount": max(1, len(text) // 4),
+            },
+        }
+
+    async def _stream(text: str):
+        # One SSE chunk per word, like alt=sse on the real API
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            piece = word if i == len(words) - 1 else word + " "
+            chunk = {"candidates": [{"content": {"role": "model", "parts": [{"text": piece}]}}]}
+            yield f"data: {json.dumps(chunk)}\r\n\r\n"
+            await asyncio.sleep(latency / 10)
+
+    @app.post("/v1beta/cachedContents")
+    async def create_cached_content(request: Request):
+        body = await request.json()
+        name = f"cachedContents/fake-{len(cached) + 1}"
+        cached[name] = body
+        return {"name": name, "model": body.get("model"), "expireTime": "2099-01-01T00:00:00Z"}
+
+    @app.delete("/v1beta/cachedContents/{cache_id}")
+    async def delete_cached_content(cache_id: str):
+        cached.pop(f"cachedContents/{cache_id}", None)
+        return {}
+
+    app.state.cached_contents = cached
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class FakeGeminiServer:
+    """Run the stand-in on a background thread: ``with FakeGeminiServer() as srv: srv.base_url``."""
+
+    def __init__(self, port: int | None = None, **app_kwargs):
+        self.port = port or _free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}/v1beta"
+        self.app = create_app(**app_kwargs)
+        config = uvicorn.Config(self.app, host="127.0.0.1", port=self.port, log_level="warning")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Fake Gemini server did not start")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the fake Gemini server.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="base delay per call (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random delay up to this (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls that fail")
+    parser.add_argument("--error-status", type=int, default=503, help="status code for failed calls")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="fraction of truncated JSON bodies")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    app = create_app(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        error_status=args.error_status, malformed_rate=args.malformed_rate, seed=args.seed,
+    )
+    print(f"Fake Gemini listening on http://127.0.0.1:{args.port}/v1beta")
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Per-call latency of a fresh ``httpx.AsyncClient`` per request (old behaviour)
+versus the shared pooled client from ``app.services.gemini``.
+
+    python -m benchmarks.gemini_client --calls 200 --latency 0.005
+
+Runs against the local fake Gemini server, so the numbers only show the
+connection-setup cost saved by pooling (TCP only; against the real API the
+saving also includes the TLS handshake).
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from app.services.gemini import create_gemini_client
+from benchmarks.fake_gemini import FakeGeminiServer
+
+PAYLOAD = {
+    "contents": [{"role": "user", "parts": [{"text": "Hello"}]}],
+    "generationConfig": {"candidateCount": 1},
+}
+URL = "/models/gemini-2.0-flash:generateContent"
+
+
+async def _per_call_client(base_url: str, calls: int) -> list[float]:
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        async with httpx.AsyncClient(base_url=base_url, timeout=60.0) as client:
+            resp = await client.post(URL, params={"key": "bench"}, json=PAYLOAD)
+        resp.raise_for_status()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def _shared_client(base_url: str, calls: int) -> list[float]:
+    timings = []
+    async with create_gemini_client(base_url=base_url) as client:
+        for _ in range(calls):
+            start = time.perf_counter()
+            resp = await client.post(URL, params={"key": "bench"}, json=PAYLOAD)
+            resp.raise_for_status()
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _summary(label: str, timings: list[float]) -> str:
+    ms = sorted(t * 1000 for t in timings)
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    return (
+        f"{label:<22} mean={statistics.mean(ms):7.2f}ms  "
+        f"p50={statistics.median(ms):7.2f}ms  p95={p95:7.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0, help="server-side delay per call (s)")
+    args = parser.parse_args()
+
+    with FakeGeminiServer(latency=args.latency) as server:
+        before = asyncio.run(_per_call_client(server.base_url, args.calls))
+        after = asyncio.run(_shared_client(server.base_url, args.calls))
+
+    print(_summary("client per call", before))
+    print(_summary("shared pooled client", after))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Multi-worker load test: read throughput against the number of server processes.
+
+    python -m benchmarks.workers --workers 1 2 4 --duration 15 --concurrency 32
+
+Builds a synthetic database (see ``benchmarks.dataset``) in a throwaway data
+directory, then for each worker count starts ``uvicorn --workers N`` on it
+and drives a mix of GET endpoints from ``--concurrency`` concurrent clients
+for ``--duration`` seconds. ``--write-ratio`` mixes in item updates to check
+that writers in different processes queue on the busy timeout instead of
+failing with "database is locked".
+
+Throughput can only scale up to the number of cores (``os.cpu_count()``).
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.endpoints import percentile
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def _prepare(data_dir: Path, lists: int, items: int) -> list[str]:
+    os.environ["LISTABOB_DATA_DIR"] = str(data_dir)
+    from app.database import Base, SessionLocal, engine
+    from app.migrations import ensure_schema
+    from benchmarks.dataset import generate
+
+    ensure_schema(engine, Base.metadata)
+    db = SessionLocal()
+    try:
+        return generate(db, lists=lists, items_per_list=items, deleted_ratio=0)
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def _start_server(data_dir: Path, workers: int, port: int) -> subprocess.Popen:
+    env = {**os.environ, "LISTABOB_DATA_DIR": str(data_dir)}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/api/health", timeout=1).status_code == 200:
+                return proc
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("server did not start")
+
+
+async def _load(base_url: str, list_ids: list[str], args) -> dict:
+    rng = random.Random(1)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=httpx.Limits(max_connections=args.concurrency)) as client:
+        targets = []
+        for list_id in list_ids:
+            items = (await client.get(f"/api/lists/{list_id}/items")).json()
+            columns = (await client.get(f"/api/lists/{list_id}/columns")).json()
+            text_column = next(c["id"] for c in columns if c["column_type"] == "text")
+            targets.append((list_id, [i["id"] for i in items], text_column))
+
+        def request():
+            list_id, item_ids, text_column = rng.choice(targets)
+            roll = rng.random()
+            if roll < args.write_ratio:
+                return "PUT", f"/api/lists/{list_id}/items/{rng.choice(item_ids)}", {"values": {text_column: f"load {rng.random()}"}}
+            paths = (
+                "/api/lists",
+                f"/api/lists/{list_id}/items",
+                f"/api/lists/{list_id}/items/{rng.choice(item_ids)}",
+                f"/api/lists/{list_id}/views",
+                f"/api/lists/{list_id}/columns",
+            )
+            return "GET", rng.choice(paths), None
+
+        timings: list[float] = []
+        errors = 0
+        deadline = time.perf_counter() + args.duration
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                method, path, body = request()
+                start = time.perf_counter()
+                try:
+                    resp = await client.request(method, path, json=body)
+                    if resp.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                timings.append((time.perf_counter() - start) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(timings),
+        "errors": errors,
+        "rps": len(timings) / elapsed,
+        "p50_ms": percentile(timings, 50),
+        "p95_ms": percentile(timings, 95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, nargs="+", help="worker counts to try (default: 1, 2, 4 ... cpu count)")
+    parser.add_argument("--lists", type=int, default=3)
+    parser.add_argument("--items", type=int, default=200, help="items per list")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per worker count")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent clients")
+    parser.add_argument("--write-ratio", type=float, default=0.0, help="fraction of requests that update an item")
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--data-dir", help="keep the database here instead of a temp dir")
+    args = parser.parse_args()
+
+    counts = args.workers
+    if not counts:
+        cpus = os.cpu_count() or 1
+        counts = sorted({1, *(n for n in (2, 4, 8, 16) if n <= cpus), cpus})
+
+    data_dir = Path(args.data_dir or tempfile.mkdtemp(prefix="listabob-bench-"))
+    list_ids = _prepare(data_dir, args.lists, args.items)
+    print(f"{args.lists} lists x {args.items} items, {args.concurrency} clients, "
+          f"{args.duration:.0f}s per run, write ratio {args.write_ratio:.0%}, {os.cpu_count()} CPUs")
+
+    baseline = None
+    print(f"{'workers':>7} {'req/s':>9} {'speedup':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+    for workers in counts:
+        proc = _start_server(data_dir, workers, args.port)
+        try:
+            r = asyncio.run(_load(f"http://127.0.0.1:{args.port}", list_ids, args))
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+        baseline = baseline or r["rps"]
+        print(f"{workers:7d} {r['rps']:9.1f} {r['rps'] / baseline:7.2f}x {r['p50_ms']:8.1f} {r['p95_ms']:8.1f} {r['errors']:7d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,22 @@
 """
 Listabob - Standalone Application Entry Point
 This is used when building the executable with PyInstaller.
+
+Pass --profile-imports (or set LISTABOB_PROFILE_IMPORTS=1) to print the
+slowest imports at startup; the per-phase startup times are always logged.
 """
 import os
 import sys
 import json
+import multiprocessing
 from pathlib import Path
 
+if "--profile-imports" in sys.argv:
+    os.environ["LISTABOB_PROFILE_IMPORTS"] = "1"
+
+# Starts the startup clock (and the import profiler, if enabled)
+from app import startup
+
 # Determine if running as exe or script
 if getattr(sys, 'frozen', False):
     # Running as compiled exe
@@ -42,10 +52,13 @@ with open(config_path, 'r') as f:
 
 # Get port from config (default 8000)
 PORT = config.get('port', 8000)
+# Worker processes; each has its own connection pool on the shared SQLite file
+WORKERS = max(1, int(config.get('server', {}).get('workers', 1)))
 
 
 def main():
     import uvicorn
+    startup.mark("launcher")
     
     # If running without console, redirect stdout/stderr to a log file
     if getattr(sys, 'frozen', False) and sys.stdout is None:
@@ -60,6 +73,8 @@ def main():
     print(f"Config file: {config_path}")
     print()
     print(f"Server running at http://localhost:{PORT}")
+    if WORKERS > 1:
+        print(f"Workers: {WORKERS}")
     print("=" * 50)
     
     # Start the server
@@ -68,9 +83,12 @@ def main():
         host="0.0.0.0",
         port=PORT,
         log_level="info",
-        reload=False
+        reload=False,
+        workers=WORKERS,
     )
 
 
 if __name__ == "__main__":
+    # Worker processes re-run this file when frozen
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,22 @@
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Must be set before the app is imported: the data dir is resolved at import time
+DATA_DIR = tempfile.mkdtemp(prefix="listabob-test-")
+os.environ["LISTABOB_DATA_DIR"] = DATA_DIR
+
+from app.services.config_store import config_store  # noqa: E402
+
+config_store.path = Path(DATA_DIR) / "config.json"
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as c:
+        yield c
@@ -0,0 +1,38 @@
+from app.services.item_cache import item_cache
+
+
+def _make_list(client):
+    data = client.post("/api/lists", json={
+        "name": "Cache",
+        "columns": [{"name": "Title", "column_type": "text"}, {"name": "N", "column_type": "number"}],
+    }).json()
+    columns = {c["name"]: c["id"] for c in data["columns"]}
+    for i in range(4):
+        client.post(f"/api/lists/{data['id']}/items", json={"values": {columns["Title"]: f"t{i}", columns["N"]: i}})
+    return data["id"]
+
+
+def _cache_misses(client, list_id) -> int:
+    before = item_cache.misses
+    assert client.get(f"/api/lists/{list_id}/items").status_code == 200
+    return item_cache.misses - before
+
+
+def test_view_and_settings_updates_keep_items_cached(client):
+    list_id = _make_list(client)
+    _cache_misses(client, list_id)
+
+    view = client.get(f"/api/lists/{list_id}/views").json()[0]
+    client.put(f"/api/lists/{list_id}/views/{view['id']}", json={"config": {"sort": [{"column": "N", "dir": "asc"}]}})
+    client.put(f"/api/lists/{list_id}", json={"is_favorite": True})
+
+    assert _cache_misses(client, list_id) == 0
+
+
+def test_column_add_reloads_items(client):
+    list_id = _make_list(client)
+    _cache_misses(client, list_id)
+
+    client.post(f"/api/lists/{list_id}/columns", json={"name": "Extra", "column_type": "text"})
+
+    assert _cache_misses(client, list_id) == 4
@@ -59,6 +59,9 @@ echo [2/4] Checking PyInstaller...
 cd backend
 call venv\Scripts\activate
 pip install pyinstaller
+REM Precompressed .br/.gz copies of the frontend build, served to browsers that accept them
+pip install brotli
+python -m app.services.static_files ..\frontend\dist
 cd ..
 echo.
 
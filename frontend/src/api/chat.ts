@@ -1,5 +1,5 @@
 import api from './client';
-import type { ChatRequest, ChatResponse, CompletionRequest, CompletionResponse, BatchCompletionRequest, BatchCompletionResponse, ItemCompletionRequest, ItemCompletionResponse, GeminiModel } from '../types';
+import type { ChatRequest, ChatResponse, CompletionRequest, CompletionResponse, BatchCompletionRequest, BatchCompletionResponse, ItemCompletionRequest, ItemCompletionResponse, GeminiModel, AIFillRequest, AIFillStatus } from '../types';
 
 export const chatApi = {
   sendMessage: async (request: ChatRequest): Promise<ChatResponse> => {
@@ -7,6 +7,73 @@ export const chatApi = {
     return data;
   },
 
+  /**
+   * Stream a chat reply over Server-Sent Events. `onDelta` is called with each
+   * text fragment as it arrives; resolves with the full reply when done.
+   */
+  streamMessage: async (
+    request: ChatRequest,
+    onDelta: (text: string) => void,
+    signal?: AbortSignal,
+  ): Promise<ChatResponse> => {
+    const resp = await fetch('/api/chat/stream', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(request),
+      signal,
+    });
+    if (!resp.ok || !resp.body) {
+      const body = await resp.json().catch(() => null);
+      const error = new Error(body?.detail || `Chat request failed (${resp.status})`);
+      (error as Error & { status?: number }).status = resp.status;
+      throw error;
+    }
+
+    const reader = resp.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let message = '';
+    let model = request.model || '';
+    let sessionId = request.session_id;
+
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary = buffer.indexOf('\n\n');
+      while (boundary !== -1) {
+        const block = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        boundary = buffer.indexOf('\n\n');
+
+        let event = 'message';
+        let data = '';
+        for (const line of block.split('\n')) {
+          if (line.startsWith('event:')) event = line.slice(6).trim();
+          else if (line.startsWith('data:')) data += line.slice(5).trim();
+        }
+        if (!data) continue;
+        const parsed = JSON.parse(data);
+        if (event === 'delta') {
+          message += parsed.text;
+          onDelta(parsed.text);
+        } else if (event === 'done') {
+          model = parsed.model;
+          sessionId = parsed.session_id;
+        } else if (event === 'error') {
+          throw new Error(parsed.detail || 'Chat stream failed');
+        }
+      }
+    }
+
+    return { message, model, session_id: sessionId };
+  },
+
+  deleteSession: async (sessionId: string): Promise<void> => {
+    await api.delete(`/chat/sessions/${sessionId}`);
+  },
+
   getModels: async (): Promise<GeminiModel[]> => {
     const { data } = await api.get('/chat/models');
     return data;
@@ -26,4 +93,24 @@ export const chatApi = {
     const { data } = await api.post('/chat/complete-item', request);
     return data;
   },
+
+  startAIFill: async (listId: string, columnId: string, request: AIFillRequest): Promise<AIFillStatus> => {
+    const { data } = await api.post(`/lists/${listId}/columns/${columnId}/ai-fill`, request);
+    return data;
+  },
+
+  getLatestAIFill: async (listId: string, columnId: string): Promise<AIFillStatus | null> => {
+    const { data } = await api.get(`/lists/${listId}/columns/${columnId}/ai-fill`);
+    return data;
+  },
+
+  getAIFill: async (listId: string, columnId: string, jobId: string, since = 0): Promise<AIFillStatus> => {
+    const { data } = await api.get(`/lists/${listId}/columns/${columnId}/ai-fill/${jobId}`, { params: { since } });
+    return data;
+  },
+
+  cancelAIFill: async (listId: string, columnId: string, jobId: string): Promise<AIFillStatus> => {
+    const { data } = await api.post(`/lists/${listId}/columns/${columnId}/ai-fill/${jobId}/cancel`);
+    return data;
+  },
 };
@@ -1,10 +1,8 @@
 import { useState, useRef, useEffect, useCallback } from 'react';
 import { Modal } from '../ui';
 import { chatApi } from '../../api/chat';
-import { itemsApi } from '../../api/items';
-import { listsApi } from '../../api/lists';
 import { useQueryClient } from '@tanstack/react-query';
-import type { Column, Item, GeminiModel } from '../../types';
+import type { Column, Item, GeminiModel, AIFillStatus } from '../../types';
 
 interface AICompletionModalProps {
   isOpen: boolean;
@@ -31,6 +29,8 @@ const BATCH_OPTIONS = [
   { label: 'All at once', value: 0 },
 ];
 
+const POLL_INTERVAL_MS = 1000;
+
 export function AICompletionModal({ isOpen, onClose, listId, listName, columns, items }: AICompletionModalProps) {
   const queryClient = useQueryClient();
   const [selectedColumnId, setSelectedColumnId] = useState('');
@@ -42,7 +42,7 @@ export function AICompletionModal({ isOpen, onClose, listId, listName, columns,
   const [isRunning, setIsRunning] = useState(false);
   const [results, setResults] = useState<ItemResult[]>([]);
   const [progress, setProgress] = useState({ done: 0, total: 0 });
-  const abortRef = useRef(false);
+  const jobIdRef = useRef<string | null>(null);
   const resultsEndRef = useRef<HTMLDivElement>(null);
 
   const activeItems = items.filter(i => !i.deleted_at);
@@ -53,13 +53,19 @@ export function AICompletionModal({ isOpen, onClose, listId, listName, columns,
     }
   }, [isOpen]); // eslint-disable-line react-hooks/exhaustive-deps
 
+  // A job keeps running on the server after a reload; pick it back up
+  useEffect(() => {
+    if (isOpen && !isRunning && columns.length > 0) {
+      resumeRunningJob();
+    }
+  }, [isOpen]); // eslint-disable-line react-hooks/exhaustive-deps
+
   useEffect(() => {
     if (!isOpen) {
       setSelectedColumnId('');
       setResults([]);
       setProgress({ done: 0, total: 0 });
       setIsRunning(false);
-      abortRef.current = false;
     }
   }, [isOpen]);
 
@@ -97,188 +103,112 @@ export function AICompletionModal({ isOpen, onClose, listId, listName, columns,
     return `Item ${item.id.slice(0, 8)}`;
   }, [columns]);
 
-  const buildItemContext = (item: Item, targetColId: string): Record<string, unknown> => {
-    const ctx: Record<string, unknown> = {};
-    for (const col of columns) {
-      const val = item.values[col.id];
-      if (val != null && val !== '' && col.id !== targetColId) {
-        ctx[col.name] = val;
-      }
-    }
-    return ctx;
-  };
-
-  const handleStart = async () => {
-    const targetCol = columns.find(c => c.id === selectedColumnId);
-    if (!targetCol) return;
-
-    const isChoiceType = targetCol.column_type === 'choice' || targetCol.column_type === 'multiple_choice';
-    const isMultiChoice = targetCol.column_type === 'multiple_choice';
-
-    // Track current choices (mutable across batches so we can accumulate new ones)
-    const currentChoicesRef = { current: (targetCol.config?.choices as string[] | undefined) ? [...(targetCol.config!.choices as string[])] : [] };
-
-    abortRef.current = false;
-    setIsRunning(true);
-
-    // Build initial results list
-    const initialResults: ItemResult[] = activeItems.map(item => {
-      const existingValue = item.values[targetCol.id];
+  const buildResults = (columnId: string, skip: boolean): ItemResult[] =>
+    // Items with values are skipped server-side too
+    activeItems.map(item => {
+      const existingValue = item.values[columnId];
       const hasValue = existingValue != null && existingValue !== '';
       return {
         itemId: item.id,
         label: getItemLabel(item),
-        status: (skipExisting && hasValue) ? 'skipped' as const : 'pending' as const,
+        status: (skip && hasValue) ? 'skipped' as const : 'processing' as const,
         value: hasValue ? String(existingValue) : undefined,
       };
     });
 
-    setResults(initialResults);
-    const itemsToProcess = initialResults.filter(r => r.status === 'pending');
-    setProgress({ done: 0, total: itemsToProcess.length });
-
-    // Resolve effective batch size
-    const effectiveBatchSize = batchSize === 0 ? itemsToProcess.length : batchSize;
-
-    let doneCount = 0;
-
-    // Helper: ensure new choice values are added to column config
-    const ensureChoices = async (newValues: string[]) => {
-      if (!isChoiceType) return;
-      const existingLower = currentChoicesRef.current.map(c => c.toLowerCase());
-      const toAdd = newValues.filter(v => v && !existingLower.includes(v.toLowerCase()));
-      if (toAdd.length === 0) return;
-      currentChoicesRef.current = [...currentChoicesRef.current, ...toAdd];
-      await listsApi.updateColumn(listId, targetCol.id, {
-        config: { ...targetCol.config, choices: currentChoicesRef.current },
-      });
-    };
-
-    // Helper: encode value for storage
-    const encodeValue = (raw: string): string => {
-      // multiple_choice is stored as comma-separated
-      return raw;
-    };
-
-    // Process in batches
-    for (let i = 0; i < itemsToProcess.length; i += effectiveBatchSize) {
-      if (abortRef.current) break;
-
-      const batchResults = itemsToProcess.slice(i, i + effectiveBatchSize);
-
-      // Mark entire batch as processing
-      setResults(prev => prev.map(r =>
-        batchResults.some(b => b.itemId === r.itemId) ? { ...r, status: 'processing' } : r
-      ));
+  const applyStatus = (job: AIFillStatus) => {
+    if (job.results.length > 0) {
+      const byId = new Map(job.results.map(r => [r.item_id, r]));
+      setResults(prev => prev.map(r => {
+        const res = byId.get(r.itemId);
+        if (!res) return r;
+        if (res.status === 'success') return { ...r, status: 'success', value: res.value };
+        if (res.status === 'unknown') return { ...r, status: 'skipped', value: 'UNKNOWN' };
+        return { ...r, status: 'error', error: res.error || 'Failed' };
+      }));
+    }
+    setProgress({ done: job.done, total: job.total });
+  };
 
-      if (effectiveBatchSize === 1) {
-        // Single-item path
-        const result = batchResults[0];
-        const item = activeItems.find(it => it.id === result.itemId)!;
-        try {
-          const response = await chatApi.completeColumn({
-            list_name: listName,
-            item_context: buildItemContext(item, targetCol.id),
-            target_column: targetCol.name,
-            column_type: targetCol.column_type,
-            column_config: targetCol.config,
-            model: selectedModel || undefined,
-          });
-          if (abortRef.current) break;
-          if (response.value != null) {
-            // Ensure any new choice values are added to the column
-            if (isChoiceType) {
-              const vals = isMultiChoice
-                ? response.value.split(',').map(v => v.trim()).filter(Boolean)
-                : [response.value.trim()];
-              await ensureChoices(vals);
-            }
-            const storeValue = encodeValue(response.value);
-            await itemsApi.update(listId, item.id, { values: { ...item.values, [targetCol.id]: storeValue } });
-            setResults(prev => prev.map(r =>
-              r.itemId === result.itemId ? { ...r, status: 'success', value: storeValue } : r
-            ));
-          } else {
-            setResults(prev => prev.map(r =>
-              r.itemId === result.itemId ? { ...r, status: 'skipped', value: 'UNKNOWN' } : r
-            ));
-          }
-        } catch (err: unknown) {
-          const message = (err as { response?: { data?: { detail?: string } } })?.response?.data?.detail || 'Failed';
-          setResults(prev => prev.map(r =>
-            r.itemId === result.itemId ? { ...r, status: 'error', error: message } : r
-          ));
-        }
-        doneCount++;
-      } else {
-        // Batch path
-        const batchItems = batchResults.map(r => {
-          const item = activeItems.find(it => it.id === r.itemId)!;
-          return { item_context: buildItemContext(item, targetCol.id) };
-        });
-
-        try {
-          const response = await chatApi.completeColumnBatch({
-            list_name: listName,
-            items: batchItems,
-            target_column: targetCol.name,
-            column_type: targetCol.column_type,
-            column_config: targetCol.config,
-            model: selectedModel || undefined,
-          });
-
-          if (abortRef.current) break;
-
-          // Collect all new choice values from the whole batch first, then update once
-          if (isChoiceType) {
-            const allVals: string[] = [];
-            response.values.forEach(v => {
-              if (v == null) return;
-              if (isMultiChoice) {
-                v.split(',').map(s => s.trim()).filter(Boolean).forEach(s => allVals.push(s));
-              } else {
-                allVals.push(v.trim());
-              }
-            });
-            await ensureChoices(allVals);
-          }
-
-          // Apply each value and update items
-          await Promise.all(
-            batchResults.map(async (result, idx) => {
-              const value = response.values[idx] ?? null;
-              const item = activeItems.find(it => it.id === result.itemId)!;
-              if (value != null) {
-                const storeValue = encodeValue(value);
-                await itemsApi.update(listId, item.id, { values: { ...item.values, [targetCol.id]: storeValue } });
-                setResults(prev => prev.map(r =>
-                  r.itemId === result.itemId ? { ...r, status: 'success', value: storeValue } : r
-                ));
-              } else {
-                setResults(prev => prev.map(r =>
-                  r.itemId === result.itemId ? { ...r, status: 'skipped', value: 'UNKNOWN' } : r
-                ));
-              }
-            })
-          );
-        } catch (err: unknown) {
-          const message = (err as { response?: { data?: { detail?: string } } })?.response?.data?.detail || 'Failed';
-          setResults(prev => prev.map(r =>
-            batchResults.some(b => b.itemId === r.itemId) ? { ...r, status: 'error', error: message } : r
-          ));
-        }
-        doneCount += batchResults.length;
+  // Poll a job until it stops, then refresh the list
+  const followJob = async (columnId: string, start: () => Promise<AIFillStatus>) => {
+    setIsRunning(true);
+    try {
+      let job = await start();
+      jobIdRef.current = job.id;
+
+      for (;;) {
+        applyStatus(job);
+        if (job.status !== 'running') break;
+        await new Promise(resolve => setTimeout(resolve, POLL_INTERVAL_MS));
+        job = await chatApi.getAIFill(listId, columnId, job.id, job.next_cursor);
       }
 
-      setProgress({ done: doneCount, total: itemsToProcess.length });
+      if (job.status === 'failed') {
+        setResults(prev => prev.map(r =>
+          r.status === 'processing' ? { ...r, status: 'error', error: job.error || 'Failed' } : r
+        ));
+      } else if (job.status === 'cancelled') {
+        setResults(prev => prev.map(r => r.status === 'processing' ? { ...r, status: 'pending' } : r));
+      }
+    } catch (err: unknown) {
+      const message = (err as { response?: { data?: { detail?: string } } })?.response?.data?.detail || 'Failed';
+      setResults(prev => prev.map(r =>
+        r.status === 'processing' ? { ...r, status: 'error', error: message } : r
+      ));
     }
 
+    jobIdRef.current = null;
     queryClient.invalidateQueries({ queryKey: ['items', listId] });
     queryClient.invalidateQueries({ queryKey: ['list', listId] });
     setIsRunning(false);
   };
 
-  const handleStop = () => { abortRef.current = true; };
+  const resumeRunningJob = async () => {
+    let running: AIFillStatus | undefined;
+    try {
+      const latest = await Promise.all(columns.map(col => chatApi.getLatestAIFill(listId, col.id)));
+      running = latest.find((job): job is AIFillStatus => job?.status === 'running');
+    } catch {
+      return;
+    }
+    if (!running) return;
+
+    const job = running;
+    setSelectedColumnId(job.column_id);
+    setSelectedModel(job.model);
+    setSkipExisting(job.skipped > 0);
+    setResults(buildResults(job.column_id, job.skipped > 0));
+    await followJob(job.column_id, async () => job);
+  };
+
+  const handleStart = async () => {
+    const targetCol = columns.find(c => c.id === selectedColumnId);
+    if (!targetCol) return;
+
+    const initialResults = buildResults(targetCol.id, skipExisting);
+    setResults(initialResults);
+    const pendingCount = initialResults.filter(r => r.status === 'processing').length;
+    setProgress({ done: 0, total: pendingCount });
+
+    // The server reads item data, batches the requests and saves the values itself,
+    // so the job keeps running even if this tab is closed.
+    await followJob(targetCol.id, () => chatApi.startAIFill(listId, targetCol.id, {
+      model: selectedModel || undefined,
+      batch_size: batchSize === 0 ? Math.max(pendingCount, 1) : batchSize,
+      skip_existing: skipExisting,
+    }));
+  };
+
+  const handleStop = async () => {
+    if (jobIdRef.current && selectedColumnId) {
+      try {
+        await chatApi.cancelAIFill(listId, selectedColumnId, jobIdRef.current);
+      } catch {
+        // the polling loop picks up the final state
+      }
+    }
+  };
 
   const selectedColumn = columns.find(c => c.id === selectedColumnId);
   const itemsWithExisting = selectedColumnId
@@ -2,7 +2,7 @@ import { useState, useRef, useEffect } from 'react';
 import { Modal } from '../ui';
 import { chatApi } from '../../api/chat';
 import { ItemCompletionTab } from './ItemCompletionTab';
-import type { ChatMessage, Column, Item, GeminiModel } from '../../types';
+import type { ChatMessage, ChatResponse, Column, Item, GeminiModel } from '../../types';
 
 interface ChatModalProps {
   isOpen: boolean;
@@ -26,6 +26,9 @@ export function ChatModal({ isOpen, onClose, listId, listName, item, columns }:
   const [loadingModels, setLoadingModels] = useState(false);
   const messagesEndRef = useRef<HTMLDivElement>(null);
   const inputRef = useRef<HTMLTextAreaElement>(null);
+  const streamAbortRef = useRef<AbortController | null>(null);
+  // Server-side conversation; after the first reply only new messages are sent
+  const sessionIdRef = useRef<string | null>(null);
 
   // Build a readable context from the item data
   const itemContext: Record<string, unknown> = {};
@@ -58,6 +61,11 @@ export function ChatModal({ isOpen, onClose, listId, listName, item, columns }:
   // Reset state when modal closes
   useEffect(() => {
     if (!isOpen) {
+      streamAbortRef.current?.abort();
+      if (sessionIdRef.current) {
+        chatApi.deleteSession(sessionIdRef.current).catch(() => {});
+        sessionIdRef.current = null;
+      }
       setMessages([]);
       setInput('');
       setError(null);
@@ -100,20 +108,48 @@ export function ChatModal({ isOpen, onClose, listId, listName, item, columns }:
     setError(null);
     setIsLoading(true);
 
-    try {
-      const response = await chatApi.sendMessage({
-        list_name: listName,
-        item_context: itemContext,
-        messages: newMessages,
-        model: selectedModel || undefined,
-      });
+    const controller = new AbortController();
+    streamAbortRef.current = controller;
+    let streamed = '';
 
-      setMessages([...newMessages, { role: 'assistant', content: response.message }]);
+    const onDelta = (text: string) => {
+      streamed += text;
+      setMessages([...newMessages, { role: 'assistant', content: streamed }]);
+    };
+    const fullRequest = {
+      list_name: listName,
+      item_context: itemContext,
+      messages: newMessages,
+      model: selectedModel || undefined,
+    };
+
+    try {
+      // Show the reply as it streams in
+      let reply: ChatResponse;
+      if (sessionIdRef.current) {
+        try {
+          reply = await chatApi.streamMessage(
+            { session_id: sessionIdRef.current, messages: [userMessage], model: selectedModel || undefined },
+            onDelta,
+            controller.signal,
+          );
+        } catch (err: unknown) {
+          // Session expired on the server: start a new one with the full history
+          if ((err as { status?: number })?.status !== 404) throw err;
+          sessionIdRef.current = null;
+          reply = await chatApi.streamMessage(fullRequest, onDelta, controller.signal);
+        }
+      } else {
+        reply = await chatApi.streamMessage(fullRequest, onDelta, controller.signal);
+      }
+      sessionIdRef.current = reply.session_id ?? null;
     } catch (err: unknown) {
-      const message = (err as { response?: { data?: { detail?: string } } })?.response?.data?.detail
-        || 'Failed to get response from Gemini';
-      setError(message);
+      if (!controller.signal.aborted) {
+        const message = (err as Error)?.message || 'Failed to get response from Gemini';
+        setError(message);
+      }
     } finally {
+      streamAbortRef.current = null;
       setIsLoading(false);
     }
   };
@@ -228,7 +264,7 @@ export function ChatModal({ isOpen, onClose, listId, listName, item, columns }:
                 </div>
               </div>
             ))}
-            {isLoading && (
+            {isLoading && messages[messages.length - 1]?.role !== 'assistant' && (
               <div className="chat chat-start">
                 <div className="chat-bubble chat-bubble-neutral">
                   <span className="loading loading-dots loading-sm"></span>
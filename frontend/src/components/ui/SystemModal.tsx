@@ -11,6 +11,17 @@ interface SystemStats {
   total_views: number;
   total_values: number;
   database_size_mb: number;
+  backup?: BackupStatus;
+}
+
+interface BackupStatus {
+  running: boolean;
+  percent: number;
+  last_file: string | null;
+  scheduled: boolean;
+  last_success_at: string | null;
+  next_run_at: string | null;
+  last_error: string | null;
 }
 
 interface SystemModalProps {
@@ -39,6 +50,7 @@ export function SystemModal({ isOpen, onClose, onLogout }: SystemModalProps) {
   // Backup
   const [backupPath, setBackupPath] = useState('');
   const [backingUp, setBackingUp] = useState(false);
+  const [backupPercent, setBackupPercent] = useState(0);
 
   // Gemini AI
   const [geminiApiKey, setGeminiApiKey] = useState('');
@@ -181,15 +193,34 @@ export function SystemModal({ isOpen, onClose, onLogout }: SystemModalProps) {
       });
       
       const data = await response.json();
-      if (response.ok) {
-        setSuccess(`Backup created: ${data.backup_file}`);
-      } else {
+      if (!response.ok) {
         setError(data.detail || 'Backup failed');
+        return;
       }
+      // The backup runs in the background; poll until it finishes
+      const status = await waitForBackup();
+      if (status.last_error) {
+        setError(`Backup failed: ${status.last_error}`);
+      } else {
+        setSuccess(`Backup created: ${status.last_file}`);
+      }
+      fetchStats();
     } catch (err) {
       setError('Backup failed');
     } finally {
       setBackingUp(false);
+      setBackupPercent(0);
+    }
+  };
+
+  const waitForBackup = async (): Promise<BackupStatus> => {
+    for (;;) {
+      await new Promise((resolve) => setTimeout(resolve, 1000));
+      const response = await fetch('/api/system/backup/status');
+      if (!response.ok) throw new Error('Failed to fetch backup status');
+      const status: BackupStatus = await response.json();
+      if (!status.running) return status;
+      setBackupPercent(status.percent);
     }
   };
 
@@ -559,7 +590,7 @@ export function SystemModal({ isOpen, onClose, onLogout }: SystemModalProps) {
               {backingUp ? (
                 <>
                   <span className="loading loading-spinner loading-sm"></span>
-                  Backing up...
+                  Backing up...{backupPercent > 0 && ` ${Math.round(backupPercent)}%`}
                 </>
               ) : (
                 <>
@@ -570,6 +601,17 @@ export function SystemModal({ isOpen, onClose, onLogout }: SystemModalProps) {
                 </>
               )}
             </button>
+            {stats?.backup && (stats.backup.scheduled || stats.backup.last_success_at) && (
+              <div className="text-sm text-base-content/60 mt-2">
+                {stats.backup.last_success_at && (
+                  <div>Last backup: {new Date(stats.backup.last_success_at).toLocaleString()}</div>
+                )}
+                {stats.backup.scheduled && stats.backup.next_run_at && (
+                  <div>Next scheduled backup: {new Date(stats.backup.next_run_at).toLocaleString()}</div>
+                )}
+                {stats.backup.last_error && <div className="text-error">Last error: {stats.backup.last_error}</div>}
+              </div>
+            )}
           </div>
 
           <div className="divider"></div>
@@ -1,6 +1,38 @@
-import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
+import { useEffect } from 'react';
+import { type QueryClient, useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import { itemsApi } from '../api/items';
-import type { CreateItemPayload, UpdateItemPayload } from '../types';
+import type { Column, CreateItemPayload, Item, List, UpdateItemPayload } from '../types';
+
+type ItemsKey = ['items', string, { includeDeleted: boolean }];
+
+/** Apply a change to every cached item query of a list. */
+function patchItems(
+  queryClient: QueryClient,
+  listId: string,
+  update: (items: Item[], includeDeleted: boolean) => Item[]
+) {
+  for (const [key, items] of queryClient.getQueriesData<Item[]>({ queryKey: ['items', listId] })) {
+    if (items) {
+      queryClient.setQueryData(key, update(items, (key as ItemsKey)[2]?.includeDeleted ?? false));
+    }
+  }
+}
+
+function upsertItem(queryClient: QueryClient, item: Item) {
+  patchItems(queryClient, item.list_id, (items) =>
+    items.some((i) => i.id === item.id)
+      ? items.map((i) => (i.id === item.id ? item : i))
+      : [...items, item]
+  );
+}
+
+function removeItem(queryClient: QueryClient, listId: string, itemId: string, purged: boolean) {
+  patchItems(queryClient, listId, (items, includeDeleted) =>
+    includeDeleted && !purged
+      ? items.map((i) => (i.id === itemId ? { ...i, deleted_at: new Date().toISOString() } : i))
+      : items.filter((i) => i.id !== itemId)
+  );
+}
 
 export function useItems(listId: string, includeDeleted = false) {
   return useQuery({
@@ -15,8 +47,8 @@ export function useCreateItem() {
   return useMutation({
     mutationFn: ({ listId, ...payload }: { listId: string } & CreateItemPayload) =>
       itemsApi.create(listId, payload),
-    onSuccess: (data, variables) => {
-      queryClient.invalidateQueries({ queryKey: ['items', variables.listId] });
+    onSuccess: (data) => {
+      upsertItem(queryClient, data);
       return data; // Return the created item
     },
   });
@@ -27,8 +59,8 @@ export function useUpdateItem() {
   return useMutation({
     mutationFn: ({ listId, itemId, ...payload }: { listId: string; itemId: string } & UpdateItemPayload) =>
       itemsApi.update(listId, itemId, payload),
-    onSuccess: (_, variables) => {
-      queryClient.invalidateQueries({ queryKey: ['items', variables.listId] });
+    onSuccess: (data) => {
+      upsertItem(queryClient, data);
     },
   });
 }
@@ -39,7 +71,7 @@ export function useDeleteItem() {
     mutationFn: ({ listId, itemId }: { listId: string; itemId: string }) =>
       itemsApi.delete(listId, itemId),
     onSuccess: (_, variables) => {
-      queryClient.invalidateQueries({ queryKey: ['items', variables.listId] });
+      removeItem(queryClient, variables.listId, variables.itemId, false);
       queryClient.invalidateQueries({ queryKey: ['recycle-bin'] });
     },
   });
@@ -50,8 +82,8 @@ export function useRestoreItem() {
   return useMutation({
     mutationFn: ({ listId, itemId }: { listId: string; itemId: string }) =>
       itemsApi.restore(listId, itemId),
-    onSuccess: (_, variables) => {
-      queryClient.invalidateQueries({ queryKey: ['items', variables.listId] });
+    onSuccess: (data) => {
+      upsertItem(queryClient, data);
       queryClient.invalidateQueries({ queryKey: ['recycle-bin'] });
     },
   });
@@ -84,3 +116,51 @@ export function usePermanentDeleteFromRecycleBin() {
     },
   });
 }
+
+/**
+ * Follow a list's change events and patch the cached items in place instead
+ * of refetching. Events are not replayed across reconnects, so the items
+ * are refetched whenever the stream (re)connects or reports an overflow.
+ */
+export function useListEvents(listId: string) {
+  const queryClient = useQueryClient();
+
+  useEffect(() => {
+    if (!listId) return;
+    const source = new EventSource(`/api/lists/${listId}/events`);
+    let connected = false;
+
+    const refetch = () => queryClient.invalidateQueries({ queryKey: ['items', listId] });
+    const on = <T>(event: string, handler: (data: T) => void) =>
+      source.addEventListener(event, (e) => handler(JSON.parse((e as MessageEvent).data)));
+
+    on('ready', () => {
+      if (connected) refetch();
+      connected = true;
+    });
+    on('resync', refetch);
+    on<Item>('item', (item) => upsertItem(queryClient, item));
+    on<{ id: string; purged: boolean }>('item_deleted', ({ id, purged }) => {
+      removeItem(queryClient, listId, id, purged);
+      queryClient.invalidateQueries({ queryKey: ['recycle-bin'] });
+    });
+    on<{ column_id: string; values: Record<string, unknown> }>('values', ({ column_id, values }) => {
+      patchItems(queryClient, listId, (items) =>
+        items.map((i) => (i.id in values ? { ...i, values: { ...i.values, [column_id]: values[i.id] } } : i))
+      );
+    });
+    on<Column[]>('columns', (columns) => {
+      queryClient.setQueryData<List>(['list', listId], (list) => (list ? { ...list, columns } : list));
+    });
+    on<Partial<List>>('list', (changes) => {
+      queryClient.setQueryData<List>(['list', listId], (list) => (list ? { ...list, ...changes } : list));
+      queryClient.invalidateQueries({ queryKey: ['lists'] });
+    });
+    on('list_deleted', () => {
+      source.close();
+      queryClient.invalidateQueries({ queryKey: ['lists'] });
+    });
+
+    return () => source.close();
+  }, [listId, queryClient]);
+}
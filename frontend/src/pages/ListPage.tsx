@@ -1,7 +1,7 @@
 import { useParams, Link } from 'react-router-dom';
 import { useState } from 'react';
 import { useList, useUpdateList, useDeleteList } from '../hooks/useLists';
-import { useItems } from '../hooks/useItems';
+import { useItems, useListEvents } from '../hooks/useItems';
 import { GridView } from '../components/views';
 import { useNavigate } from 'react-router-dom';
 import { ConfirmModal, Modal } from '../components/ui';
@@ -25,6 +25,7 @@ export function ListPage() {
   const [showAICompletion, setShowAICompletion] = useState(false);
 
   const { data: items, isLoading: itemsLoading } = useItems(id!, showDeletedItems);
+  useListEvents(id!);
 
   if (listLoading || itemsLoading) {
     return (
@@ -112,15 +112,17 @@ export interface ChatMessage {
 }
 
 export interface ChatRequest {
-  list_name: string;
-  item_context: Record<string, unknown>;
+  list_name?: string;
+  item_context?: Record<string, unknown>;
   messages: ChatMessage[];
   model?: string;
+  session_id?: string;  // continue a server-side session; send only the new message
 }
 
 export interface ChatResponse {
   message: string;
   model: string;
+  session_id?: string;
 }
 
 export interface GeminiModel {
@@ -175,6 +177,40 @@ export interface ItemCompletionResponse {
   model: string;
 }
 
+export interface AIFillRequest {
+  model?: string;
+  batch_size?: number;
+  concurrency?: number;
+  skip_existing?: boolean;
+}
+
+export interface AIFillResult {
+  item_id: string;
+  label: string;
+  status: 'success' | 'unknown' | 'error';
+  value: string | null;
+  error: string | null;
+}
+
+export interface AIFillStatus {
+  id: string;
+  list_id: string;
+  column_id: string;
+  model: string;
+  status: 'running' | 'completed' | 'cancelled' | 'failed';
+  total: number;
+  done: number;
+  filled: number;
+  unknown: number;
+  errors: number;
+  skipped: number;
+  error: string | null;
+  started_at: string;
+  finished_at: string | null;
+  results: AIFillResult[];
+  next_cursor: number;
+}
+
 export interface RecycleBinItem {
   id: string;
   list_id: string;
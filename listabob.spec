@@ -40,6 +40,8 @@ a = Analysis(
         'app.config',
         'app.database',
         'app.logger',
+        'app.startup',
+        'app.migrations',
         'app.models',
         'app.schemas',
         'app.api',
@@ -54,6 +56,24 @@ a = Analysis(
         'app.api.chat',
         'app.api.external',
         'app.api.dependencies',
+        'app.api.ai_fill',
+        'app.services',
+        'app.services.config_store',
+        'app.services.gemini',
+        'app.services.completion_cache',
+        'app.services.batch_planner',
+        'app.services.rate_limiter',
+        'app.services.chat_sessions',
+        'app.services.metrics',
+        'app.services.static_files',
+        'app.services.compression',
+        'app.services.write_queue',
+        'app.services.backups',
+        'app.services.replication',
+        'app.services.changes',
+        'app.services.events',
+        'app.services.schema_cache',
+        'app.services.item_cache',
         'sqlalchemy.dialects.sqlite',
     ],
     hookspath=[],